@@ -0,0 +1,23 @@
+from fastapi import APIRouter
+from starlette.responses import JSONResponse
+
+from app.utils.health import get_health_monitor
+
+# Mounted at the root, outside API_PREFIX, and exempt from the tenant middleware
+router = APIRouter()
+
+@router.get("/healthz")
+async def healthz():
+    """
+    Liveness: the process is up and its event loop is serving requests.
+    """
+    return {"status": "ok"}
+
+@router.get("/readyz")
+async def readyz():
+    """
+    Readiness from cached signals: the last database probe, pool utilization and event-loop lag.
+    Returns 503 when this worker should not receive traffic.
+    """
+    ready, report = get_health_monitor().readiness()
+    return JSONResponse(status_code=200 if ready else 503, content=report)
@@ -0,0 +1,37 @@
+from fastapi import APIRouter
+
+from app.db.changefeed import get_change_broker
+from app.db.connections import get_statement_cache_stats
+from app.db.partitions import get_partition_maintainer
+from app.utils.admission import get_admission_controller
+
+router = APIRouter()
+
+@router.get("/ops/db-stats")
+async def read_db_stats():
+    """
+    Statement cache counters and hit ratio of the database engines.
+    """
+    return {"statement_cache": get_statement_cache_stats()}
+
+@router.get("/ops/admission")
+async def read_admission_stats():
+    """
+    Per-tenant admission counters (admitted, rate limited, shed) and current load.
+    """
+    return {"tenants": get_admission_controller().stats()}
+
+@router.get("/ops/changefeed")
+async def read_changefeed_stats():
+    """
+    Open change-feed streams per resource and published/delivered/overflowed event counts.
+    """
+    return get_change_broker().status()
+
+
+@router.get("/ops/partitions")
+async def read_partition_status():
+    """
+    Partitioned tables with their interval and retention, and the outcome of the last maintenance run.
+    """
+    return get_partition_maintainer().status()
\ No newline at end of file
@@ -0,0 +1,129 @@
+import importlib
+import json
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from importlib.metadata import entry_points
+from app.logging_config import backend_logger as logger
+
+# --- Configuration ---
+MANIFEST_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "manifest.json")
+ENDPOINTS_PACKAGE = "app.api.v1.endpoints"
+# Installed packages can contribute routers: `<name> = "package.module:router"`
+ENTRY_POINT_GROUP = "app.api.v1.routers"
+# Comma-separated entry point routers allowed to fail to import (logged and skipped). Any other
+# router that fails to import fails startup, so the app never reports ready with endpoints missing
+OPTIONAL_ROUTERS = {name.strip() for name in os.getenv("OPTIONAL_ROUTERS", "").split(",") if name.strip()}
+
+# Import time (seconds) of every router mounted by build_api_router(), keyed by router name
+router_import_times: dict[str, float] = {}
+
+
+# --- Manifest Management (used by the scaffolding tools) ---
+def load_manifest(manifest_path: str = MANIFEST_PATH) -> list[str]:
+    """Returns the endpoint module names listed in the manifest."""
+    if not os.path.exists(manifest_path):
+        return []
+    with open(manifest_path, "r") as f:
+        return json.load(f).get("routers", [])
+
+def save_manifest(names: list[str], manifest_path: str = MANIFEST_PATH) -> None:
+    """Atomically writes the manifest, keeping the entries sorted and unique."""
+    # A temp file of its own, so concurrent writers never interleave in a shared one
+    fd, tmp_path = tempfile.mkstemp(prefix=".manifest-", suffix=".tmp", dir=os.path.dirname(manifest_path))
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump({"routers": sorted(set(names))}, f, indent=2)
+            f.write("\n")
+        # mkstemp creates the file private; keep the manifest's own permissions
+        mode = os.stat(manifest_path).st_mode & 0o777 if os.path.exists(manifest_path) else 0o644
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, manifest_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+@contextmanager
+def manifest_lock(manifest_path: str = MANIFEST_PATH):
+    """
+    Serializes read-modify-writes of the manifest across processes (the CLI and the MCP
+    server, or two CLI runs), so concurrent scaffolding can't lose a router.
+    """
+    import fcntl
+
+    with open(f"{manifest_path}.lock", "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def register_router(name: str, manifest_path: str = MANIFEST_PATH) -> bool:
+    """Adds an endpoint module (e.g. 'product_items') to the manifest. Returns False if already present."""
+    with manifest_lock(manifest_path):
+        names = load_manifest(manifest_path)
+        if name in names:
+            return False
+        save_manifest(names + [name], manifest_path)
+        return True
+
+def unregister_router(name: str, manifest_path: str = MANIFEST_PATH) -> bool:
+    """Removes an endpoint module from the manifest. Returns False if it wasn't registered."""
+    with manifest_lock(manifest_path):
+        names = load_manifest(manifest_path)
+        if name not in names:
+            return False
+        save_manifest([n for n in names if n != name], manifest_path)
+        return True
+
+
+# --- Discovery ---
+def discover_routers() -> dict[str, str]:
+    """
+    Returns {router_name: "module.path[:attribute]"} from the manifest and the entry point group.
+    If API_ROUTERS is set (comma-separated names), only those routers are returned, so a
+    process serving a subset of the API never imports the other endpoint modules.
+    """
+    targets = {name: f"{ENDPOINTS_PACKAGE}.{name}" for name in load_manifest()}
+    for ep in entry_points(group=ENTRY_POINT_GROUP):
+        targets.setdefault(ep.name, ep.value)
+
+    enabled = os.getenv("API_ROUTERS")
+    if enabled:
+        wanted = {name.strip() for name in enabled.split(",") if name.strip()}
+        targets = {name: target for name, target in targets.items() if name in wanted}
+    return targets
+
+def build_api_router():
+    """
+    Imports every discovered endpoint module and mounts its `router`.
+    Raises RuntimeError if one fails to import, unless it is an entry point router listed in
+    OPTIONAL_ROUTERS (then it is logged and skipped). Manifest entries are never optional.
+    """
+    from fastapi import APIRouter
+
+    api_router = APIRouter()
+    router_import_times.clear()
+    total_start = time.perf_counter()
+    manifest = set(load_manifest())
+
+    for name, target in discover_routers().items():
+        module_path, _, attribute = target.partition(":")
+        start = time.perf_counter()
+        try:
+            module = importlib.import_module(module_path)
+            router = getattr(module, attribute or "router")
+        except Exception as e:
+            if name in manifest or name not in OPTIONAL_ROUTERS:
+                raise RuntimeError(f"Failed to load router '{name}' from '{target}': {e}") from e
+            logger.error(f"❌ Failed to load optional router '{name}' from '{target}'", exc_info=True)
+            continue
+        router_import_times[name] = time.perf_counter() - start
+        api_router.include_router(router)
+        logger.info(f"Mounted router '{name}' in {router_import_times[name] * 1000:.1f} ms")
+
+    logger.info(
+        f"Mounted {len(router_import_times)} routers in {(time.perf_counter() - total_start) * 1000:.1f} ms"
+    )
+    return api_router
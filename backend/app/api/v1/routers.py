@@ -1,5 +1,5 @@
-from app.api.v1.endpoints import messages
-from fastapi import APIRouter
+from app.api.v1.registry import build_api_router
 
-api_router = APIRouter()
-api_router.include_router(messages.router)
\ No newline at end of file
+# Endpoint modules are listed in app/api/v1/manifest.json (maintained by the scaffolding tools)
+# or contributed by installed packages through the "app.api.v1.routers" entry point group.
+api_router = build_api_router()
@@ -1,18 +1,18 @@
 import os
-import subprocess
 import typer
-from jinja2 import Environment, FileSystemLoader
 from typing import List
 from typing_extensions import Annotated
 import re
+from app.utils.templates import get_templates_env
+# Heavier modules (jinja2, alembic/SQLAlchemy, the audit index) are imported inside
+# the commands that need them, so every CLI call starts fast.
 
 # --- Typer App Initialization ---
 app = typer.Typer(help="Master Control Program for project scaffolding and management.")
 
 # --- Configuration ---
-TEMPLATES_DIR = "/workspace/backend/app/templates"
-WORKSPACE_DIR = "/workspace"
-templates_env = Environment(loader=FileSystemLoader(TEMPLATES_DIR))
+WORKSPACE_DIR = os.getenv("WORKSPACE_DIR", "/workspace")
+TEMPLATES_DIR = os.path.join(WORKSPACE_DIR, "backend/app/templates")
 
 # --- Helper Functions ---
 def to_pascal_case(snake_case: str) -> str: return "".join(word.capitalize() for word in snake_case.split('_'))
@@ -31,10 +31,13 @@ class Field:
     def __init__(self, definition: str):
         try:
             parts = definition.split(':')
-            if len(parts) != 3: raise ValueError("Field definition must be in 'name:type:required' format.")
+            if len(parts) not in (3, 4): raise ValueError("Field definition must be in 'name:type:required[:hashed]' format.")
             self.name, self.type = parts[0].strip(), parts[1].strip()
             self.required = parts[2].strip().lower() in ['true', '1', 't', 'y', 'yes']
+            self.hashed = len(parts) == 4 and parts[3].strip().lower() == "hashed"
             if self.type not in ["string", "text", "integer", "float", "boolean", "date", "datetime", "uuid"]: raise ValueError(f"Invalid field type: {self.type}")
+            if len(parts) == 4 and not self.hashed: raise ValueError(f"Unknown field option: {parts[3]}")
+            if self.hashed and self.type not in ["string", "text"]: raise ValueError("Only string and text fields can be hashed.")
         except Exception as e:
             typer.echo(f"Error parsing field definition '{definition}': {e}", err=True)
             raise typer.Exit(code=1)
@@ -44,18 +47,39 @@ class Field:
 @app.command("create-resource")
 def create_resource(
     resource_name: Annotated[str, typer.Argument(help="The singular snake_case name of the resource (e.g., 'product_item').")],
-    fields: Annotated[List[str], typer.Argument(help="List of field definitions in 'name:type:required' format.")]
+    fields: Annotated[List[str], typer.Argument(help="List of field definitions in 'name:type:required[:hashed]' format.")],
+    partition_by: Annotated[str, typer.Option(help="Required datetime field to range-partition the table by (Postgres).")] = None,
+    partition_interval: Annotated[str, typer.Option(help="Partition size: day, week, month or year.")] = "month",
+    retention: Annotated[int, typer.Option(help="Intervals of past partitions kept before they are dropped (0 keeps them forever).")] = 0,
 ):
     """
     Scaffolds the data layer: backend models, schemas, CRUD, endpoints, and frontend API handlers.
     """
     typer.echo(f"Creating resource: {resource_name}")
     parsed_fields = [Field(f) for f in fields]
+    if partition_by:
+        field = next((f for f in parsed_fields if f.name == partition_by), None)
+        error = None
+        if field is None or field.type != "datetime" or not field.required:
+            error = f"--partition-by must name a required datetime field ('{partition_by}' isn't one)."
+        elif partition_interval not in ("day", "week", "month", "year"):
+            error = f"Invalid partition interval: {partition_interval}"
+        elif retention < 0:
+            error = "--retention can't be negative."
+        elif any(f.hashed for f in parsed_fields):
+            # A unique index on a partitioned table must include the partition column
+            error = "Partitioned resources can't have hashed fields: their hashes couldn't be unique."
+        if error:
+            typer.echo(f"Error: {error}", err=True)
+            raise typer.Exit(code=1)
     ctx = {
         "resource_name_snake": resource_name,
         "resource_name_pascal": to_pascal_case(resource_name),
         "resource_name_plural_snake": to_plural(resource_name),
         "fields": parsed_fields,
+        "partition_by": partition_by,
+        "partition_interval": partition_interval,
+        "retention": retention,
         "type_to_sqlalchemy": type_to_sqlalchemy,
         "type_to_pydantic": type_to_pydantic
     }
@@ -65,18 +89,24 @@ def create_resource(
         "frontend": os.path.join(WORKSPACE_DIR, "frontend/src")
     }
 
+    r_snake = ctx["resource_name_snake"]
+    r_plural = ctx["resource_name_plural_snake"]
     files_to_generate = {
-        "backend/model.py.j2": os.path.join(base_paths["backend"], f"models/{ctx["resource_name_snake"]}.py"),
-        "backend/schema.py.j2": os.path.join(base_paths["backend"], f"db/schemas/{ctx["resource_name_snake"]}.py"),
-        "backend/crud.py.j2": os.path.join(base_paths["backend"], f"crud/crud_{ctx["resource_name_snake"]}.py"),
-        "backend/endpoint.py.j2": os.path.join(base_paths["backend"], f"api/v1/endpoints/{ctx["resource_name_plural_snake"]}.py"),
-        "frontend/api_index.js.j2": os.path.join(base_paths["frontend"], f"pages/api/{ctx["resource_name_plural_snake"]}/index.js"),
-        "frontend/api_id.js.j2": os.path.join(base_paths["frontend"], f"pages/api/{ctx["resource_name_plural_snake"]}/[{ctx["resource_name_snake"]}Id].js"),
+        "backend/model.py.j2": os.path.join(base_paths["backend"], f"models/{r_snake}.py"),
+        "backend/schema.py.j2": os.path.join(base_paths["backend"], f"db/schemas/{r_snake}.py"),
+        "backend/crud.py.j2": os.path.join(base_paths["backend"], f"crud/crud_{r_snake}.py"),
+        "backend/endpoint.py.j2": os.path.join(base_paths["backend"], f"api/v1/endpoints/{r_plural}.py"),
+        "frontend/api_index.js.j2": os.path.join(base_paths["frontend"], f"pages/api/{r_plural}/index.js"),
+        "frontend/api_id.js.j2": os.path.join(base_paths["frontend"], f"pages/api/{r_plural}/[{r_snake}Id].js"),
+        "frontend/api_events.js.j2": os.path.join(base_paths["frontend"], f"pages/api/{r_plural}/events.js"),
+        "frontend/api_aggregate.js.j2": os.path.join(base_paths["frontend"], f"pages/api/{r_plural}/aggregate.js"),
+        "frontend/api_import.js.j2": os.path.join(base_paths["frontend"], f"pages/api/{r_plural}/import.js"),
+        "frontend/api_export.js.j2": os.path.join(base_paths["frontend"], f"pages/api/{r_plural}/export.js"),
     }
     
     generated_list = []
     for template_name, output_path in files_to_generate.items():
-        template = templates_env.get_template(template_name)
+        template = get_templates_env(TEMPLATES_DIR).get_template(template_name)
         rendered_content = template.render(ctx)
         os.makedirs(os.path.dirname(output_path), exist_ok=True)
         with open(output_path, "w") as f: f.write(rendered_content)
@@ -85,43 +115,36 @@ def create_resource(
     typer.echo("Generated files:")
     for path in generated_list: typer.echo(f"- {path}")
 
-    # --- Modify backend router ---
-    routers_file_path = os.path.join(base_paths["backend"], "api/v1/routers.py")
-    with open(routers_file_path, "r+") as f:
-        content = f.read()
-        plural_snake = ctx["resource_name_plural_snake"]
-        new_import = f"from app.api.v1.endpoints import {plural_snake}"
-        if new_import not in content:
-            # Add new import alphabetically
-            lines = content.splitlines()
-            imports = [line for line in lines if line.startswith("from")]
-            imports.append(new_import)
-            imports.sort()
-            
-            router_inits = [line for line in lines if "APIRouter()" in line or "api_router.include_router" in line]
-            
-            new_content = "\n".join(imports) + "\n\n" + "\n".join(router_inits)
-            content = new_content
-
-        new_router = f"api_router.include_router({plural_snake}.router)"
-        if new_router not in content:
-            content += f"\n{new_router}"
-        
-        f.seek(0); f.write(content); f.truncate()
-    typer.echo("Updated backend router.")
-
-    # --- Modify models/__init__.py for Alembic autodiscovery ---
-    models_init_path = os.path.join(base_paths["backend"], "models/__init__.py")
-    new_model_import = f"from .{ctx['resource_name_snake']} import {ctx['resource_name_pascal']}"
-    with open(models_init_path, "r+") as f:
-        content = f.read()
-        if new_model_import not in content:
-            f.write(f"\n{new_model_import}")
-    typer.echo("Updated models package for autodiscovery.")
+    # --- Register the router in the endpoint manifest ---
+    # Models need no registration: app.models discovers its modules for Alembic.
+    from app.api.v1.registry import register_router
+    register_router(r_plural, os.path.join(base_paths["backend"], "api/v1/manifest.json"))
+    typer.echo("Registered router in api/v1/manifest.json.")
     
     typer.secho(f"Successfully created resource '{resource_name}'.", fg=typer.colors.GREEN)
 
 
+@app.command("create-task")
+def create_task(
+    task_name: Annotated[str, typer.Argument(help="The snake_case name of the background task (e.g., 'send_welcome_email').")],
+    max_attempts: Annotated[int, typer.Option(help="Attempts before the job is marked failed.")] = 3,
+    timeout: Annotated[float, typer.Option(help="Seconds an attempt may run (0 for no limit).")] = 0,
+    concurrency: Annotated[int, typer.Option(help="Jobs of this task running at once per worker pool (0 for no limit).")] = 0,
+):
+    """
+    Scaffolds an enqueue-able background task stub in app/jobs/tasks.
+    """
+    if not task_name.isidentifier():
+        typer.echo(f"Error: '{task_name}' is not a valid Python identifier.", err=True)
+        raise typer.Exit(code=1)
+    typer.echo(f"Creating task: {task_name}")
+    ctx = {"task_name": task_name, "max_attempts": max_attempts, "timeout": timeout, "concurrency": concurrency}
+    template = get_templates_env(TEMPLATES_DIR).get_template("backend/task.py.j2")
+    output_path = os.path.join(WORKSPACE_DIR, "backend/app/jobs/tasks", f"{task_name}.py")
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    with open(output_path, "w") as f: f.write(template.render(ctx))
+    typer.secho(f"Successfully created task at backend/app/jobs/tasks/{task_name}.py", fg=typer.colors.GREEN)
+
 @app.command("create-frontend-page")
 def create_frontend_page(
     page_name: Annotated[str, typer.Argument(help="The name for the page and its file (e.g., 'poster-board').")]
@@ -131,7 +154,7 @@ def create_frontend_page(
     """
     typer.echo(f"Creating frontend page: {page_name}")
     ctx = {"page_name_pascal": to_pascal_case(page_name)}
-    template = templates_env.get_template("frontend/page.js.j2")
+    template = get_templates_env(TEMPLATES_DIR).get_template("frontend/page.js.j2")
     rendered_content = template.render(ctx)
     output_path = os.path.join(WORKSPACE_DIR, "frontend/src/pages", f"{page_name}.js")
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
@@ -149,7 +172,7 @@ def create_frontend_component(
     typer.echo(f"Creating frontend component: {component_name}")
     
     ctx = {"component_name": component_name}
-    template = templates_env.get_template("frontend/component.js.j2")
+    template = get_templates_env(TEMPLATES_DIR).get_template("frontend/component.js.j2")
     rendered_content = template.render(ctx)
 
     output_dir = os.path.join(WORKSPACE_DIR, "frontend/src/components", path)
@@ -166,7 +189,7 @@ def create_frontend_component(
 def create_api_client(
     file_path: Annotated[str, typer.Argument(help="The path to the component or page file relative to `frontend/src`.")],
     resource_name: Annotated[str, typer.Argument(help="The singular snake_case name of the resource to use (e.g., 'post_item').")],
-    fields: Annotated[List[str], typer.Argument(help="List of the resource's field definitions in 'name:type:required' format.")]
+    fields: Annotated[List[str], typer.Argument(help="List of the resource's field definitions in 'name:type:required[:hashed]' format.")]
 ):
     """
     Injects API client hooks and handlers into a frontend file.
@@ -185,7 +208,7 @@ def create_api_client(
         "fields": parsed_fields,
     }
 
-    template = templates_env.get_template("frontend/api_client.js.j2")
+    template = get_templates_env(TEMPLATES_DIR).get_template("frontend/api_client.js.j2")
     api_client_code = template.render(ctx)
 
     with open(full_path, "r+") as f:
@@ -211,90 +234,41 @@ def create_api_client(
 
 @app.command("audit-resource")
 def audit_resource(
-    resource_name: Annotated[str, typer.Argument(help="The singular snake_case name of the resource to audit.")]
+    resource_names: Annotated[List[str], typer.Argument(help="One or more singular snake_case resource names to audit.")]
 ):
     """
     Checks for alignment errors between Backend Pydantic Schemas and Frontend usage.
+    All given resources are audited in a single pass over the cached frontend index.
     """
-    typer.echo(f"Auditing resource: {resource_name}")
-    
-    # 1. Analyze Backend Schema
-    schema_path = os.path.join(WORKSPACE_DIR, "backend/app/db/schemas", f"{resource_name}.py")
-    if not os.path.exists(schema_path):
-        typer.echo(f"Error: Schema file not found at {schema_path}", err=True)
-        raise typer.Exit(code=1)
-
-    # Note: We can't easily run the python analysis inside this script if it relies on app context, 
-    # but since it uses 'ast', we can implement a similar logic here or assume this script runs in an env 
-    # where it can inspect files.
-    # To keep it simple and consistent with 'mcp_server', we will reproduce the logic or call a shared module if possible.
-    # Since they are separate entry points, I will duplicate the lightweight analysis logic here for the CLI user.
-    
-    import ast
-    
-    required_fields = []
-    all_fields = []
-    
-    try:
-        with open(schema_path, "r") as f:
-            tree = ast.parse(f.read())
-            
-        for node in tree.body:
-            if isinstance(node, ast.ClassDef) and node.name.endswith("Create"):
-                for item in node.body:
-                    if isinstance(item, ast.AnnAssign):
-                        field_name = item.target.id
-                        is_optional = False
-                        if item.value is not None: is_optional = True
-                        if isinstance(item.annotation, ast.Subscript) and getattr(item.annotation.value, 'id', '') == 'Optional':
-                            is_optional = True
-                        all_fields.append(field_name)
-                        if not is_optional:
-                            required_fields.append(field_name)
-    except Exception as e:
-        typer.echo(f"Error parsing schema: {e}", err=True)
-        raise typer.Exit(code=1)
+    from app.utils.frontend_index import FrontendIndex, parse_create_schema
+
+    resources = {}
+    for resource_name in resource_names:
+        typer.echo(f"Auditing resource: {resource_name}")
+        schema_path = os.path.join(WORKSPACE_DIR, "backend/app/db/schemas", f"{resource_name}.py")
+        if not os.path.exists(schema_path):
+            typer.echo(f"Error: Schema file not found at {schema_path}", err=True)
+            raise typer.Exit(code=1)
+        try:
+            resources[resource_name] = parse_create_schema(schema_path)
+        except Exception as e:
+            typer.echo(f"Error parsing schema: {e}", err=True)
+            raise typer.Exit(code=1)
 
-    # 2. Analyze Frontend Usage
     frontend_dir = os.path.join(WORKSPACE_DIR, "frontend/src")
-    typer.echo(f"Scanning frontend directory: {frontend_dir}")
-    
-    r_plural = to_plural(resource_name)
-    api_path = f"/api/{r_plural}"
-    
+    index = FrontendIndex(frontend_dir, os.path.join(WORKSPACE_DIR, ".gemini", "frontend_index.json"))
+    rescanned = index.refresh()
+    typer.echo(f"Scanned frontend directory: {frontend_dir} ({rescanned} changed files)")
+
     issues_count = 0
-    
-    for root, dirs, files in os.walk(frontend_dir):
-        for file in files:
-            if file.endswith(".js") or file.endswith(".jsx") or file.endswith(".ts") or file.endswith(".tsx"):
-                full_path = os.path.join(root, file)
-                try:
-                    with open(full_path, "r") as f:
-                        content = f.read()
-                        if api_path in content or resource_name in content or r_plural in content:
-                            # Analyze this file
-                            rel_path = os.path.relpath(full_path, WORKSPACE_DIR)
-                            file_issues = []
-                            
-                            for field in all_fields:
-                                if "_" in field:
-                                    camel_cased = "".join(word.capitalize() if i > 0 else word for i, word in enumerate(field.split('_')))
-                                    if camel_cased in content and field not in content:
-                                        file_issues.append(f"  - Potential Case Mismatch: Backend expects '{field}', found '{camel_cased}'")
-                            
-                            if "JSON.stringify" in content or "body:" in content:
-                                missing = [req for req in required_fields if req not in content]
-                                if missing:
-                                    file_issues.append(f"  - Missing Required Fields: {', '.join(missing)}")
-                                    
-                            if file_issues:
-                                issues_count += 1
-                                typer.echo(f"\nIn {rel_path}:")
-                                for issue in file_issues:
-                                    typer.echo(issue)
-                except Exception as e:
-                    pass
-    
+    for files in index.audit(resources).values():
+        for full_path, file_issues in files.items():
+            if file_issues:
+                issues_count += 1
+                typer.echo(f"\nIn {os.path.relpath(full_path, WORKSPACE_DIR)}:")
+                for issue in file_issues:
+                    typer.echo(issue)
+
     if issues_count == 0:
         typer.secho("\nNo obvious issues found. Frontend seems aligned.", fg=typer.colors.GREEN)
     else:
@@ -308,22 +282,16 @@ def read_logs(
     """
     Reads and displays the backend application logs.
     """
+    from app.utils.log_sink import log_segments, read_log_lines
+
     log_file = os.path.join(WORKSPACE_DIR, "backend/logs/backend.log")
-    if not os.path.exists(log_file):
+    if not log_segments(log_file):
         typer.echo(f"Log file not found at {log_file}.", err=True)
         raise typer.Exit(code=1)
 
     try:
-        with open(log_file, "r") as f:
-            all_lines = f.readlines()
-        
-        filtered = all_lines
-        if level:
-            level_upper = level.upper()
-            check_str = f" - {level_upper} - "
-            filtered = [line for line in all_lines if check_str in line]
-        
-        result = filtered[-lines:]
+        # Spans rotated segments (including gzipped ones) when the current file has too few lines
+        result = read_log_lines(log_file, lines, level)
         for line in result:
             typer.echo(line, nl=False)
     except Exception as e:
@@ -332,25 +300,70 @@ def read_logs(
 
 @app.command("apply-migrations")
 def apply_migrations(
-    message: Annotated[str, typer.Option(help="Message for the Alembic revision.")] = "New migration"
+    message: Annotated[str, typer.Option(help="Message for the Alembic revision.")] = "New migration",
+    sql: Annotated[bool, typer.Option("--sql", help="Only print the upgrade SQL (offline mode), do not apply it.")] = False,
+    from_revision: Annotated[str, typer.Option(help="Starting revision for --sql output.")] = None
 ):
     """
     Generates and applies database migrations.
     """
+    from app.utils.migrations import get_migration_runner
+
+    runner = get_migration_runner()
+    if sql:
+        try:
+            typer.echo(runner.preview_sql(from_revision=from_revision), nl=False)
+        except Exception as e:
+            typer.echo(f"Error rendering migration SQL: {e}", err=True)
+            raise typer.Exit(code=1)
+        return
+
     typer.echo("Applying database migrations...")
     try:
-        subprocess.run(
-            ["alembic", "revision", "--autogenerate", "-m", message],
-            check=True, cwd=os.path.join(WORKSPACE_DIR, "backend")
-        )
-        subprocess.run(
-            ["alembic", "upgrade", "head"],
-            check=True, cwd=os.path.join(WORKSPACE_DIR, "backend")
-        )
+        output = runner.autogenerate_and_upgrade(message)
+        if output: typer.echo(output, nl=False)
         typer.secho("Database migrations applied successfully.", fg=typer.colors.GREEN)
-    except subprocess.CalledProcessError as e:
+    except Exception as e:
         typer.echo(f"Error applying migrations: {e}", err=True)
         raise typer.Exit(code=1)
 
+@app.command("migrate-tenants")
+def migrate_tenants(
+    schemas: Annotated[List[str], typer.Argument(help="Tenant schemas to migrate (default: every tenant schema).")] = None,
+    revision: Annotated[str, typer.Option(help="Revision to upgrade each schema to.")] = "head",
+    concurrency: Annotated[int, typer.Option(help="Schemas migrated at once (default: TENANT_MIGRATION_CONCURRENCY).")] = None,
+    max_failures: Annotated[int, typer.Option(help="Stop starting schemas after this many failures (0: never).")] = None,
+):
+    """
+    Upgrades every tenant schema in parallel. Re-run it to resume: schemas already at the revision are skipped.
+    """
+    from app.utils.tenant_migrations import (
+        TENANT_MIGRATION_CONCURRENCY, TENANT_MIGRATION_MAX_FAILURES, TenantMigrationOrchestrator,
+    )
+
+    orchestrator = TenantMigrationOrchestrator(
+        concurrency=concurrency if concurrency is not None else TENANT_MIGRATION_CONCURRENCY,
+        max_failures=max_failures if max_failures is not None else TENANT_MIGRATION_MAX_FAILURES,
+    )
+
+    def progress(schema: str, seconds: float, error: str | None, done: int, total: int) -> None:
+        status = f"failed: {error}" if error else f"migrated in {seconds:.2f}s"
+        typer.echo(f"[{done}/{total}] {schema} {status}")
+
+    try:
+        report = orchestrator.run(revision=revision, schemas=schemas or None, progress=progress)
+    except Exception as e:
+        typer.echo(f"Error migrating tenant schemas: {e}", err=True)
+        raise typer.Exit(code=1)
+
+    summary = (
+        f"{len(report['migrated'])} migrated, {report['up_to_date']} already at '{revision}', "
+        f"{len(report['failed'])} failed, {len(report['not_started'])} not started ({report['seconds']}s)."
+    )
+    if report["failed"] or report["not_started"]:
+        typer.secho(f"{summary} Fix the failures and re-run to resume.", fg=typer.colors.YELLOW)
+        raise typer.Exit(code=1)
+    typer.secho(summary, fg=typer.colors.GREEN)
+
 if __name__ == "__main__":
     app()
@@ -1,9 +1,17 @@
-from app.logging_config import backend_logger as logger
+from app.logging_config import backend_logger as logger, throttled_logger
+from collections import OrderedDict
+from dataclasses import make_dataclass
+from datetime import datetime
 from typing import Any, Generic, Sequence, Type, TypeVar
 from pydantic import BaseModel
+from sqlalchemy import Date, DateTime, Float, Integer, bindparam, cast, func, literal_column
 from sqlalchemy.future import select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.sql import text
+from app.db.bulk import export_columns
+from app.db.changefeed import record_change
 from app.db.utils import hash_data
 
 async def check_db_connection(db: AsyncSession) -> bool:
@@ -20,10 +28,13 @@ async def check_db_connection(db: AsyncSession) -> bool:
         return False
 
 # --- Schema Management Functions ---
+# Comment marking the schemas made by create_user_schema, which `migrate-tenants` upgrades
+TENANT_SCHEMA_COMMENT = "tenant schema"
+
 async def create_user_schema(db: AsyncSession, schema_name: str) -> bool:
     """
-    Executes a raw SQL command to create a new schema if it doesn't already exist.
-    This is an idempotent operation.
+    Executes a raw SQL command to create a new schema if it doesn't already exist, and marks
+    it as a tenant schema (TENANT_SCHEMA_COMMENT). This is an idempotent operation.
     """
     # Basic validation to prevent SQL injection with schema names
     if not schema_name.isidentifier():
@@ -33,6 +44,7 @@ async def create_user_schema(db: AsyncSession, schema_name: str) -> bool:
     try:
         logger.info(f"Attempting to create schema '{schema_name}'...")
         await db.execute(text(f'CREATE SCHEMA IF NOT EXISTS "{schema_name}"'))
+        await db.execute(text(f"COMMENT ON SCHEMA \"{schema_name}\" IS '{TENANT_SCHEMA_COMMENT}'"))
         logger.info(f"✅ Schema '{schema_name}' creation statement executed.")
         return True
     except Exception as e:
@@ -45,42 +57,215 @@ ModelType = TypeVar("ModelType")
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
+# --- Aggregation ---
+AGGREGATE_METRICS = ("count", "sum", "avg", "min", "max")
+BUCKET_UNITS = ("hour", "day", "week", "month", "year")
+# Most groups (or buckets) one aggregate() call may return
+AGGREGATE_MAX_GROUPS = 1000
+# Built aggregate statements kept per CRUD object (least recently used are dropped first)
+AGGREGATE_STATEMENT_CACHE_SIZE = 128
+
+# SQLite has no date_trunc; buckets are the truncated timestamp as text
+_SQLITE_BUCKET_FORMATS = {
+    "hour": "%Y-%m-%d %H:00:00",
+    "day": "%Y-%m-%d",
+    "month": "%Y-%m-01",
+    "year": "%Y-01-01",
+}
+
+def _time_bucket(column, unit: str, dialect: str):
+    if dialect == "postgresql":
+        return func.date_trunc(unit, column)
+    if unit == "week":
+        # The Monday on or before the date, as Postgres' date_trunc('week') does
+        return func.date(column, "weekday 0", "-6 days")
+    return func.strftime(_SQLITE_BUCKET_FORMATS[unit], column)
+
+# --- Row Mode ---
+def make_row_class(name: str, fields: Sequence[str]) -> type:
+    """
+    A `__slots__` dataclass holding one row's values, positionally in `fields` order. It is a
+    fraction of the size of an ORM instance, and Pydantic (`from_attributes`) reads its
+    attributes faster than a Row's.
+    """
+    return make_dataclass(name, fields, slots=True)
+
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
-    def __init__(self, model: Type[ModelType]):
+    def __init__(self, model: Type[ModelType], aggregate_fields: Sequence[str] = ()):
         self.model = model
+        # Columns clients may group, sum or bucket by; anything else is rejected by aggregate()
+        self.aggregate_fields = tuple(aggregate_fields)
+        self._aggregate_statements: OrderedDict[tuple, Any] = OrderedDict()
+        # Read statements are built once with bound parameters: each call skips statement
+        # construction and reuses SQLAlchemy's compiled form (and the driver's prepared statement)
+        self._get_statement = select(model).where(model.id == bindparam("id"))
+        self._get_multi_statement = select(model).offset(bindparam("skip")).limit(bindparam("limit"))
+        # Range-partitioned models (see app/db/partitions.py) can list only rows since a moment,
+        # which lets Postgres skip the partitions before it
+        self.partition = model.__table__.info.get("partition")
+        if self.partition:
+            since_column = getattr(model, self.partition["column"])
+            self._get_multi_since_statement = self._get_multi_statement.where(since_column >= bindparam("since"))
+        self._get_by_hashed_statements = {}
+
+        # Row mode: Core selects of the readable columns (all but the derived `_hash` columns)
+        table = model.__table__
+        row_columns = [table.c[name] for name in export_columns(model)]
+        self.row_class = make_row_class(f"{model.__name__}Row", [column.key for column in row_columns])
+        self._get_row_statement = select(*row_columns).where(table.c.id == bindparam("id"))
+        self._get_multi_rows_statement = select(*row_columns).offset(bindparam("skip")).limit(bindparam("limit"))
+        if self.partition:
+            self._get_multi_rows_since_statement = self._get_multi_rows_statement.where(
+                table.c[self.partition["column"]] >= bindparam("since")
+            )
+
+    def _hash_column(self, field: str):
+        """Returns the `<field>_hash` column of the model, raising ValueError if the field isn't hashed."""
+        hash_column = getattr(self.model, f"{field}_hash", None)
+        if hash_column is None:
+            raise ValueError(f"{self.model.__name__}.{field} has no '{field}_hash' column.")
+        return hash_column
+
+    def _apply_hashes(self, data: dict[str, Any]) -> dict[str, Any]:
+        """Fills the `_hash` column of every string field that has one."""
+        for field in list(data.keys()):
+            hash_field_name = f"{field}_hash"
+            if hasattr(self.model, hash_field_name):
+                value = data[field]
+                if isinstance(value, str):
+                    data[hash_field_name] = hash_data(value)
+        return data
+
+    def _log_failure(self, operation: str, error: SQLAlchemyError) -> None:
+        """
+        Logs a failed write, throttled per model, operation and error type (a client retrying
+        a conflicting insert shouldn't flood the log). Only the driver's message is logged,
+        not the statement parameters.
+        """
+        name = self.model.__name__
+        throttled_logger.error(
+            f"❌ {name}.{operation} failed: {type(error).__name__}: {getattr(error, 'orig', None) or error}",
+            key=f"crud:{name}.{operation}:{type(error).__name__}",
+        )
+
+    async def _flush(self, db: AsyncSession, operation: str) -> None:
+        try:
+            await db.flush()
+        except SQLAlchemyError as e:
+            self._log_failure(operation, e)
+            raise
 
     async def get(self, db: AsyncSession, id: Any) -> ModelType | None:
         """Get a single object by its ID."""
-        statement = select(self.model).where(self.model.id == id)
-        result = await db.execute(statement)
+        result = await db.execute(self._get_statement, {"id": id})
         return result.scalar_one_or_none()
 
     async def get_multi(
-        self, db: AsyncSession, *, skip: int = 0, limit: int = 100
+        self, db: AsyncSession, *, skip: int = 0, limit: int = 100, since: datetime | None = None
     ) -> Sequence[ModelType]:
-        """Get multiple objects with pagination."""
-        statement = select(self.model).offset(skip).limit(limit)
-        result = await db.execute(statement)
+        """
+        Get multiple objects with pagination. For partitioned models, `since` limits the
+        result to rows whose partition column is at or after it.
+        """
+        if since is not None:
+            if not self.partition:
+                raise ValueError(f"{self.model.__name__} is not partitioned; 'since' is not supported.")
+            result = await db.execute(self._get_multi_since_statement, {"skip": skip, "limit": limit, "since": since})
+            return result.scalars().all()
+        result = await db.execute(self._get_multi_statement, {"skip": skip, "limit": limit})
         return result.scalars().all()
 
+    async def get_row(self, db: AsyncSession, id: Any, *, dto: bool = False) -> Any | None:
+        """get() in row mode (see get_multi_rows)."""
+        row = (await db.execute(self._get_row_statement, {"id": id})).first()
+        if row is None or not dto:
+            return row
+        return self.row_class(*row)
+
+    async def get_multi_rows(
+        self, db: AsyncSession, *, skip: int = 0, limit: int = 100, since: datetime | None = None,
+        dto: bool = False,
+    ) -> Sequence[Any]:
+        """
+        get_multi() in row mode, for read-only listings: a Core select whose rows never become
+        ORM instances nor enter the session's identity map. Returns Row tuples (values also
+        readable by column name), or `row_class` instances with `dto=True`. `_hash` columns are
+        left out. Rows aren't tracked: changes to them are not saved.
+        """
+        if since is not None:
+            if not self.partition:
+                raise ValueError(f"{self.model.__name__} is not partitioned; 'since' is not supported.")
+            result = await db.execute(self._get_multi_rows_since_statement, {"skip": skip, "limit": limit, "since": since})
+        else:
+            result = await db.execute(self._get_multi_rows_statement, {"skip": skip, "limit": limit})
+        rows = result.all()
+        if not dto:
+            return rows
+        row_class = self.row_class
+        return [row_class(*row) for row in rows]
+
+    async def get_by_hashed(self, db: AsyncSession, field: str, value: str) -> ModelType | None:
+        """Get a single object by the value of a hashed field, using the unique index on `<field>_hash`."""
+        statement = self._get_by_hashed_statements.get(field)
+        if statement is None:
+            statement = select(self.model).where(self._hash_column(field) == bindparam("hash"))
+            self._get_by_hashed_statements[field] = statement
+        result = await db.execute(statement, {"hash": hash_data(value)})
+        return result.scalar_one_or_none()
+
+    async def upsert_by_hashed(
+        self, db: AsyncSession, *, field: str, obj_in: CreateSchemaType | dict,
+        update_fields: Sequence[str] | None = None,
+    ) -> ModelType:
+        """
+        Inserts the object, or updates the existing row with the same hashed `field`, in a single
+        `INSERT ... ON CONFLICT (<field>_hash) DO UPDATE` statement.
+        `update_fields` limits which columns are overwritten on conflict (default: all given fields).
+        """
+        hash_column = self._hash_column(field)
+        values = obj_in if isinstance(obj_in, dict) else obj_in.model_dump()
+        values = self._apply_hashes(dict(values))
+        if not isinstance(values.get(field), str):
+            raise ValueError(f"upsert_by_hashed needs a string value for '{field}'.")
+
+        dialect = db.get_bind().dialect.name
+        if dialect == "postgresql":
+            statement = postgresql.insert(self.model)
+        elif dialect == "sqlite":
+            statement = sqlite.insert(self.model)
+        else:
+            raise ValueError(f"upsert_by_hashed is not supported on '{dialect}'.")
+        statement = statement.values(**values)
+
+        columns = update_fields if update_fields is not None else [
+            name for name in values if name not in (field, hash_column.key)
+        ]
+        # Always set at least the hash itself so the conflicting row is returned
+        set_ = {name: statement.excluded[name] for name in columns} or {hash_column.key: statement.excluded[hash_column.key]}
+        statement = statement.on_conflict_do_update(index_elements=[hash_column], set_=set_).returning(self.model)
+
+        try:
+            result = await db.execute(statement, execution_options={"populate_existing": True})
+        except SQLAlchemyError as e:
+            self._log_failure("upsert_by_hashed", e)
+            raise
+        db_obj = result.scalar_one()
+        record_change(db, self.model.__tablename__, "upsert", db_obj.id)
+        return db_obj
+
     async def create(self, db: AsyncSession, *, obj_in: CreateSchemaType | dict) -> ModelType:
         """
         Create a new object, automatically hashing any fields that have a
         corresponding `_hash` column in the model.
         """
         obj_in_data = obj_in if isinstance(obj_in, dict) else obj_in.model_dump()
-
-        for field in list(obj_in_data.keys()):
-            hash_field_name = f"{field}_hash"
-            if hasattr(self.model, hash_field_name):
-                value = obj_in_data[field]
-                if isinstance(value, str):
-                    obj_in_data[hash_field_name] = hash_data(value)
+        obj_in_data = self._apply_hashes(obj_in_data)
 
         db_obj = self.model(**obj_in_data)
         db.add(db_obj)
-        await db.flush()
+        await self._flush(db, "create")
         await db.refresh(db_obj)
+        record_change(db, self.model.__tablename__, "create", db_obj.id)
         return db_obj
 
     async def update(
@@ -91,25 +276,94 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         corresponding `_hash` column in the model.
         """
         update_data = obj_in if isinstance(obj_in, dict) else obj_in.model_dump(exclude_unset=True)
-
-        for field in list(update_data.keys()):
-            hash_field_name = f"{field}_hash"
-            if hasattr(self.model, hash_field_name):
-                value = update_data[field]
-                if isinstance(value, str):
-                    update_data[hash_field_name] = hash_data(value)
+        update_data = self._apply_hashes(update_data)
         
         for field, value in update_data.items():
             setattr(db_obj, field, value)
             
         db.add(db_obj)
-        await db.flush()
+        await self._flush(db, "update")
         await db.refresh(db_obj)
+        record_change(db, self.model.__tablename__, "update", db_obj.id)
         return db_obj
 
     async def delete(self, db: AsyncSession, *, id: Any) -> ModelType | None:
         obj = await self.get(db, id=id)
         if obj:
             await db.delete(obj)
-            await db.flush()
-        return obj
\ No newline at end of file
+            await self._flush(db, "delete")
+            record_change(db, self.model.__tablename__, "delete", id)
+        return obj
+
+    def _aggregate_column(self, field: str, types: tuple = ()):
+        """Returns the column of an aggregatable field, raising ValueError if it isn't one (or not of `types`)."""
+        if field not in self.aggregate_fields:
+            raise ValueError(f"'{field}' is not an aggregatable field of {self.model.__name__}.")
+        column = getattr(self.model, field)
+        if types and not isinstance(column.type, types):
+            expected = "/".join(t.__name__.lower() for t in types)
+            raise ValueError(f"'{field}' is a {type(column.type).__name__.lower()} field; expected {expected}.")
+        return column
+
+    def _build_aggregate_statement(
+        self, dialect: str, metric: str, field: str | None, group_by: tuple[str, ...],
+        bucket: str | None, bucket_field: str | None,
+    ):
+        if metric not in AGGREGATE_METRICS:
+            raise ValueError(f"Unknown metric '{metric}' (expected one of {', '.join(AGGREGATE_METRICS)}).")
+        if metric == "count":
+            value = func.count(self._aggregate_column(field)) if field else func.count()
+        elif not field:
+            raise ValueError(f"The '{metric}' metric needs a field.")
+        elif metric in ("sum", "avg"):
+            column = self._aggregate_column(field, (Integer, Float))
+            value = cast(func.avg(column), Float) if metric == "avg" else func.sum(column)
+        else:
+            value = getattr(func, metric)(self._aggregate_column(field, (Integer, Float, Date, DateTime)))
+
+        keys = []
+        if bucket:
+            if bucket not in BUCKET_UNITS:
+                raise ValueError(f"Unknown bucket '{bucket}' (expected one of {', '.join(BUCKET_UNITS)}).")
+            if not bucket_field:
+                raise ValueError("Time bucketing needs a bucket_field.")
+            column = self._aggregate_column(bucket_field, (Date, DateTime))
+            keys.append(_time_bucket(column, bucket, dialect).label("bucket"))
+        keys += [self._aggregate_column(name).label(name) for name in group_by]
+
+        statement = select(*keys, value.label("value")).select_from(self.model)
+        if keys:
+            # Grouping and ordering by position works for expressions and plain columns alike
+            positions = [literal_column(str(i + 1)) for i in range(len(keys))]
+            statement = statement.group_by(*positions).order_by(*positions)
+        return statement.limit(bindparam("limit"))
+
+    async def aggregate(
+        self, db: AsyncSession, *, metric: str = "count", field: str | None = None,
+        group_by: Sequence[str] = (), bucket: str | None = None, bucket_field: str | None = None,
+        limit: int = AGGREGATE_MAX_GROUPS,
+    ) -> list[dict[str, Any]]:
+        """
+        Computes count/sum/avg/min/max of `field` (count: rows, when no field is given) in the
+        database, per combination of the `group_by` fields and, with `bucket` ('hour', 'day',
+        'week', 'month' or 'year'), per time bucket of the date/datetime `bucket_field`.
+        Returns one dict per group: the `bucket` (if any), the group-by fields and the `value`.
+        Only fields in `aggregate_fields` are accepted; anything else raises ValueError.
+        """
+        group_by = tuple(group_by)
+        if len(set(group_by)) != len(group_by):
+            raise ValueError("group_by repeats a field.")
+        if len(group_by) > len(self.aggregate_fields):
+            raise ValueError(f"group_by takes at most {len(self.aggregate_fields)} fields.")
+        dialect = db.get_bind().dialect.name
+        key = (dialect, metric, field, group_by, bucket, bucket_field)
+        statement = self._aggregate_statements.get(key)
+        if statement is None:
+            statement = self._build_aggregate_statement(dialect, metric, field, group_by, bucket, bucket_field)
+            self._aggregate_statements[key] = statement
+            while len(self._aggregate_statements) > AGGREGATE_STATEMENT_CACHE_SIZE:
+                self._aggregate_statements.popitem(last=False)
+        else:
+            self._aggregate_statements.move_to_end(key)
+        result = await db.execute(statement, {"limit": max(1, min(limit, AGGREGATE_MAX_GROUPS))})
+        return [dict(row) for row in result.mappings()]
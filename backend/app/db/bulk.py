@@ -0,0 +1,299 @@
+import asyncio
+import codecs
+import csv
+import io
+import os
+import time
+import uuid
+from datetime import date, datetime
+from typing import Any, AsyncIterator, Callable
+from fastapi import Request
+from sqlalchemy import Integer, select, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from starlette.responses import StreamingResponse
+from app.logging_config import backend_logger as logger
+from app.db.changefeed import record_change
+from app.db.replicas import get_replica_set, reads_pinned
+from app.db.utils import hash_data
+
+# --- Configuration ---
+# Rows sent to the database per COPY (executemany on SQLite); bounds the memory of an import
+BULK_CHUNK_ROWS = int(os.getenv("BULK_CHUNK_ROWS", 10000))
+# Longest CSV record an import accepts; bounds the text buffered while waiting for a record's end
+BULK_MAX_RECORD_CHARS = int(os.getenv("BULK_MAX_RECORD_CHARS", 1024 * 1024))
+# COPY output chunks buffered for a slow client before the export waits for it
+EXPORT_QUEUE_CHUNKS = 16
+# Rows fetched per chunk when exporting without COPY (SQLite)
+EXPORT_FETCH_ROWS = 5000
+
+_TRUE_VALUES = ("true", "1", "t", "y", "yes")
+
+
+# --- Columns ---
+def _parse_bool(value: str) -> bool:
+    return value.strip().lower() in _TRUE_VALUES
+
+def _converter(column) -> Callable[[str], Any]:
+    """Parses a CSV value into the column's Python type (binary COPY needs typed values)."""
+    python_type = column.type.python_type
+    if python_type is bool:
+        return _parse_bool
+    if python_type in (date, datetime):
+        return python_type.fromisoformat
+    if python_type is uuid.UUID:
+        return uuid.UUID
+    return python_type
+
+def export_columns(model) -> list[str]:
+    """The columns of the model's CSV form: all but the `_hash` columns, which are derived."""
+    columns = model.__table__.columns
+    return [name for name in columns.keys() if not (name.endswith("_hash") and name[:-5] in columns)]
+
+def _import_plan(model, header: list[str]) -> tuple[list[str], list[Callable], list[int]]:
+    """
+    Checks the CSV header against the model. Returns the target columns, one converter per CSV
+    column, and the CSV positions whose SHA-256 is appended to each row (for `_hash` columns).
+    """
+    columns = model.__table__.columns
+    unknown = [name for name in header if name not in export_columns(model)]
+    if unknown:
+        raise ValueError(f"Unknown column(s) for {model.__name__}: {', '.join(unknown)}.")
+    if len(set(header)) != len(header):
+        raise ValueError("The CSV header repeats a column.")
+    hashed = [i for i, name in enumerate(header) if f"{name}_hash" in columns]
+    return header + [f"{header[i]}_hash" for i in hashed], [_converter(columns[name]) for name in header], hashed
+
+
+# --- Import ---
+async def _advance_sequences(db: AsyncSession, table, columns: list[str]) -> None:
+    """
+    Moves the Postgres sequences of imported key columns past their largest value: COPY writes
+    explicit ids without consuming the sequence, so the next insert would reuse one.
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return
+    preparer = db.get_bind().dialect.identifier_preparer
+    qualified = preparer.format_table(table)
+    for column in table.primary_key.columns:
+        # Only integer keys have sequences (a partitioned table's key also holds its timestamp column)
+        if column.name in columns and isinstance(column.type, Integer):
+            # pg_get_serial_sequence is NULL for a column without a sequence, and setval(NULL, ...) a no-op
+            await db.execute(
+                text(f"SELECT setval(pg_get_serial_sequence(:table, :column), max({preparer.quote(column.name)})) FROM {qualified}"),
+                {"table": qualified, "column": column.name},
+            )
+
+class _RecordScanner:
+    """
+    Finds where the last complete CSV record of a growing text ends: the last newline outside a
+    quoted field. The quote state is carried over between calls, so every character is scanned
+    once (jumping between quotes with str.find) however long a record runs.
+    """
+
+    def __init__(self):
+        self.in_quotes = False
+        self.scanned = 0
+
+    def last_boundary(self, text: str) -> int:
+        """Index of the last record-ending newline in `text` past what was already scanned, or -1."""
+        pos, boundary = self.scanned, -1
+        while True:
+            quote = text.find('"', pos)
+            end = len(text) if quote < 0 else quote
+            if not self.in_quotes:
+                newline = text.rfind("\n", pos, end)
+                if newline >= 0:
+                    boundary = newline
+            if quote < 0:
+                break
+            # A doubled (escaped) quote toggles twice, leaving the state unchanged
+            self.in_quotes = not self.in_quotes
+            pos = quote + 1
+        self.scanned = len(text)
+        return boundary
+
+    def consumed(self, count: int) -> None:
+        """The first `count` characters were cut off the text (up to a boundary, so outside quotes)."""
+        self.scanned -= count
+
+def _parse_records(text: str) -> list[list[str]]:
+    try:
+        return list(csv.reader(io.StringIO(text)))
+    except csv.Error as e:
+        raise ValueError(f"Malformed CSV: {e}") from e
+
+async def _csv_batches(body: AsyncIterator[bytes]) -> AsyncIterator[list[list[str]]]:
+    """
+    Parses a streamed CSV body into batches of records, one batch per network chunk. Only the
+    chunk and an incomplete trailing record are held in memory: a record longer than
+    BULK_MAX_RECORD_CHARS, or a quote never closed, is rejected with ValueError.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    scanner = _RecordScanner()
+    pending = ""
+    async for chunk in body:
+        text = pending + decoder.decode(chunk)
+        cut = scanner.last_boundary(text)
+        if cut < 0:
+            if len(text) > BULK_MAX_RECORD_CHARS:
+                raise ValueError(
+                    f"A CSV record is longer than {BULK_MAX_RECORD_CHARS} characters (is a quote left unterminated?)."
+                )
+            pending = text
+            continue
+        pending = text[cut + 1:]
+        scanner.consumed(cut + 1)
+        yield _parse_records(text[:cut + 1])
+    text = pending + decoder.decode(b"", final=True)
+    scanner.last_boundary(text)
+    if scanner.in_quotes:
+        raise ValueError("The CSV ends inside a quoted field.")
+    if text:
+        yield _parse_records(text)
+
+async def _copy_rows(db: AsyncSession, table, columns: list[str], rows: list[tuple]) -> None:
+    """Writes rows in the session's transaction: binary COPY on Postgres, executemany elsewhere."""
+    if db.get_bind().dialect.name == "postgresql":
+        connection = await db.connection()
+        raw = (await connection.get_raw_connection()).driver_connection
+        await raw.copy_records_to_table(table.name, records=rows, columns=columns, schema_name=table.schema)
+    else:
+        await db.execute(table.insert(), [dict(zip(columns, row)) for row in rows])
+
+async def import_csv(crud, db: AsyncSession, body: AsyncIterator[bytes]) -> dict:
+    """
+    Inserts the rows of a streamed CSV (header row first, columns named as the model's fields)
+    in chunks of BULK_CHUNK_ROWS, within the session's transaction: nothing is imported unless
+    every row is. Empty values are NULL, as in Postgres' CSV COPY. Hashed fields get their
+    `_hash` column filled in. Raises ValueError for malformed input or rows the database rejects.
+    """
+    import asyncpg
+
+    model = crud.model
+    table = model.__table__
+    start = time.perf_counter()
+    plan = None
+    rows, imported, row_number = [], 0, 0
+
+    async def flush() -> None:
+        nonlocal rows, imported
+        try:
+            await _copy_rows(db, table, columns, rows)
+        except (SQLAlchemyError, asyncpg.PostgresError) as e:
+            crud._log_failure("import_csv", e)
+            first = row_number - len(rows) + 1
+            raise ValueError(f"Rows {first}-{row_number} were rejected by the database: {getattr(e, 'orig', None) or e}") from e
+        imported += len(rows)
+        rows = []
+
+    async for records in _csv_batches(body):
+        for record in records:
+            if not record:
+                continue
+            if plan is None:
+                plan = columns, converters, hashed = _import_plan(model, record)
+                continue
+            row_number += 1
+            if len(record) != len(converters):
+                raise ValueError(f"Row {row_number}: expected {len(converters)} values, got {len(record)}.")
+            try:
+                row = [None if value == "" else convert(value) for convert, value in zip(converters, record)]
+            except ValueError as e:
+                raise ValueError(f"Row {row_number}: {e}") from None
+            for i in hashed:
+                row.append(hash_data(record[i]) if record[i] != "" else None)
+            rows.append(tuple(row))
+            if len(rows) >= BULK_CHUNK_ROWS:
+                await flush()
+    if plan is None:
+        raise ValueError("The CSV is empty; a header row naming the columns is required.")
+    if rows:
+        await flush()
+
+    if imported:
+        await _advance_sequences(db, table, columns)
+        record_change(db, table.name, "import", None)
+    seconds = time.perf_counter() - start
+    logger.info(f"✅ Imported {imported} {table.name} rows in {seconds:.2f}s.")
+    return {"imported": imported, "seconds": round(seconds, 3), "rows_per_second": round(imported / seconds) if seconds else None}
+
+
+# --- Export ---
+async def _copy_to_chunks(engine: AsyncEngine, table, columns: list[str]) -> AsyncIterator[bytes]:
+    """
+    Streams `COPY ... TO STDOUT (FORMAT csv, HEADER)` output. COPY writes into a bounded queue,
+    so a slow client pauses the export instead of buffering the table in memory.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=EXPORT_QUEUE_CHUNKS)
+
+    async def write(chunk) -> None:
+        # asyncpg hands over a buffer it may reuse (a bytearray or memoryview): keep a copy
+        await queue.put(bytes(chunk))
+
+    async def produce():
+        cancelled = False
+        try:
+            async with engine.connect() as connection:
+                raw = (await connection.get_raw_connection()).driver_connection
+                if "partition" in table.info:
+                    # COPY TO only reads plain tables; a partitioned one is copied from a query
+                    preparer = engine.dialect.identifier_preparer
+                    query = f"SELECT {', '.join(map(preparer.quote, columns))} FROM {preparer.format_table(table)}"
+                    await raw.copy_from_query(query, output=write, format="csv", header=True)
+                else:
+                    await raw.copy_from_table(
+                        table.name, schema_name=table.schema, columns=columns,
+                        output=write, format="csv", header=True,
+                    )
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+        finally:
+            # Nobody reads the queue of a cancelled export: waiting for room would never return
+            if not cancelled:
+                await queue.put(None)
+
+    producer = asyncio.create_task(produce())
+    try:
+        while (chunk := await queue.get()) is not None:
+            yield chunk
+        await producer  # re-raises a failed COPY
+    finally:
+        # The client went away (or the export failed): stop COPY and release the connection
+        producer.cancel()
+        await asyncio.gather(producer, return_exceptions=True)
+
+async def _select_chunks(engine: AsyncEngine, table, columns: list[str]) -> AsyncIterator[str]:
+    """Streams the table as CSV through a server-side cursor, EXPORT_FETCH_ROWS rows at a time."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(columns)
+    statement = select(*(table.c[name] for name in columns)).order_by(*table.primary_key.columns)
+    async with engine.connect() as connection:
+        result = await connection.stream(statement)
+        async for rows in result.partitions(EXPORT_FETCH_ROWS):
+            writer.writerows(rows)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+async def export_csv(crud, request: Request) -> StreamingResponse:
+    """
+    Streams every row of the resource as CSV (header row first, `_hash` columns left out),
+    read from a replica when one is available. Memory use is bounded by the chunk size,
+    not by the table.
+    """
+    table = crud.model.__table__
+    columns = export_columns(crud.model)
+    _, engine = (await get_replica_set()).choose(reads_pinned(request))
+    if engine.dialect.name == "postgresql":
+        chunks = _copy_to_chunks(engine, table, columns)
+    else:
+        chunks = _select_chunks(engine, table, columns)
+    return StreamingResponse(
+        chunks, media_type="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="{table.name}.csv"'},
+    )
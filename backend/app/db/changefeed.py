@@ -0,0 +1,240 @@
+import asyncio
+import json
+import os
+from dataclasses import dataclass, field
+from fastapi import Request
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.responses import StreamingResponse
+from app.logging_config import backend_logger as logger
+from app.db.connections import get_engine
+
+# --- Configuration ---
+CHANGEFEED_ENABLED = os.getenv("CHANGEFEED_ENABLED", "true").lower() in ("true", "1", "yes")
+# Postgres channel every process LISTENs on
+CHANGEFEED_CHANNEL = "changefeed"
+# Events buffered per SSE connection; a client that falls further behind is told to resync
+CHANGEFEED_QUEUE_SIZE = int(os.getenv("CHANGEFEED_QUEUE_SIZE", 256))
+# Comment line sent on idle streams so proxies don't close them
+CHANGEFEED_HEARTBEAT = float(os.getenv("CHANGEFEED_HEARTBEAT", 15))
+# Streams are closed after this long; EventSource reconnects (possibly to another worker)
+CHANGEFEED_MAX_STREAM_SECONDS = float(os.getenv("CHANGEFEED_MAX_STREAM_SECONDS", 300))
+# NOTIFY payloads are limited to 8000 bytes; changes of one commit are split below this
+NOTIFY_PAYLOAD_LIMIT = 7500
+
+
+# --- Broker ---
+@dataclass(eq=False)
+class Subscription:
+    resource: str
+    queue: asyncio.Queue
+    overflowed: bool = False
+    closed: bool = False
+
+
+@dataclass
+class ChangeBroker:
+    """
+    Fans change events out to this process's SSE subscribers.
+
+    On Postgres, committed changes arrive through LISTEN on CHANGEFEED_CHANNEL, so every worker
+    sees every worker's writes. Elsewhere (SQLite, local testing) sessions publish here directly
+    after commit, and only subscribers of the same process see them.
+    Each subscriber has a bounded queue: publishing never blocks, and a subscriber whose queue
+    is full is marked overflowed and receives a single resync instead of the missed events.
+    """
+    subscribers: dict[str, set[Subscription]] = field(default_factory=dict)
+    sequence: int = 0
+    stats: dict = field(default_factory=lambda: {"published": 0, "delivered": 0, "overflowed": 0})
+    _listener_task: asyncio.Task | None = None
+
+    def subscribe(self, resource: str) -> Subscription:
+        subscription = Subscription(resource, asyncio.Queue(maxsize=CHANGEFEED_QUEUE_SIZE))
+        self.subscribers.setdefault(resource, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self.subscribers.get(subscription.resource, set()).discard(subscription)
+
+    def publish(self, changes: list[dict]) -> None:
+        for change in changes:
+            self.sequence += 1
+            event = {**change, "seq": self.sequence}
+            self.stats["published"] += 1
+            for subscription in self.subscribers.get(change["resource"], ()):
+                if subscription.overflowed:
+                    continue
+                try:
+                    subscription.queue.put_nowait(event)
+                    self.stats["delivered"] += 1
+                except asyncio.QueueFull:
+                    subscription.overflowed = True
+                    self.stats["overflowed"] += 1
+
+    def resync_all(self) -> None:
+        """Tells every subscriber to refetch (e.g. after the LISTEN connection was lost)."""
+        for subscriptions in self.subscribers.values():
+            for subscription in subscriptions:
+                subscription.overflowed = True
+
+    async def start(self) -> None:
+        """Starts listening for other processes' changes if the database is Postgres."""
+        engine = await get_engine()
+        if engine.dialect.name == "postgresql":
+            self._listener_task = asyncio.create_task(self._listen(engine))
+        else:
+            logger.info("Change feed: in-process broker (changes are only seen by this process).")
+
+    async def stop(self) -> None:
+        if self._listener_task:
+            self._listener_task.cancel()
+            await asyncio.gather(self._listener_task, return_exceptions=True)
+        # End every open stream instead of letting it hold up shutdown
+        for subscriptions in self.subscribers.values():
+            for subscription in subscriptions:
+                subscription.closed = True
+                while not subscription.queue.empty():
+                    subscription.queue.get_nowait()
+                subscription.queue.put_nowait(None)
+
+    def _on_notify(self, connection, pid, channel, payload: str) -> None:
+        try:
+            self.publish(json.loads(payload))
+        except ValueError as e:
+            logger.error(f"❌ Ignoring malformed change notification: {e}")
+
+    async def _listen(self, engine) -> None:
+        """Holds one connection LISTENing on the channel, reconnecting if it drops."""
+        while True:
+            try:
+                async with engine.connect() as conn:
+                    raw = (await conn.get_raw_connection()).driver_connection
+                    await raw.add_listener(CHANGEFEED_CHANNEL, self._on_notify)
+                    logger.info(f"✅ Change feed: listening on '{CHANGEFEED_CHANNEL}'.")
+                    try:
+                        while not raw.is_closed():
+                            await asyncio.sleep(5)
+                    finally:
+                        if not raw.is_closed():
+                            await raw.remove_listener(CHANGEFEED_CHANNEL, self._on_notify)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Change feed listener failed: {e}")
+            # Notifications may have been missed while disconnected
+            self.resync_all()
+            await asyncio.sleep(5)
+
+    def status(self) -> dict:
+        return {
+            "subscribers": {resource: len(subs) for resource, subs in self.subscribers.items() if subs},
+            **self.stats,
+        }
+
+
+# --- Global Broker ---
+_broker: ChangeBroker | None = None
+
+def get_change_broker() -> ChangeBroker:
+    """Returns the process-wide change broker, creating it if necessary."""
+    global _broker
+    if _broker is None:
+        _broker = ChangeBroker()
+    return _broker
+
+
+# --- Recording Changes (used by CRUDBase) ---
+def record_change(db: AsyncSession, resource: str, op: str, id) -> None:
+    """
+    Queues a change on the session. It is only published if the session commits:
+    as NOTIFYs sent inside the committing transaction on Postgres, otherwise to the
+    in-process broker right after the commit. An `id` of None means many rows changed
+    (e.g. a bulk import); subscribers are told to resync.
+    """
+    if CHANGEFEED_ENABLED:
+        db.sync_session.info.setdefault("changes", []).append({"resource": resource, "op": op, "id": id})
+
+def _notify_payloads(changes: list[dict]) -> list[str]:
+    """Serializes the changes as JSON arrays, each under NOTIFY_PAYLOAD_LIMIT bytes."""
+    payloads, batch, size = [], [], 2
+    for change in changes:
+        encoded = json.dumps(change, default=str)
+        if batch and size + len(encoded) + 1 > NOTIFY_PAYLOAD_LIMIT:
+            payloads.append(f"[{','.join(batch)}]")
+            batch, size = [], 2
+        batch.append(encoded)
+        size += len(encoded) + 1
+    if batch:
+        payloads.append(f"[{','.join(batch)}]")
+    return payloads
+
+@event.listens_for(Session, "before_commit")
+def _notify_changes(session):
+    changes = session.info.get("changes")
+    if changes and session.get_bind().dialect.name == "postgresql":
+        # Postgres delivers NOTIFYs only when (and if) the transaction commits
+        for payload in _notify_payloads(changes):
+            session.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": CHANGEFEED_CHANNEL, "payload": payload})
+        session.info["changes"] = []
+
+@event.listens_for(Session, "after_commit")
+def _publish_changes(session):
+    changes = session.info.pop("changes", None)
+    if changes:
+        get_change_broker().publish(changes)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session):
+    session.info.pop("changes", None)
+
+
+# --- Server-Sent Events ---
+def _sse(event: str, data: dict, id: int | None = None) -> str:
+    return (f"id: {id}\n" if id is not None else "") + f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+async def stream_changes(request: Request, resource: str) -> StreamingResponse:
+    """
+    Server-sent events for changes of one resource (table):
+
+    - `ready` when the stream opens (a reconnecting client should refetch),
+    - `change` with {"op": "create"|"update"|"upsert"|"delete", "id": ...} per committed change,
+    - `resync` when events were dropped because the client fell behind: refetch everything.
+    """
+    broker = get_change_broker()
+    subscription = broker.subscribe(resource)
+
+    async def events():
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + CHANGEFEED_MAX_STREAM_SECONDS
+        try:
+            yield f"retry: 3000\n{_sse('ready', {'resource': resource})}"
+            while loop.time() < deadline and not await request.is_disconnected():
+                if subscription.closed:
+                    return
+                if subscription.overflowed:
+                    # Drop what's queued: the client refetches everything anyway
+                    while not subscription.queue.empty():
+                        subscription.queue.get_nowait()
+                    subscription.overflowed = False
+                    yield _sse("resync", {"resource": resource})
+                    continue
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), CHANGEFEED_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                if event is None:
+                    return
+                if event["id"] is None:
+                    yield _sse("resync", {"resource": resource})
+                    continue
+                yield _sse("change", {"op": event["op"], "id": event["id"]}, id=event["seq"])
+        finally:
+            broker.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(), media_type="text/event-stream",
+        # no-transform and X-Accel-Buffering keep proxies from buffering the stream
+        headers={"Cache-Control": "no-cache, no-transform", "X-Accel-Buffering": "no"},
+    )
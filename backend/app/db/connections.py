@@ -1,13 +1,54 @@
 import os
+import time
 from app.logging_config import backend_logger as logger
 from typing import AsyncGenerator
+from fastapi import Request, Response
+from sqlalchemy import event
+from sqlalchemy.engine import default, make_url
+from sqlalchemy.exc import InterfaceError, OperationalError
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.sql import Select
 from app.secrets_loader import get_secret
+from app.utils.request_context import record_span, request_spans_var
 
 
 # --- Global Engine ---
 _engine = None
+# Only set in SQLite mode, where `_engine` is the single write connection and readers use this pool
+_read_engine = None
+
+# --- Pool Sizing ---
+# Per-process pool of each server engine; app/serve.py splits DB_CONNECTION_BUDGET across workers
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+
+# --- Statement Caching ---
+# Size of SQLAlchemy's per-engine cache of compiled statements (SQLAlchemy's default is 500)
+SQL_COMPILED_CACHE_SIZE = int(os.getenv("SQL_COMPILED_CACHE_SIZE", 1200))
+# Prepared statements kept per asyncpg connection (SQLAlchemy's default is 100)
+ASYNCPG_PREPARED_STATEMENT_CACHE_SIZE = int(os.getenv("ASYNCPG_PREPARED_STATEMENT_CACHE_SIZE", 500))
+
+# Compiled-cache outcomes of every statement executed through engines from create_db_engine()
+statement_cache_stats = {"hits": 0, "misses": 0, "uncached": 0}
+
+# Read engines run in autocommit: no BEGIN/COMMIT/ROLLBACK round trips around each read.
+# Dedicated read engines are created with it; the shared primary engine gets it per connection.
+READ_ONLY_ENGINE_OPTIONS = {"isolation_level": "AUTOCOMMIT"}
+
+# --- SQLite Configuration ---
+SQLITE_READ_POOL_SIZE = int(os.getenv("SQLITE_READ_POOL_SIZE", 4))
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    # NORMAL is durable in WAL mode except for the last transactions on power loss
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    # Negative values are KiB, so this is 64 MB of page cache per connection
+    "cache_size": int(os.getenv("SQLITE_CACHE_SIZE", -64000)),
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", 256 * 1024 * 1024)),
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000)),
+    "temp_store": "MEMORY",
+    "foreign_keys": "ON",
+}
 
 async def get_database_url() -> str:
     """
@@ -18,32 +59,206 @@ async def get_database_url() -> str:
     if database_url:
         logger.warning("Fetched 'database_url' from environment variable. For production, use secrets_loader.")
         return database_url
+    sqlite_path = os.getenv("SQLITE_PATH")
+    if sqlite_path:
+        logger.info(f"Using embedded SQLite database at '{sqlite_path}'.")
+        return f"sqlite+aiosqlite:///{sqlite_path}"
+
+def _count_cache_outcome(conn, cursor, statement, parameters, context, executemany):
+    if context is None:
+        return
+    if context.cache_hit == default.CACHE_HIT:
+        statement_cache_stats["hits"] += 1
+    elif context.cache_hit == default.CACHE_MISS:
+        statement_cache_stats["misses"] += 1
+    else:
+        statement_cache_stats["uncached"] += 1
+
+# --- Request Span Timing ---
+def _start_sql_span(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and request_spans_var.get() is not None:
+        context._span_start = time.perf_counter()
+
+def _end_sql_span(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "_span_start", None)
+    if start is not None:
+        record_span("sql", time.perf_counter() - start)
+
+@event.listens_for(Session, "after_transaction_create")
+def _start_session_span(session, transaction):
+    # A session's outermost transaction begins lazily, right before its first connection checkout
+    if transaction.parent is None and request_spans_var.get() is not None:
+        session.info["span_start"] = time.perf_counter()
+
+@event.listens_for(Session, "after_begin")
+def _end_session_span(session, transaction, connection):
+    start = session.info.pop("span_start", None)
+    if start is not None:
+        record_span("session", time.perf_counter() - start)
+
+def get_statement_cache_stats() -> dict:
+    """Returns the compiled-cache counters, the hit ratio and the configured cache sizes."""
+    cached = statement_cache_stats["hits"] + statement_cache_stats["misses"]
+    return {
+        **statement_cache_stats,
+        "hit_ratio": round(statement_cache_stats["hits"] / cached, 4) if cached else None,
+        "compiled_cache_size": SQL_COMPILED_CACHE_SIZE,
+        "asyncpg_prepared_statement_cache_size": ASYNCPG_PREPARED_STATEMENT_CACHE_SIZE,
+    }
+
+def create_db_engine(database_url: str, **kwargs):
+    """create_async_engine() with the configured statement cache sizes, cache statistics and SQL span timing."""
+    options = {"query_cache_size": SQL_COMPILED_CACHE_SIZE, **kwargs}
+    if make_url(database_url).get_driver_name() == "asyncpg":
+        options["connect_args"] = {
+            "prepared_statement_cache_size": ASYNCPG_PREPARED_STATEMENT_CACHE_SIZE,
+            **options.get("connect_args", {}),
+        }
+    engine = create_async_engine(database_url, **options)
+    event.listen(engine.sync_engine, "after_cursor_execute", _count_cache_outcome)
+    event.listen(engine.sync_engine, "before_cursor_execute", _start_sql_span)
+    event.listen(engine.sync_engine, "after_cursor_execute", _end_sql_span)
+    return engine
+
+def is_sqlite_url(database_url: str) -> bool:
+    return make_url(database_url).get_backend_name() == "sqlite"
+
+def apply_sqlite_pragmas(engine, read_only: bool = False) -> None:
+    """
+    Applies SQLITE_PRAGMAS to every new DBAPI connection of the engine.
+    Connections of read-only engines also get `query_only`, so a stray write fails loudly.
+    """
+    pragmas = {**SQLITE_PRAGMAS, "query_only": "ON"} if read_only else SQLITE_PRAGMAS
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+def _create_sqlite_engines(database_url: str):
+    """
+    Creates the SQLite engine pair: a single-connection writer, so writers queue in-process
+    instead of fighting over the database lock, and a pool of reader connections which
+    WAL lets run concurrently with the writer.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(make_url(database_url).database)), exist_ok=True)
+    writer = create_db_engine(database_url, pool_size=1, max_overflow=0, pool_timeout=60)
+    reader = create_db_engine(
+        database_url, pool_size=SQLITE_READ_POOL_SIZE, max_overflow=0, **READ_ONLY_ENGINE_OPTIONS
+    )
+    apply_sqlite_pragmas(writer)
+    apply_sqlite_pragmas(reader, read_only=True)
+    logger.info(f"SQLite mode: 1 write connection, {SQLITE_READ_POOL_SIZE} read connections.")
+    return writer, reader
 
 async def get_engine():
-    """Returns the singleton async engine, creating it if necessary."""
-    global _engine
+    """
+    Returns the singleton async engine, creating it if necessary.
+    In SQLite mode this is the write engine; see get_read_engine().
+    """
+    global _engine, _read_engine
     if _engine is None:
         DATABASE_URL = await get_database_url()
         logger.info("Creating new SQLAlchemy async engine.")
-        # pool_pre_ping=True helps prevent connection errors on long-lived applications
-        _engine = create_async_engine(DATABASE_URL, pool_pre_ping=True)
+        if is_sqlite_url(DATABASE_URL) and make_url(DATABASE_URL).database not in (None, "", ":memory:"):
+            _engine, _read_engine = _create_sqlite_engines(DATABASE_URL)
+            AsyncSessionFactory.configure(sync_session_class=SQLiteRoutingSession)
+        elif is_sqlite_url(DATABASE_URL):
+            # In-memory SQLite gets a StaticPool (one shared connection), which takes no pool sizes
+            _engine = create_db_engine(DATABASE_URL, pool_pre_ping=True)
+        else:
+            # pool_pre_ping=True helps prevent connection errors on long-lived applications
+            _engine = create_db_engine(
+                DATABASE_URL, pool_pre_ping=True, pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW
+            )
     return _engine
 
+async def get_read_engine():
+    """Returns the engine for read-only work (the reader pool in SQLite mode, otherwise the main engine)."""
+    engine = await get_engine()
+    return _read_engine or engine
+
+def _reset_engines_after_fork() -> None:
+    """
+    Drops engines inherited from the parent process. Their pooled connections belong to the
+    parent: they are abandoned without being closed, and the child creates its own on first use.
+    """
+    global _engine, _read_engine
+    for engine in (_engine, _read_engine):
+        if engine is not None:
+            engine.sync_engine.dispose(close=False)
+    _engine = _read_engine = None
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_engines_after_fork)
+
+def get_pool_status(engine=None) -> dict | None:
+    """
+    Checked-out connections and utilization of an engine's pool (the main engine by default).
+    Returns None if the engine doesn't exist yet or its pool doesn't track checkouts.
+    """
+    engine = engine or _engine
+    if engine is None or not hasattr(engine.pool, "checkedout"):
+        return None
+    pool = engine.pool
+    # max_overflow < 0 means the pool can always open another connection
+    capacity = pool.size() + pool._max_overflow if pool._max_overflow >= 0 else None
+    checked_out = pool.checkedout()
+    return {
+        "size": pool.size(),
+        "checked_out": checked_out,
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "capacity": capacity,
+        "utilization": round(checked_out / capacity, 4) if capacity else None,
+    }
+
 # --- Session Management ---
+class SQLiteRoutingSession(Session):
+    """
+    Sends SELECTs to the reader pool and everything else to the write connection.
+    Once a session has written, it sticks to the writer so it reads its own uncommitted changes.
+    """
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if _read_engine is None:
+            return super().get_bind(mapper=mapper, clause=clause, **kwargs)
+        if self.info.get("wrote") or self._flushing or not isinstance(clause, Select):
+            self.info["wrote"] = True
+            return _engine.sync_engine
+        return _read_engine.sync_engine
+
 # Create a sessionmaker factory that will be used to create sessions.
 AsyncSessionFactory = sessionmaker(
     class_=AsyncSession,
     expire_on_commit=False,
 )
 
-async def get_db() -> AsyncGenerator[AsyncSession, None]:
+# Read sessions are bound per request and never flush, so autoflush is off
+ReadSessionFactory = sessionmaker(
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autoflush=False,
+)
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+# Errors that mean a read replica is unreachable (asyncpg raises OSError itself when connecting)
+REPLICA_ERRORS = (OperationalError, InterfaceError, OSError)
+
+async def get_db(request: Request, response: Response) -> AsyncGenerator[AsyncSession, None]:
     """
     FastAPI dependency that provides a SQLAlchemy AsyncSession with automatic
     transaction management.
     - Commits the transaction if the request is successful.
     - Rolls back the transaction if an exception occurs.
     - Always closes the session.
+    - For writes, pins the client's reads to the primary (see app/db/replicas.py). The cookie
+      must be set before the endpoint returns; a pin left by a failed write is harmless.
     """
+    if request.method not in SAFE_METHODS:
+        from app.db.replicas import pin_reads
+        pin_reads(response)
     engine = await get_engine()
     AsyncSessionFactory.configure(bind=engine)
     async with AsyncSessionFactory() as session:
@@ -54,4 +269,34 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             await session.rollback()
             raise
         finally:
-            await session.close()
\ No newline at end of file
+            await session.close()
+
+async def get_read_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    FastAPI dependency for read-only endpoints.
+    The session is bound to a read replica chosen by the replica set (or the primary if none
+    is configured, healthy, reachable, or the client wrote recently). Its engine runs in autocommit, so
+    each read is a single statement round trip, and the session is never committed.
+    """
+    from app.db.replicas import get_replica_set, reads_pinned
+
+    replica_set = await get_replica_set()
+    name, engine = replica_set.choose(reads_pinned(request))
+    session = ReadSessionFactory(bind=engine)
+    if name != "primary":
+        # Connect before handing the session out, so a replica that is down costs this read a
+        # detour to the primary rather than a 500
+        try:
+            await session.connection()
+        except REPLICA_ERRORS as e:
+            replica_set.mark_failed(name, e)
+            await session.close()
+            name, engine = "primary", replica_set.primary
+            session = ReadSessionFactory(bind=engine)
+    async with session:
+        try:
+            yield session
+        except REPLICA_ERRORS as e:
+            replica_set.mark_failed(name, e)
+            raise
+    replica_set.mark_ok(name)
@@ -0,0 +1,243 @@
+import asyncio
+import os
+import re
+import time
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import MetaData, Table, text
+from sqlalchemy.engine import Connection, make_url
+from app.logging_config import backend_logger as logger
+from app.db.base_class import Base
+from app.db.connections import get_engine
+
+# --- Configuration ---
+PARTITION_INTERVALS = ("day", "week", "month", "year")
+# Future partitions kept ready ahead of the current one, so inserts never find no partition
+PARTITION_PREMAKE = int(os.getenv("PARTITION_PREMAKE", 3))
+# How often each worker checks whether partitions need creating or dropping
+PARTITION_MAINTENANCE_INTERVAL = float(os.getenv("PARTITION_MAINTENANCE_INTERVAL", 3600))
+# Maintenance waits at most this long for locks on a busy parent table, then retries next round
+PARTITION_LOCK_TIMEOUT = os.getenv("PARTITION_LOCK_TIMEOUT", "5s")
+# Advisory lock taken by the worker (or migration) running maintenance of a schema; the others skip it this round
+PARTITION_LOCK_KEY = 7_034_162
+# Partitions are named after their parent and the start of their range, e.g. events_p20261001
+_PARTITION_SUFFIX = re.compile(r"_p(\d{8})$")
+
+
+def _partitioning_enabled() -> bool:
+    """Range partitioning needs Postgres; in SQLite mode partitioned models are plain tables."""
+    database_url = os.getenv("DATABASE_URL")
+    if database_url:
+        return make_url(database_url).get_backend_name() == "postgresql"
+    return not os.getenv("SQLITE_PATH")
+
+# Read once, when the models are defined: it decides the shape of their primary keys. A table
+# created with it off but living on Postgres is caught by maintain_partitions()
+PARTITIONING_ENABLED = _partitioning_enabled()
+
+
+# --- Declaring Partitioned Tables ---
+def range_partitioned(column: str, interval: str = "month", retention: int = 0) -> dict:
+    """
+    `__table_args__` for a table range-partitioned by the datetime `column`, one partition per
+    `interval`. With `retention`, partitions more than that many intervals before the current
+    one are dropped by maintain_partitions(); 0 keeps them forever.
+    The partition column must be part of the primary key (Postgres requires it of every unique index).
+    """
+    if interval not in PARTITION_INTERVALS:
+        raise ValueError(f"Unknown partition interval '{interval}' (expected one of {', '.join(PARTITION_INTERVALS)}).")
+    info = {"partition": {"column": column, "interval": interval, "retention": retention}}
+    if not PARTITIONING_ENABLED:
+        return {"info": info}
+    return {"postgresql_partition_by": f"RANGE ({column})", "info": info}
+
+def partitioned_tables(metadata: MetaData = Base.metadata) -> list[Table]:
+    return [table for table in metadata.sorted_tables if "partition" in table.info]
+
+def is_partition_name(name: str, metadata: MetaData = Base.metadata) -> bool:
+    """Whether `name` is a partition of one of the partitioned tables (Alembic must not drop them)."""
+    match = _PARTITION_SUFFIX.search(name)
+    return match is not None and any(table.name == name[:match.start()] for table in partitioned_tables(metadata))
+
+
+# --- Interval Arithmetic ---
+def period_start(moment: datetime, interval: str) -> datetime:
+    """The start of the interval containing `moment` (weeks start on Monday, as in date_trunc)."""
+    day = datetime(moment.year, moment.month, moment.day)
+    if interval == "day":
+        return day
+    if interval == "week":
+        return day - timedelta(days=day.weekday())
+    if interval == "month":
+        return day.replace(day=1)
+    return day.replace(month=1, day=1)
+
+def shift(start: datetime, interval: str, count: int) -> datetime:
+    """The start of the interval `count` intervals after the one starting at `start`."""
+    if interval == "day":
+        return start + timedelta(days=count)
+    if interval == "week":
+        return start + timedelta(weeks=count)
+    months = start.year * 12 + start.month - 1 + count * (12 if interval == "year" else 1)
+    return start.replace(year=months // 12, month=months % 12 + 1)
+
+
+# --- Maintenance ---
+def partitioned_schemas(connection: Connection, metadata: MetaData = Base.metadata) -> list[str]:
+    """
+    The schemas holding a partitioned table: the default one and every tenant schema migrated
+    to it. Plain tables of the same names count too, so maintain_partitions() reports them.
+    """
+    names = [table.name for table in partitioned_tables(metadata)]
+    if connection.dialect.name != "postgresql" or not names:
+        return []
+    return list(connection.execute(text(
+        "SELECT DISTINCT n.nspname FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace "
+        "WHERE c.relname = ANY(:names) AND c.relkind IN ('p', 'r') ORDER BY n.nspname"
+    ), {"names": names}).scalars())
+
+def maintain_partitions(
+    connection: Connection, now: datetime | None = None, metadata: MetaData = Base.metadata, schema: str | None = None,
+) -> dict:
+    """
+    Creates the partitions of every partitioned table from the current interval (or the oldest
+    one retained) through PARTITION_PREMAKE intervals ahead, and drops those past their retention:
+    expiring a month of data is a `DROP TABLE`, not a `DELETE`.
+    Works on the tables of `schema` (default: the connection's search_path, e.g. the tenant
+    being migrated). Runs in the connection's transaction and does nothing on other databases,
+    for tables that don't exist yet, or while another process holds the schema's maintenance lock.
+    Returns the created and dropped partition names. Raises RuntimeError for a table declared
+    partitioned that exists as a plain table: it was created with PARTITIONING_ENABLED off.
+    """
+    report = {"created": [], "dropped": []}
+    if connection.dialect.name != "postgresql":
+        return report
+    quote = connection.dialect.identifier_preparer.quote
+    if schema:
+        connection.execute(text(f"SET LOCAL search_path TO {quote(schema)}"))
+    # Locked per schema, so tenant schemas migrated in parallel each get their partitions
+    locked = connection.execute(
+        text("SELECT pg_try_advisory_xact_lock(:key, hashtext(current_schema()))"), {"key": PARTITION_LOCK_KEY}
+    ).scalar()
+    if not locked:
+        return report
+    connection.execute(text(f"SET LOCAL lock_timeout = '{PARTITION_LOCK_TIMEOUT}'"))
+
+    now = now or datetime.now(timezone.utc).replace(tzinfo=None)
+    for table in partitioned_tables(metadata):
+        qualified = connection.dialect.identifier_preparer.format_table(table)
+        relkind = connection.execute(
+            text("SELECT relkind::text FROM pg_class WHERE oid = to_regclass(:name)"), {"name": qualified}
+        ).scalar()
+        if relkind is None:
+            continue
+        if relkind != "p":
+            raise RuntimeError(
+                f"Table {qualified} is declared partitioned but is a plain table (with a single-column "
+                f"primary key): its migration was generated with SQLITE_PATH set or DATABASE_URL not "
+                f"pointing at Postgres. Regenerate it with partitioning enabled."
+            )
+        existing = set(connection.execute(
+            text("SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid WHERE i.inhparent = to_regclass(:name)"),
+            {"name": qualified},
+        ).scalars())
+
+        options = table.info["partition"]
+        interval, retention = options["interval"], options["retention"]
+        current = period_start(now, interval)
+        cutoff = shift(current, interval, -retention) if retention else None
+        schema = f"{quote(table.schema)}." if table.schema else ""
+
+        start = cutoff or current
+        while start <= shift(current, interval, PARTITION_PREMAKE):
+            end = shift(start, interval, 1)
+            name = f"{table.name}_p{start:%Y%m%d}"
+            if name not in existing:
+                connection.execute(text(
+                    f"CREATE TABLE IF NOT EXISTS {schema}{quote(name)} PARTITION OF {qualified} "
+                    f"FOR VALUES FROM ('{start:%Y-%m-%d %H:%M:%S}') TO ('{end:%Y-%m-%d %H:%M:%S}')"
+                ))
+                report["created"].append(name)
+            start = end
+
+        if cutoff:
+            for name in sorted(existing):
+                match = _PARTITION_SUFFIX.search(name)
+                if match and name[:match.start()] == table.name and datetime.strptime(match.group(1), "%Y%m%d") < cutoff:
+                    connection.execute(text(f"DROP TABLE {schema}{quote(name)}"))
+                    report["dropped"].append(name)
+    return report
+
+
+class PartitionMaintainer:
+    """
+    Runs maintain_partitions() at startup and every PARTITION_MAINTENANCE_INTERVAL in the
+    background, in every schema holding a partitioned table (tenant schemas included), one
+    transaction per schema. Every worker runs it; the advisory lock lets one of them do the
+    work of each schema.
+    """
+
+    def __init__(self, interval: float = PARTITION_MAINTENANCE_INTERVAL):
+        self.interval = interval
+        self.last_run = {"at": None, "schemas": 0, "created": [], "dropped": [], "error": None}
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        engine = await get_engine()
+        if engine.dialect.name != "postgresql" or not partitioned_tables():
+            return
+        await self.run()
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def run(self) -> None:
+        engine = await get_engine()
+        report, errors = {"created": [], "dropped": []}, []
+        try:
+            async with engine.connect() as connection:
+                schemas = await connection.run_sync(partitioned_schemas)
+        except Exception as e:
+            schemas = []
+            errors.append(f"{type(e).__name__}: {e}")
+            logger.error(f"❌ Partition maintenance failed: {errors[-1]}")
+        for schema in schemas:
+            try:
+                async with engine.begin() as connection:
+                    result = await connection.run_sync(maintain_partitions, schema=schema)
+            except Exception as e:
+                # One schema failing (e.g. a lock timeout) doesn't hold up the others
+                errors.append(f"{schema}: {type(e).__name__}: {e}")
+                logger.error(f"❌ Partition maintenance failed in schema '{schema}': {type(e).__name__}: {e}")
+                continue
+            for key in report:
+                report[key] += [f"{schema}.{name}" for name in result[key]]
+        if report["created"] or report["dropped"]:
+            logger.info(f"✅ Partitions created: {report['created'] or '-'}; dropped: {report['dropped'] or '-'}.")
+        self.last_run = {"at": time.time(), "schemas": len(schemas), **report, "error": "; ".join(errors) or None}
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.run()
+
+    def status(self) -> dict:
+        return {
+            "tables": {
+                table.name: table.info["partition"] for table in partitioned_tables()
+            },
+            "last_run": self.last_run,
+        }
+
+
+# --- Global Maintainer ---
+_maintainer: PartitionMaintainer | None = None
+
+def get_partition_maintainer() -> PartitionMaintainer:
+    """Returns the process-wide partition maintainer, creating it if necessary."""
+    global _maintainer
+    if _maintainer is None:
+        _maintainer = PartitionMaintainer()
+    return _maintainer
@@ -0,0 +1,186 @@
+import asyncio
+import itertools
+import math
+import os
+import time
+from dataclasses import dataclass
+from fastapi import Request, Response
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.sql import text
+from app.logging_config import backend_logger as logger
+from app.db.connections import (
+    DB_MAX_OVERFLOW, DB_POOL_SIZE, READ_ONLY_ENGINE_OPTIONS, SQLITE_READ_POOL_SIZE,
+    apply_sqlite_pragmas, create_db_engine, get_engine, get_read_engine, is_sqlite_url,
+)
+
+# --- Configuration ---
+# Comma-separated async URLs of read-only replicas of the primary database
+REPLICA_URLS_ENV = "DATABASE_REPLICA_URLS"
+# After a client writes, its reads go to the primary for this long (read-your-writes)
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", 5))
+# Cookie carrying the time (epoch seconds) until which the client's reads go to the primary
+READ_PIN_COOKIE = "read_primary_until"
+# A replica that failed is skipped for this long before being tried again
+REPLICA_RETRY_SECONDS = float(os.getenv("REPLICA_RETRY_SECONDS", 30))
+# How often every replica is pinged in the background, so one that recovers is used again (and
+# one that goes down is noticed) without a user's read finding out
+REPLICA_CHECK_INTERVAL = float(os.getenv("REPLICA_CHECK_INTERVAL", 10))
+# A ping that takes longer than this marks the replica down
+REPLICA_CHECK_TIMEOUT = 5.0
+
+
+@dataclass
+class ReplicaState:
+    name: str
+    engine: AsyncEngine
+    healthy: bool = True
+    failures: int = 0
+    retry_at: float = 0.0
+    last_error: str | None = None
+
+
+class ReplicaSet:
+    """
+    Balances read sessions across replicas.
+
+    - Healthy replicas are used round-robin. A replica that fails is marked down and skipped
+      until REPLICA_RETRY_SECONDS have passed or a background check (every REPLICA_CHECK_INTERVAL,
+      started by `start()`) finds it healthy; with no healthy replica, reads go to the primary.
+    - Reads of clients that just wrote (see `pin_reads`) go to the primary.
+    """
+
+    def __init__(self, primary: AsyncEngine, replicas: list[ReplicaState]):
+        self.primary = primary
+        self.replicas = replicas
+        self._cycle = itertools.cycle(replicas) if replicas else None
+        self._task: asyncio.Task | None = None
+
+    def choose(self, pinned: bool = False) -> tuple[str, AsyncEngine]:
+        """Returns (name, engine) of the database that should serve a read (the primary if `pinned`)."""
+        if self._cycle is None or pinned:
+            return "primary", self.primary
+        now = time.monotonic()
+        for _ in range(len(self.replicas)):
+            replica = next(self._cycle)
+            if replica.healthy or now >= replica.retry_at:
+                return replica.name, replica.engine
+        return "primary", self.primary
+
+    def mark_failed(self, name: str, error: Exception) -> None:
+        for replica in self.replicas:
+            if replica.name == name:
+                if replica.healthy:
+                    logger.warning(f"❌ Read replica '{name}' marked down: {error}")
+                replica.healthy = False
+                replica.failures += 1
+                replica.retry_at = time.monotonic() + REPLICA_RETRY_SECONDS
+                replica.last_error = str(error)
+
+    def mark_ok(self, name: str) -> None:
+        for replica in self.replicas:
+            if replica.name == name and not replica.healthy:
+                logger.info(f"✅ Read replica '{name}' is healthy again.")
+                replica.healthy = True
+                replica.last_error = None
+
+    async def _ping(self, replica: ReplicaState) -> None:
+        async with replica.engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    async def check(self) -> None:
+        """Pings every replica and updates its health."""
+        results = await asyncio.gather(
+            *(asyncio.wait_for(self._ping(replica), REPLICA_CHECK_TIMEOUT) for replica in self.replicas),
+            return_exceptions=True,
+        )
+        for replica, result in zip(self.replicas, results):
+            if isinstance(result, Exception):
+                self.mark_failed(replica.name, result)
+            else:
+                self.mark_ok(replica.name)
+
+    async def start(self, interval: float = REPLICA_CHECK_INTERVAL) -> None:
+        """Starts checking the replicas in the background (nothing to do without replicas)."""
+        if self.replicas and self._task is None:
+            self._task = asyncio.create_task(self._check_loop(interval))
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _check_loop(self, interval: float) -> None:
+        while True:
+            await self.check()
+            await asyncio.sleep(interval)
+
+    def status(self) -> list[dict]:
+        return [
+            {"name": r.name, "healthy": r.healthy, "failures": r.failures, "last_error": r.last_error}
+            for r in self.replicas
+        ]
+
+    async def dispose(self) -> None:
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+
+# --- Read-Your-Writes ---
+# The pin travels with the client rather than living in a worker's memory: the next read may be
+# served by another worker process (see app/serve.py) or another backend instance.
+def pin_reads(response: Response) -> None:
+    """Sends the client's reads to the primary for READ_YOUR_WRITES_SECONDS, while replicas catch up with its write."""
+    response.set_cookie(
+        READ_PIN_COOKIE, f"{time.time() + READ_YOUR_WRITES_SECONDS:.3f}",
+        max_age=math.ceil(READ_YOUR_WRITES_SECONDS), httponly=True, samesite="lax",
+    )
+
+def reads_pinned(request: Request) -> bool:
+    """Whether the client wrote recently enough that its reads must go to the primary."""
+    try:
+        return float(request.cookies.get(READ_PIN_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def create_replica_engine(url: str) -> AsyncEngine:
+    if is_sqlite_url(url):
+        engine = create_db_engine(
+            url, pool_size=SQLITE_READ_POOL_SIZE, max_overflow=0, **READ_ONLY_ENGINE_OPTIONS
+        )
+        apply_sqlite_pragmas(engine, read_only=True)
+        return engine
+    return create_db_engine(
+        url, pool_pre_ping=True, pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, **READ_ONLY_ENGINE_OPTIONS
+    )
+
+
+# --- Global Replica Set ---
+_replica_set: ReplicaSet | None = None
+
+async def get_replica_set() -> ReplicaSet:
+    """Returns the process-wide replica set, creating the replica engines on first use."""
+    global _replica_set
+    if _replica_set is None:
+        urls = [url.strip() for url in os.getenv(REPLICA_URLS_ENV, "").split(",") if url.strip()]
+        replicas = [ReplicaState(name=f"replica-{i}", engine=create_replica_engine(url)) for i, url in enumerate(urls)]
+        if replicas:
+            logger.info(f"Routing reads across {len(replicas)} replicas.")
+        primary = await get_read_engine()
+        if primary is await get_engine():
+            # The primary's pool is shared with writers, so autocommit is set per connection
+            primary = primary.execution_options(**READ_ONLY_ENGINE_OPTIONS)
+        _replica_set = ReplicaSet(primary, replicas)
+    return _replica_set
+
+def _reset_replica_set_after_fork() -> None:
+    """Drops the replica set inherited from the parent process (see connections._reset_engines_after_fork)."""
+    global _replica_set
+    if _replica_set is not None:
+        for replica in _replica_set.replicas:
+            replica.engine.sync_engine.dispose(close=False)
+    _replica_set = None
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_replica_set_after_fork)
@@ -0,0 +1,3 @@
+from app.jobs.queue import enqueue, task
+
+__all__ = ["enqueue", "task"]
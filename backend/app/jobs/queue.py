@@ -0,0 +1,161 @@
+import asyncio
+import inspect
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from app.models.job import Job
+
+
+@dataclass
+class TaskSpec:
+    name: str
+    func: Callable
+    max_attempts: int
+    timeout: float | None
+    # Maximum number of jobs of this task running at once in a worker pool (None: no limit)
+    concurrency: int | None
+
+    async def run(self, payload: dict) -> Any:
+        # Plain functions (e.g. bcrypt hashing) run in a thread so they don't block the event loop
+        if inspect.iscoroutinefunction(self.func):
+            call = self.func(payload)
+        else:
+            call = asyncio.to_thread(self.func, payload)
+        return await asyncio.wait_for(call, self.timeout) if self.timeout else await call
+
+
+# --- Task Registry ---
+TASKS: dict[str, TaskSpec] = {}
+
+def task(name: str | None = None, *, max_attempts: int = 3, timeout: float | None = None, concurrency: int | None = None):
+    """
+    Registers a function as a background task. It is called with the job's JSON payload.
+
+        @task(max_attempts=5, timeout=30)
+        async def send_welcome_email(payload: dict) -> None: ...
+    """
+    def decorator(func: Callable) -> Callable:
+        task_name = name or func.__name__
+        TASKS[task_name] = TaskSpec(task_name, func, max_attempts, timeout, concurrency)
+        return func
+    return decorator
+
+def get_task(name: str) -> TaskSpec | None:
+    if name not in TASKS:
+        from app.jobs.tasks import load_all_tasks
+        load_all_tasks()
+    return TASKS.get(name)
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+# --- Queue Operations ---
+async def enqueue(
+    db: AsyncSession, task_name: str, payload: dict | None = None, *,
+    delay: float = 0, max_attempts: int | None = None,
+) -> Job:
+    """
+    Adds a job to the caller's session. It becomes visible to workers when that session commits,
+    so a job enqueued from an endpoint is only run if the request's own writes succeed.
+    """
+    spec = get_task(task_name)
+    if spec is None:
+        raise ValueError(f"Unknown task '{task_name}'. Generate one with `create-task`.")
+    now = utcnow()
+    job = Job(
+        task=task_name,
+        payload=payload or {},
+        status="queued",
+        attempts=0,
+        max_attempts=max_attempts or spec.max_attempts,
+        run_at=now + timedelta(seconds=delay),
+        created_at=now,
+    )
+    db.add(job)
+    await db.flush()
+
+    from app.jobs.worker import wake_workers
+    wake_workers()
+    return job
+
+async def claim_jobs(
+    engine: AsyncEngine, limit: int, lock_timeout: float, exclude_tasks: list[str] | None = None
+) -> list[Job]:
+    """
+    Atomically marks up to `limit` due jobs as running and returns them.
+    On Postgres the candidate rows are locked with FOR UPDATE SKIP LOCKED, so concurrent
+    workers (in this or other processes) never claim the same job. SQLite has no row locks
+    and ignores the clause; there, the claiming UPDATE itself runs on the single write connection.
+    Running jobs whose lock is older than `lock_timeout` seconds (a crashed worker: live workers
+    refresh it with heartbeat_job()) are reclaimed.
+    Jobs of `exclude_tasks` (tasks at their concurrency limit) are left for later.
+    """
+    now = utcnow()
+    due = or_(
+        and_(Job.status == "queued", Job.run_at <= now),
+        and_(Job.status == "running", Job.locked_at < now - timedelta(seconds=lock_timeout)),
+    )
+    if exclude_tasks:
+        due = and_(due, Job.task.not_in(exclude_tasks))
+    candidates = (
+        select(Job.id).where(due).order_by(Job.run_at).limit(limit).with_for_update(skip_locked=True)
+    )
+    statement = (
+        update(Job)
+        .where(Job.id.in_(candidates.scalar_subquery()))
+        .values(status="running", locked_at=now, attempts=Job.attempts + 1)
+        .returning(Job.id, Job.task, Job.payload, Job.attempts, Job.max_attempts)
+    )
+    async with engine.begin() as conn:
+        rows = (await conn.execute(statement)).all()
+    return [
+        Job(id=r.id, task=r.task, payload=r.payload, attempts=r.attempts, max_attempts=r.max_attempts, locked_at=now)
+        for r in rows
+    ]
+
+# The updates below only apply while the job still holds the lock it was claimed with: a run
+# whose job was reclaimed (after losing its heartbeat) must not overwrite the new run's status.
+async def _update_locked(engine: AsyncEngine, job: Job, **values) -> bool:
+    async with engine.begin() as conn:
+        result = await conn.execute(
+            update(Job).where(Job.id == job.id, Job.locked_at == job.locked_at).values(**values)
+        )
+    return result.rowcount == 1
+
+async def heartbeat_job(engine: AsyncEngine, job: Job) -> bool:
+    """Refreshes the lock of a running job so it isn't reclaimed. Returns False if the lock was lost."""
+    now = utcnow()
+    if not await _update_locked(engine, job, locked_at=now):
+        return False
+    job.locked_at = now
+    return True
+
+async def finish_job(engine: AsyncEngine, job: Job) -> bool:
+    """Marks the job succeeded. Returns False if its lock was lost (the result is discarded)."""
+    return await _update_locked(engine, job, status="succeeded", finished_at=utcnow(), locked_at=None)
+
+async def fail_job(engine: AsyncEngine, job: Job, error: str, retry_delay: float | None) -> bool:
+    """
+    Requeues the job after `retry_delay` seconds, or marks it failed if `retry_delay` is None.
+    Returns False if its lock was lost.
+    """
+    values = {"last_error": error[:4000], "locked_at": None}
+    if retry_delay is None:
+        values.update(status="failed", finished_at=utcnow())
+    else:
+        values.update(status="queued", run_at=utcnow() + timedelta(seconds=retry_delay))
+    return await _update_locked(engine, job, **values)
+
+async def release_jobs(engine: AsyncEngine, job_ids: list[int]) -> None:
+    """Puts interrupted jobs back in the queue without counting the interrupted attempt."""
+    if not job_ids:
+        return
+    async with engine.begin() as conn:
+        await conn.execute(
+            update(Job).where(Job.id.in_(job_ids))
+            .values(status="queued", locked_at=None, run_at=utcnow(), attempts=Job.attempts - 1)
+        )
@@ -0,0 +1,11 @@
+import importlib
+import pkgutil
+
+
+def load_all_tasks() -> None:
+    """
+    Imports every task module in this package so their @task functions are registered.
+    Stubs are generated here by the `create-task` command.
+    """
+    for module in pkgutil.iter_modules(__path__):
+        importlib.import_module(f"{__name__}.{module.name}")
@@ -0,0 +1,198 @@
+import asyncio
+import os
+import random
+from typing import Awaitable
+from app.logging_config import backend_logger as logger
+from app.db.connections import get_engine
+from app.jobs.queue import TASKS, claim_jobs, fail_job, finish_job, get_task, heartbeat_job, release_jobs
+from app.jobs.tasks import load_all_tasks
+from app.models.job import Job
+
+# --- Configuration ---
+JOBS_ENABLED = os.getenv("JOBS_ENABLED", "true").lower() in ("true", "1", "yes")
+# Jobs run at once by this process's worker pool
+JOB_CONCURRENCY = int(os.getenv("JOB_CONCURRENCY", 4))
+# How often the queue is polled when no enqueue in this process woke the pool
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", 1.0))
+# A job whose lock isn't refreshed for this long is assumed orphaned by a dead worker and reclaimed;
+# running jobs refresh it every third of this
+JOB_LOCK_TIMEOUT = float(os.getenv("JOB_LOCK_TIMEOUT", 300))
+JOB_RETRY_BASE_DELAY = float(os.getenv("JOB_RETRY_BASE_DELAY", 2))
+JOB_RETRY_MAX_DELAY = float(os.getenv("JOB_RETRY_MAX_DELAY", 600))
+# How long shutdown waits for running jobs before putting them back in the queue
+JOB_DRAIN_TIMEOUT = float(os.getenv("JOB_DRAIN_TIMEOUT", 20))
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff with jitter: ~2s, 4s, 8s, ... capped at JOB_RETRY_MAX_DELAY."""
+    delay = min(JOB_RETRY_MAX_DELAY, JOB_RETRY_BASE_DELAY * 2 ** (attempts - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+class WorkerPool:
+    """
+    Claims due jobs from the `jobs` table and runs them on the event loop.
+
+    - At most `concurrency` jobs run at once; a task's own `concurrency` limit is respected by
+      not claiming more of it while it is saturated.
+    - Failed attempts are retried with exponential backoff until the task's `max_attempts`.
+    - Running jobs refresh their lock every JOB_LOCK_TIMEOUT/3, so only a dead worker's jobs are
+      reclaimed. A run that lost its lock anyway (e.g. the database was unreachable for that long),
+      or whose outcome couldn't be saved, is counted as `lost`: the job is left to be reclaimed.
+    - `drain()` stops claiming, waits up to JOB_DRAIN_TIMEOUT for running jobs, and puts the
+      rest back in the queue.
+    """
+
+    def __init__(self, concurrency: int = JOB_CONCURRENCY, poll_interval: float = JOB_POLL_INTERVAL):
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.stats = {"succeeded": 0, "retried": 0, "failed": 0, "lost": 0}
+        self._running: dict[asyncio.Task, Job] = {}
+        self._running_per_task: dict[str, int] = {}
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._dispatcher: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        load_all_tasks()
+        self._dispatcher = asyncio.create_task(self._dispatch_loop())
+        logger.info(f"🚀 Job worker pool started ({len(TASKS)} tasks, concurrency={self.concurrency}).")
+
+    def wake(self) -> None:
+        self._wakeup.set()
+
+    def _saturated_tasks(self) -> list[str]:
+        saturated = []
+        for name, running in self._running_per_task.items():
+            spec = get_task(name)
+            if spec and spec.concurrency is not None and running >= spec.concurrency:
+                saturated.append(name)
+        return saturated
+
+    async def _dispatch_loop(self) -> None:
+        engine = await get_engine()
+        claim_failing = False
+        while not self._stopping:
+            free_slots = self.concurrency - len(self._running)
+            claimed = []
+            if free_slots > 0:
+                try:
+                    claimed = await claim_jobs(engine, free_slots, JOB_LOCK_TIMEOUT, self._saturated_tasks())
+                    claim_failing = False
+                except Exception as e:
+                    # Typically the jobs table hasn't been migrated yet; log once per failure streak
+                    if not claim_failing:
+                        logger.error(f"❌ Failed to claim jobs: {e}")
+                    claim_failing = True
+
+            for job in claimed:
+                self._running_per_task[job.task] = self._running_per_task.get(job.task, 0) + 1
+                worker = asyncio.create_task(self._run(engine, job))
+                self._running[worker] = job
+                worker.add_done_callback(self._on_done)
+
+            # A full batch means more work may be waiting: claim again right away
+            if claimed and len(claimed) == free_slots:
+                continue
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def _on_done(self, worker: asyncio.Task) -> None:
+        job = self._running.pop(worker)
+        self._running_per_task[job.task] -= 1
+        # A freed slot may let the dispatcher claim more
+        self._wakeup.set()
+
+    async def _heartbeat(self, engine, job: Job) -> None:
+        """Refreshes the job's lock while it runs, so a job running past JOB_LOCK_TIMEOUT isn't reclaimed."""
+        while True:
+            await asyncio.sleep(JOB_LOCK_TIMEOUT / 3)
+            try:
+                if not await heartbeat_job(engine, job):
+                    logger.warning(f"Job {job.id} ({job.task}) lost its lock to another worker.")
+                    return
+            except Exception as e:
+                # Retried next beat; the lock only expires after three missed beats
+                logger.warning(f"Job {job.id} ({job.task}) heartbeat failed: {e}")
+
+    async def _record(self, job: Job, outcome: str, update: Awaitable[bool]) -> None:
+        """Saves the outcome of a run (finish_job or fail_job) and counts it."""
+        try:
+            recorded = await update
+        except Exception as e:
+            # The row stays 'running' and is reclaimed once its lock expires
+            logger.error(f"❌ Job {job.id} ({job.task}): failed to save its outcome ({outcome}), it will run again: {e}")
+            recorded = False
+        else:
+            if not recorded:
+                logger.warning(f"Job {job.id} ({job.task}) was reclaimed while running; its outcome ({outcome}) was discarded.")
+        self.stats[outcome if recorded else "lost"] += 1
+
+    async def _run(self, engine, job: Job) -> None:
+        spec = get_task(job.task)
+        if spec is None:
+            logger.error(f"❌ Job {job.id}: unknown task '{job.task}'.")
+            await self._record(job, "failed", fail_job(engine, job, f"Unknown task '{job.task}'", retry_delay=None))
+            return
+        heartbeat = asyncio.create_task(self._heartbeat(engine, job))
+        try:
+            await spec.run(job.payload)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        else:
+            error = None
+        finally:
+            heartbeat.cancel()
+            await asyncio.gather(heartbeat, return_exceptions=True)
+
+        if error is None:
+            await self._record(job, "succeeded", finish_job(engine, job))
+        elif job.attempts < job.max_attempts:
+            delay = retry_delay(job.attempts)
+            logger.warning(f"Job {job.id} ({job.task}) attempt {job.attempts} failed: {error}. Retrying in {delay:.1f}s.")
+            await self._record(job, "retried", fail_job(engine, job, error, retry_delay=delay))
+        else:
+            logger.error(f"❌ Job {job.id} ({job.task}) failed after {job.attempts} attempts: {error}")
+            await self._record(job, "failed", fail_job(engine, job, error, retry_delay=None))
+
+    async def drain(self, timeout: float = JOB_DRAIN_TIMEOUT) -> None:
+        """Stops claiming jobs and waits for the running ones; unfinished jobs are requeued."""
+        self._stopping = True
+        self._wakeup.set()
+        if self._dispatcher:
+            await self._dispatcher
+        if self._running:
+            logger.info(f"Draining {len(self._running)} running jobs...")
+            _, pending = await asyncio.wait(list(self._running), timeout=timeout)
+            if pending:
+                interrupted = [self._running[worker].id for worker in pending]
+                for worker in pending:
+                    worker.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+                await release_jobs(await get_engine(), interrupted)
+                logger.warning(f"Requeued {len(interrupted)} jobs interrupted by shutdown.")
+        logger.info("🛑 Job worker pool stopped.")
+
+    def status(self) -> dict:
+        return {"running": len(self._running), "concurrency": self.concurrency, **self.stats}
+
+
+# --- Global Worker Pool ---
+_pool: WorkerPool | None = None
+
+def get_worker_pool() -> WorkerPool:
+    """Returns the process-wide worker pool, creating it if necessary."""
+    global _pool
+    if _pool is None:
+        _pool = WorkerPool()
+    return _pool
+
+def wake_workers() -> None:
+    """Wakes this process's worker pool (if running) so a new job is claimed without waiting for the next poll."""
+    if _pool is not None:
+        _pool.wake()
@@ -1,6 +1,10 @@
 import logging
 import os
-from logging.handlers import RotatingFileHandler
+import threading
+import time
+from collections import OrderedDict
+from app.utils.log_sink import LOG_SINK_ENV, CompressingRotatingFileHandler, create_sink_client_handler
+from app.utils.request_context import request_id_var
 
 # Create a logs directory if it doesn't exist
 LOGS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "logs")
@@ -8,13 +12,25 @@ if not os.path.exists(LOGS_DIR):
     os.makedirs(LOGS_DIR)
 
 def get_file_handler(log_file):
-    """Returns a rotating file handler with standard formatting."""
-    handler = RotatingFileHandler(os.path.join(LOGS_DIR, log_file), maxBytes=5*1024*1024, backupCount=5)
-    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    """
+    Returns the handler for a log file with standard formatting.
+    Worker processes of app/serve.py forward records to its single log writer instead of opening
+    the file themselves, so rotations never race. Everything else (the dev server, the CLI,
+    the MCP server) writes directly, rotating into gzipped segments.
+    """
+    sink_socket = os.getenv(LOG_SINK_ENV)
+    if sink_socket:
+        # Formatting happens in the writer, but the request ID only exists in this process
+        handler = create_sink_client_handler(sink_socket)
+        handler.addFilter(RequestIdFilter())
+        return handler
+    handler = CompressingRotatingFileHandler(os.path.join(LOGS_DIR, log_file))
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s')
     handler.setFormatter(formatter)
     
     # Add filter to rename 'uvicorn.error' -> 'uvicorn'
     handler.addFilter(UvicornLogFilter())
+    handler.addFilter(RequestIdFilter())
     return handler
 
 class UvicornLogFilter(logging.Filter):
@@ -27,6 +43,90 @@ class UvicornLogFilter(logging.Filter):
             record.name = "uvicorn"
         return True
 
+class RequestIdFilter(logging.Filter):
+    """
+    Stamps records with the ID of the request being handled (X-Request-ID), or '-'.
+    Records forwarded from a worker to the log sink keep the ID they were stamped with.
+    """
+    def filter(self, record):
+        if not hasattr(record, "request_id"):
+            record.request_id = request_id_var.get()
+        return True
+
+# --- Throttled Logging ---
+# Per key, at most LOG_THROTTLE_BURST messages are written every LOG_THROTTLE_WINDOW seconds
+LOG_THROTTLE_WINDOW = float(os.getenv("LOG_THROTTLE_WINDOW", 10))
+LOG_THROTTLE_BURST = int(os.getenv("LOG_THROTTLE_BURST", 5))
+# Keys tracked at once; the least recently used are forgotten (and their summary flushed)
+LOG_THROTTLE_MAX_KEYS = 1024
+
+class ThrottledLogger(logging.LoggerAdapter):
+    """
+    Logger adapter for hot paths (e.g. rejected requests) that would otherwise write a line per
+    event. Messages are grouped by `key` (default: the message itself); past the burst, a key's
+    messages are counted instead of written, and a single "suppressed N similar messages" line
+    is emitted once its window ends.
+
+        throttled_logger.warning(f"❌ Invalid HMAC for domain: {domain}", key="invalid_hmac")
+    """
+
+    def __init__(self, logger: logging.Logger, window: float = LOG_THROTTLE_WINDOW, burst: int = LOG_THROTTLE_BURST):
+        super().__init__(logger, {})
+        self.window = window
+        self.burst = burst
+        # key -> [window_start, written, suppressed, level, last_message]
+        self._keys: OrderedDict[str, list] = OrderedDict()
+        self._lock = threading.Lock()
+        self._timer: threading.Timer | None = None
+
+    def log(self, level, msg, *args, key: str | None = None, **kwargs):
+        if not self.isEnabledFor(level):
+            return
+        key = key or str(msg)
+        now = time.monotonic()
+        with self._lock:
+            state = self._keys.get(key)
+            if state is None or now - state[0] >= self.window:
+                if state is not None:
+                    self._emit_summary(state)
+                state = self._keys[key] = [now, 0, 0, level, msg]
+                while len(self._keys) > LOG_THROTTLE_MAX_KEYS:
+                    self._emit_summary(self._keys.popitem(last=False)[1])
+            self._keys.move_to_end(key)
+            if state[1] >= self.burst:
+                state[2] += 1
+                state[3], state[4] = max(state[3], level), msg % args if args else msg
+                self._schedule_flush()
+                return
+            state[1] += 1
+        self.logger.log(level, msg, *args, **kwargs)
+
+    def _emit_summary(self, state: list) -> None:
+        if state[2]:
+            self.logger.log(
+                state[3], f"{state[4]} (suppressed {state[2]} similar messages in the last {self.window:g}s)"
+            )
+            state[2] = 0
+
+    def _schedule_flush(self) -> None:
+        # Suppressed counts are reported even if the flood stops and the key is never logged again
+        if self._timer is None:
+            self._timer = threading.Timer(self.window, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self) -> None:
+        """Writes the summary of every key whose window has ended and forgets those keys."""
+        now = time.monotonic()
+        with self._lock:
+            self._timer = None
+            for key, state in list(self._keys.items()):
+                if now - state[0] >= self.window:
+                    self._emit_summary(state)
+                    del self._keys[key]
+            if any(state[2] for state in self._keys.values()):
+                self._schedule_flush()
+
 # --- Centralized Logging Configuration ---
 # Mirror container logs to a file for AI auditing while keeping stdout/stderr for the user.
 
@@ -51,4 +151,7 @@ for logger_name in ["uvicorn", "uvicorn.error", "uvicorn.access", "fastapi"]:
 # 4. Create the specific application logger for convenience
 backend_logger = logging.getLogger("backend")
 backend_logger.setLevel(logging.INFO)
-# (Inherits file handler from root)
\ No newline at end of file
+# (Inherits file handler from root)
+
+# 5. Rate-limited variant of the application logger for paths that can fire on every request
+throttled_logger = ThrottledLogger(backend_logger)
\ No newline at end of file
@@ -4,16 +4,43 @@ from fastapi import FastAPI
 from contextlib import asynccontextmanager
 from app.middleware import validate_tenant_middleware
 from app.api.v1.routers import api_router
+from app.api.health import router as health_router
 from app.db.connections import get_engine
 from app.db.base_class import Base
+from app.db.changefeed import CHANGEFEED_ENABLED, get_change_broker
+from app.db.partitions import get_partition_maintainer
+from app.db.replicas import get_replica_set
+from app.jobs.worker import JOBS_ENABLED, get_worker_pool
+from app.utils.health import get_health_monitor
 
 
 # Init lifespan of FastAPI application
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("🚀 Starting application...")
+    health_monitor = get_health_monitor()
+    await health_monitor.start()
+    # Pings read replicas in the background (DATABASE_REPLICA_URLS only)
+    replica_set = await get_replica_set()
+    await replica_set.start()
+    if CHANGEFEED_ENABLED:
+        await get_change_broker().start()
+    # Creates upcoming partitions and drops expired ones (Postgres, partitioned resources only)
+    await get_partition_maintainer().start()
+    worker_pool = None
+    if JOBS_ENABLED:
+        worker_pool = get_worker_pool()
+        await worker_pool.start()
     logger.info("🏁 App startup complete, ready to accept requests.")
     yield
+    # Fail readiness first so load balancers stop sending traffic while we drain
+    await health_monitor.stop()
+    if CHANGEFEED_ENABLED:
+        await get_change_broker().stop()
+    await get_partition_maintainer().stop()
+    await replica_set.stop()
+    if worker_pool:
+        await worker_pool.drain()
     logger.info("🛑 App shutdown complete.")
 
 # Initialize FastAPI app with lifespan management
@@ -22,5 +49,8 @@ app = FastAPI(lifespan=lifespan)
 # Custom middleware to validate users and database schemas 
 app.middleware("http")(validate_tenant_middleware)
 
+# Health probes for load balancers (outside the API prefix)
+app.include_router(health_router)
+
 # Include all API routers
 app.include_router(api_router, prefix=os.getenv("API_PREFIX"))
\ No newline at end of file
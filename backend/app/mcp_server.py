@@ -1,20 +1,30 @@
+import asyncio
 import os
-import subprocess
 from mcp.server.fastmcp import FastMCP
-from jinja2 import Environment, FileSystemLoader
 from typing import List
-from pydantic import BaseModel
-import ast
 import re
+from app.utils.path_locks import PathLocks
+from app.utils.templates import get_templates_env
+# jinja2, alembic/SQLAlchemy and the audit index are imported on first use
+# so the server starts (and restarts) quickly.
 
 # Initialize FastMCP
 mcp = FastMCP("Backend MCP")
 
 # --- Configuration ---
 # Matches your cli.py paths
-TEMPLATES_DIR = "/workspace/backend/app/templates"
-WORKSPACE_DIR = "/workspace"
-templates_env = Environment(loader=FileSystemLoader(TEMPLATES_DIR))
+WORKSPACE_DIR = os.getenv("WORKSPACE_DIR", "/workspace")
+TEMPLATES_DIR = os.path.join(WORKSPACE_DIR, "backend/app/templates")
+FRONTEND_INDEX_PATH = os.path.join(WORKSPACE_DIR, ".gemini", "frontend_index.json")
+BACKEND_APP_DIR = os.path.join(WORKSPACE_DIR, "backend/app")
+FRONTEND_SRC_DIR = os.path.join(WORKSPACE_DIR, "frontend/src")
+ROUTER_MANIFEST_PATH = os.path.join(BACKEND_APP_DIR, "api/v1/manifest.json")
+MODELS_INIT_PATH = os.path.join(BACKEND_APP_DIR, "models/__init__.py")
+MIGRATIONS_DIR = os.path.join(WORKSPACE_DIR, "backend/alembic/versions")
+
+# Tools are async: blocking file work runs in worker threads and conflicting edits are
+# serialized per path, so e.g. read_logs is not stuck behind a running migration.
+path_locks = PathLocks()
 
 # --- Helper Functions (Copied/Adapted from cli.py) ---
 def to_pascal_case(snake_case: str) -> str: 
@@ -33,57 +43,95 @@ def type_to_pydantic(field_type: str) -> str:
     mapping = {"string": "str", "text": "str", "integer": "int", "float": "float", "boolean": "bool", "date": "date", "datetime": "datetime", "uuid": "UUID"}
     return mapping.get(field_type, "str")
 
+def resource_files(r_snake: str, r_plural: str) -> dict[str, str]:
+    """Maps each resource template to the file it generates."""
+    return {
+        "backend/model.py.j2": os.path.join(BACKEND_APP_DIR, f"models/{r_snake}.py"),
+        "backend/schema.py.j2": os.path.join(BACKEND_APP_DIR, f"db/schemas/{r_snake}.py"),
+        "backend/crud.py.j2": os.path.join(BACKEND_APP_DIR, f"crud/crud_{r_snake}.py"),
+        "backend/endpoint.py.j2": os.path.join(BACKEND_APP_DIR, f"api/v1/endpoints/{r_plural}.py"),
+        "frontend/api_index.js.j2": os.path.join(FRONTEND_SRC_DIR, f"pages/api/{r_plural}/index.js"),
+        "frontend/api_id.js.j2": os.path.join(FRONTEND_SRC_DIR, f"pages/api/{r_plural}/[{r_snake}_id].js"),
+        "frontend/api_events.js.j2": os.path.join(FRONTEND_SRC_DIR, f"pages/api/{r_plural}/events.js"),
+        "frontend/api_aggregate.js.j2": os.path.join(FRONTEND_SRC_DIR, f"pages/api/{r_plural}/aggregate.js"),
+        "frontend/api_import.js.j2": os.path.join(FRONTEND_SRC_DIR, f"pages/api/{r_plural}/import.js"),
+        "frontend/api_export.js.j2": os.path.join(FRONTEND_SRC_DIR, f"pages/api/{r_plural}/export.js"),
+    }
+
 # --- MCP Tools ---
 
 @mcp.tool()
-def create_resource(resource_name: str, fields: List[str]):
+async def create_resource(
+    resource_name: str, fields: List[str],
+    partition_by: str = None, partition_interval: str = "month", retention: int = 0,
+):
     """
     Scaffolds the data layer: backend models, schemas, CRUD, endpoints, and frontend API handlers.
     Args:
         resource_name: The singular snake_case name (e.g., 'product_item').
-        fields: List of fields in 'name:type:required' format (e.g. ['title:string:true']).
+        fields: List of fields in 'name:type:required[:hashed]' format (e.g. ['title:string:true', 'email:string:true:hashed']).
+        partition_by: Optional required datetime field to range-partition the table by on Postgres,
+            for append-heavy resources (events, messages). Partitioned resources can't have hashed fields.
+        partition_interval: Partition size: 'day', 'week', 'month' or 'year'.
+        retention: Intervals of past partitions kept before they are dropped (0 keeps them forever).
     """
+    generated = resource_files(resource_name, to_plural(resource_name)).values()
+    async with path_locks.hold(ROUTER_MANIFEST_PATH, MODELS_INIT_PATH, *generated):
+        return await asyncio.to_thread(_create_resource, resource_name, fields, partition_by, partition_interval, retention)
+
+def _create_resource(
+    resource_name: str, fields: List[str],
+    partition_by: str | None = None, partition_interval: str = "month", retention: int = 0,
+) -> str:
     # Parse fields locally since we can't share the 'Field' class easily with pure strings input
     parsed_fields = []
     for f in fields:
         parts = f.split(':')
-        if len(parts) != 3: 
-            return f"Error: Field '{f}' must be in 'name:type:required' format."
+        if len(parts) not in (3, 4): 
+            return f"Error: Field '{f}' must be in 'name:type:required[:hashed]' format."
         name, ftype, req = parts[0].strip(), parts[1].strip(), parts[2].strip().lower()
+        hashed = len(parts) == 4 and parts[3].strip().lower() == "hashed"
         if ftype not in ["string", "text", "integer", "float", "boolean", "date", "datetime", "uuid"]:
             return f"Error: Invalid field type: {ftype}"
-        parsed_fields.append({"name": name, "type": ftype, "required": req in ['true', '1', 't', 'y', 'yes']})
+        if len(parts) == 4 and not hashed:
+            return f"Error: Unknown field option: {parts[3]}"
+        if hashed and ftype not in ["string", "text"]:
+            return f"Error: Only string and text fields can be hashed ('{name}' is {ftype})."
+        parsed_fields.append({"name": name, "type": ftype, "required": req in ['true', '1', 't', 'y', 'yes'], "hashed": hashed})
+
+    if partition_by:
+        field = next((f for f in parsed_fields if f["name"] == partition_by), None)
+        if field is None or field["type"] != "datetime" or not field["required"]:
+            return f"Error: partition_by must name a required datetime field ('{partition_by}' isn't one)."
+        if partition_interval not in ["day", "week", "month", "year"]:
+            return f"Error: Invalid partition interval: {partition_interval}"
+        if retention < 0:
+            return "Error: retention can't be negative."
+        if any(f["hashed"] for f in parsed_fields):
+            # A unique index on a partitioned table must include the partition column
+            return "Error: Partitioned resources can't have hashed fields: their hashes couldn't be unique."
 
     ctx = {
         "resource_name_snake": resource_name,
         "resource_name_pascal": to_pascal_case(resource_name),
         "resource_name_plural_snake": to_plural(resource_name),
         "fields": parsed_fields,
+        "partition_by": partition_by,
+        "partition_interval": partition_interval,
+        "retention": retention,
         "type_to_sqlalchemy": type_to_sqlalchemy,
         "type_to_pydantic": type_to_pydantic
     }
 
-    base_paths = {
-        "backend": os.path.join(WORKSPACE_DIR, "backend/app"),
-        "frontend": os.path.join(WORKSPACE_DIR, "frontend/src")
-    }
-
     # Using f-strings carefully to avoid syntax errors in python versions < 3.12 
     r_snake = ctx["resource_name_snake"]
     r_plural = ctx["resource_name_plural_snake"]
 
-    files_to_generate = {
-        "backend/model.py.j2": os.path.join(base_paths["backend"], f"models/{r_snake}.py"),
-        "backend/schema.py.j2": os.path.join(base_paths["backend"], f"db/schemas/{r_snake}.py"),
-        "backend/crud.py.j2": os.path.join(base_paths["backend"], f"crud/crud_{r_snake}.py"),
-        "backend/endpoint.py.j2": os.path.join(base_paths["backend"], f"api/v1/endpoints/{r_plural}.py"),
-        "frontend/api_index.js.j2": os.path.join(base_paths["frontend"], f"pages/api/{r_plural}/index.js"),
-        "frontend/api_id.js.j2": os.path.join(base_paths["frontend"], f"pages/api/{r_plural}/[{r_snake}_id].js"),
-    }
+    files_to_generate = resource_files(r_snake, r_plural)
     
     generated_list = []
     for template_name, output_path in files_to_generate.items():
-        template = templates_env.get_template(template_name)
+        template = get_templates_env(TEMPLATES_DIR).get_template(template_name)
         rendered_content = template.render(ctx)
         os.makedirs(os.path.dirname(output_path), exist_ok=True)
         with open(output_path, "w") as f: 
@@ -93,83 +141,37 @@ def create_resource(resource_name: str, fields: List[str]):
         except: pass
         generated_list.append(output_path)
 
-    # --- Modify backend router ---
-    routers_file_path = os.path.join(base_paths["backend"], "api/v1/routers.py")
-    if os.path.exists(routers_file_path):
-        with open(routers_file_path, "r+") as f:
-            content = f.read()
-            new_import = f"from app.api.v1.endpoints import {r_plural}"
-            if new_import not in content:
-                lines = content.splitlines()
-                imports = [line for line in lines if line.startswith("from")]
-                other_lines = [line for line in lines if not line.startswith("from") and line.strip()]
-                
-                if new_import not in imports:
-                    imports.append(new_import)
-                    imports.sort()
-                
-                content = "\n".join(imports) + "\n\n" + "\n".join(other_lines)
-            
-            new_router = f"api_router.include_router({r_plural}.router)"
-            if new_router not in content:
-                content += f"\n{new_router}"
-            
-            f.seek(0); f.write(content); f.truncate()
-
-    # --- Modify models/__init__.py ---
-    models_init_path = os.path.join(base_paths["backend"], "models/__init__.py")
-    if os.path.exists(models_init_path):
-        new_model_import = f"from .{r_snake} import {ctx['resource_name_pascal']}"
-        with open(models_init_path, "r+") as f:
-            lines = f.read().splitlines()
-            if new_model_import not in lines:
-                f.write(f"\n{new_model_import}")
+    # --- Register the router in the endpoint manifest ---
+    # Models need no registration: app.models discovers its modules for Alembic.
+    from app.api.v1.registry import register_router
+    register_router(r_plural, ROUTER_MANIFEST_PATH)
 
     # --- Log Feature to Registry ---
-    import json
-    import time
-    registry_path = os.path.join(WORKSPACE_DIR, ".gemini", "features.json")
-    os.makedirs(os.path.dirname(registry_path), exist_ok=True)
-    
-    feature_entry = {
-        "name": resource_name,
-        "type": "resource",
-        "timestamp": time.time(),
-        "files": generated_list
-    }
-    
-    current_registry = []
-    if os.path.exists(registry_path):
-        try:
-            with open(registry_path, "r") as f:
-                current_registry = json.load(f)
-        except: pass
-    
-    current_registry.append(feature_entry)
-    with open(registry_path, "w") as f:
-        json.dump(current_registry, f, indent=2)
+    from app.utils.feature_registry import get_feature_registry
+    get_feature_registry(WORKSPACE_DIR).add(resource_name, "resource", generated_list)
 
     return f"Created resource {resource_name}. Generated {len(generated_list)} files."
 
 @mcp.tool()
-def destroy_resource(resource_name: str):
+async def destroy_resource(resource_name: str):
     """
     Completely removes a resource: deletes files, cleans imports, and runs migrations to drop the table.
     WARNING: This is destructive and will delete data associated with the resource.
     """
+    generated = resource_files(resource_name, to_plural(resource_name)).values()
+    async with path_locks.hold(ROUTER_MANIFEST_PATH, MODELS_INIT_PATH, MIGRATIONS_DIR, *generated):
+        return await asyncio.to_thread(_destroy_resource, resource_name)
+
+def _destroy_resource(resource_name: str) -> str:
     r_snake = resource_name
-    r_pascal = to_pascal_case(resource_name)
     r_plural = to_plural(resource_name)
 
-    base_paths = {
-        "backend": os.path.join(WORKSPACE_DIR, "backend/app"),
-        "frontend": os.path.join(WORKSPACE_DIR, "frontend/src")
-    }
+    # 1. Unregister (CRITICAL: Do this before deleting files to avoid crashes during migration)
+    from app.api.v1.registry import unregister_router
+    unregister_router(r_plural, ROUTER_MANIFEST_PATH)
 
-    # 1. Clean Imports (CRITICAL: Do this before deleting files to avoid crashes during migration)
-    
-    # Models Init
-    models_init_path = os.path.join(base_paths["backend"], "models/__init__.py")
+    # Workspaces scaffolded before model discovery may still import the model explicitly
+    models_init_path = MODELS_INIT_PATH
     if os.path.exists(models_init_path):
         with open(models_init_path, "r") as f:
             lines = f.readlines()
@@ -182,30 +184,8 @@ def destroy_resource(resource_name: str):
             with open(models_init_path, "w") as f:
                 f.writelines(new_lines)
 
-    # Router
-    routers_file_path = os.path.join(base_paths["backend"], "api/v1/routers.py")
-    if os.path.exists(routers_file_path):
-        with open(routers_file_path, "r") as f:
-            lines = f.readlines()
-            
-        target_import = f"from app.api.v1.endpoints import {r_plural}"
-        target_include = f"api_router.include_router({r_plural}.router)"
-        
-        new_lines = [line for line in lines if target_import not in line and target_include not in line]
-        
-        if len(lines) != len(new_lines):
-            with open(routers_file_path, "w") as f:
-                f.writelines(new_lines)
-
     # 2. Delete Files
-    files_to_remove = [
-        os.path.join(base_paths["backend"], f"models/{r_snake}.py"),
-        os.path.join(base_paths["backend"], f"db/schemas/{r_snake}.py"),
-        os.path.join(base_paths["backend"], f"crud/crud_{r_snake}.py"),
-        os.path.join(base_paths["backend"], f"api/v1/endpoints/{r_plural}.py"),
-        os.path.join(base_paths["frontend"], f"pages/api/{r_plural}/index.js"),
-        os.path.join(base_paths["frontend"], f"pages/api/{r_plural}/[{r_snake}_id].js"),
-    ]
+    files_to_remove = list(resource_files(r_snake, r_plural).values())
 
     deleted_count = 0
     for file_path in files_to_remove:
@@ -214,54 +194,85 @@ def destroy_resource(resource_name: str):
             deleted_count += 1
             
     # Try to remove the frontend api folder if empty
-    frontend_api_folder = os.path.join(base_paths["frontend"], f"pages/api/{r_plural}")
+    frontend_api_folder = os.path.join(FRONTEND_SRC_DIR, f"pages/api/{r_plural}")
     try:
         os.rmdir(frontend_api_folder)
     except:
         pass # Not empty or doesn't exist
 
     # 3. Database Migration (Drop Table)
-    # Because we removed the model file and the import from models/__init__.py,
-    # Alembic will see the table is missing from metadata and generate a drop_table.
+    # Because we removed the model file, Alembic will see the table is missing from metadata and generate a drop_table.
+    from app.utils.migrations import get_migration_runner
     try:
-        subprocess.run(
-            ["alembic", "revision", "--autogenerate", "-m", f"Destroy {resource_name}"],
-            check=True, cwd=os.path.join(WORKSPACE_DIR, "backend"),
-            capture_output=True
-        )
-        subprocess.run(
-            ["alembic", "upgrade", "head"],
-            check=True, cwd=os.path.join(WORKSPACE_DIR, "backend"),
-            capture_output=True
-        )
-    except subprocess.CalledProcessError as e:
-        return f"Partial success: Files deleted, but DB migration failed: {e.stderr}"
+        get_migration_runner().autogenerate_and_upgrade(f"Destroy {resource_name}")
+    except Exception as e:
+        return f"Partial success: Files deleted, but DB migration failed: {e}"
 
     # 4. Update Registry
-    registry_path = os.path.join(WORKSPACE_DIR, ".gemini", "features.json")
-    if os.path.exists(registry_path):
-        try:
-            with open(registry_path, "r") as f:
-                registry = json.load(f)
-            
-            # Filter out the destroyed resource
-            registry = [entry for entry in registry if entry.get("name") != resource_name]
-            
-            with open(registry_path, "w") as f:
-                json.dump(registry, f, indent=2)
-        except: pass
+    from app.utils.feature_registry import get_feature_registry
+    get_feature_registry(WORKSPACE_DIR).remove(resource_name, "resource")
 
     return f"Successfully destroyed resource '{resource_name}'. Deleted {deleted_count} files and dropped database table."
 
 @mcp.tool()
-def create_frontend_page(page_name: str):
+async def list_features(feature_type: str = None):
+    """
+    Lists the features scaffolded so far (name, type, creation time and generated files).
+    Args:
+        feature_type: Only list features of this type (e.g., 'resource'). If None, lists everything.
+    """
+    import json
+    from app.utils.feature_registry import get_feature_registry
+
+    features = await asyncio.to_thread(lambda: get_feature_registry(WORKSPACE_DIR).list(feature_type))
+    if not features:
+        return "No features registered."
+    return json.dumps(features, indent=2)
+
+@mcp.tool()
+async def create_task(task_name: str, max_attempts: int = 3, timeout: float = 0, concurrency: int = 0):
+    """
+    Scaffolds an enqueue-able background task stub in backend/app/jobs/tasks.
+    Args:
+        task_name: The snake_case name of the task (e.g., 'send_welcome_email').
+        max_attempts: Attempts before the job is marked failed.
+        timeout: Seconds an attempt may run (0 for no limit).
+        concurrency: Jobs of this task running at once per worker pool (0 for no limit).
+    """
+    async with path_locks.hold(os.path.join(BACKEND_APP_DIR, "jobs/tasks", f"{task_name}.py")):
+        return await asyncio.to_thread(_create_task, task_name, max_attempts, timeout, concurrency)
+
+def _create_task(task_name: str, max_attempts: int, timeout: float, concurrency: int) -> str:
+    if not task_name.isidentifier():
+        return f"Error: '{task_name}' is not a valid Python identifier."
+    ctx = {"task_name": task_name, "max_attempts": max_attempts, "timeout": timeout, "concurrency": concurrency}
+    template = get_templates_env(TEMPLATES_DIR).get_template("backend/task.py.j2")
+    output_path = os.path.join(BACKEND_APP_DIR, "jobs/tasks", f"{task_name}.py")
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    with open(output_path, "w") as f:
+        f.write(template.render(ctx))
+
+    # Fix permissions
+    try: os.chmod(output_path, 0o666)
+    except: pass
+
+    from app.utils.feature_registry import get_feature_registry
+    get_feature_registry(WORKSPACE_DIR).add(task_name, "task", [output_path])
+    return f"Successfully created task at backend/app/jobs/tasks/{task_name}.py"
+
+@mcp.tool()
+async def create_frontend_page(page_name: str):
     """
     Creates a new, minimal Next.js frontend page.
     Args:
         page_name: The name for the page and its file (e.g., 'poster-board').
     """
+    async with path_locks.hold(os.path.join(FRONTEND_SRC_DIR, "pages", f"{page_name}.js")):
+        return await asyncio.to_thread(_create_frontend_page, page_name)
+
+def _create_frontend_page(page_name: str) -> str:
     ctx = {"page_name_pascal": to_pascal_case(page_name)}
-    template = templates_env.get_template("frontend/page.js.j2")
+    template = get_templates_env(TEMPLATES_DIR).get_template("frontend/page.js.j2")
     rendered_content = template.render(ctx)
     output_path = os.path.join(WORKSPACE_DIR, "frontend/src/pages", f"{page_name}.js")
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
@@ -275,15 +286,19 @@ def create_frontend_page(page_name: str):
     return f"Successfully created frontend page at frontend/src/pages/{page_name}.js"
 
 @mcp.tool()
-def create_frontend_component(component_name: str, path: str = ""):
+async def create_frontend_component(component_name: str, path: str = ""):
     """
     Creates a new, minimal React frontend component.
     Args:
         component_name: PascalCase name for the component (e.g., 'UserProfile').
         path: Relative path from frontend/src/components (e.g., 'users').
     """
+    async with path_locks.hold(os.path.join(FRONTEND_SRC_DIR, "components", path, f"{component_name}.js")):
+        return await asyncio.to_thread(_create_frontend_component, component_name, path)
+
+def _create_frontend_component(component_name: str, path: str) -> str:
     ctx = {"component_name": component_name}
-    template = templates_env.get_template("frontend/component.js.j2")
+    template = get_templates_env(TEMPLATES_DIR).get_template("frontend/component.js.j2")
     rendered_content = template.render(ctx)
 
     output_dir = os.path.join(WORKSPACE_DIR, "frontend/src/components", path)
@@ -301,15 +316,19 @@ def create_frontend_component(component_name: str, path: str = ""):
     return f"Successfully created component at {relative_path}"
 
 @mcp.tool()
-def create_api_client(file_path: str, resource_name: str, fields: List[str]):
+async def create_api_client(file_path: str, resource_name: str, fields: List[str]):
     """
     Injects API client hooks and handlers into a frontend file.
     Args:
         file_path: The path to the component or page file relative to `frontend/src`.
         resource_name: The singular snake_case name of the resource to use.
-        fields: List of the resource's field definitions in 'name:type:required' format.
+        fields: List of the resource's field definitions in 'name:type:required[:hashed]' format.
     """
-    full_path = os.path.join(WORKSPACE_DIR, "frontend/src", file_path)
+    async with path_locks.hold(os.path.join(FRONTEND_SRC_DIR, file_path)):
+        return await asyncio.to_thread(_create_api_client, file_path, resource_name, fields)
+
+def _create_api_client(file_path: str, resource_name: str, fields: List[str]) -> str:
+    full_path = os.path.join(FRONTEND_SRC_DIR, file_path)
 
     if not os.path.exists(full_path):
         return f"Error: File not found at {full_path}"
@@ -317,8 +336,8 @@ def create_api_client(file_path: str, resource_name: str, fields: List[str]):
     parsed_fields = []
     for f in fields:
         parts = f.split(':')
-        if len(parts) != 3:
-             return f"Error: Field '{f}' must be in 'name:type:required' format."
+        if len(parts) not in (3, 4):
+             return f"Error: Field '{f}' must be in 'name:type:required[:hashed]' format."
         name, ftype, req = parts[0].strip(), parts[1].strip(), parts[2].strip().lower()
         parsed_fields.append({"name": name, "type": ftype, "required": req in ['true', '1', 't', 'y', 'yes']})
 
@@ -328,7 +347,7 @@ def create_api_client(file_path: str, resource_name: str, fields: List[str]):
         "fields": parsed_fields,
     }
 
-    template = templates_env.get_template("frontend/api_client.js.j2")
+    template = get_templates_env(TEMPLATES_DIR).get_template("frontend/api_client.js.j2")
     api_client_code = template.render(ctx)
 
     try:
@@ -354,171 +373,164 @@ def create_api_client(file_path: str, resource_name: str, fields: List[str]):
     except Exception as e:
         return f"Error injecting code: {str(e)}"
 
+def _audit_report(resource_names: List[str]) -> str:
+    """Audits the given resources in one pass over the cached frontend index."""
+    from app.utils.frontend_index import FrontendIndex, parse_create_schema
+
+    resources = {}
+    report = []
+    for r_snake in resource_names:
+        schema_path = os.path.join(WORKSPACE_DIR, "backend/app/db/schemas", f"{r_snake}.py")
+        if not os.path.exists(schema_path):
+            report.append(f"Error: Schema file not found at {schema_path}")
+            continue
+        try:
+            all_fields, required_fields = parse_create_schema(schema_path)
+        except Exception as e:
+            report.append(f"Error parsing schema for '{r_snake}': {str(e)}")
+            continue
+        if not all_fields:
+            report.append(f"No fields found in {schema_path}. Ensure a 'Create' class exists.")
+            continue
+        resources[r_snake] = (all_fields, required_fields)
+
+    if not resources:
+        return "\n".join(report)
+
+    # Only files changed since the last audit are re-read
+    index = FrontendIndex(FRONTEND_SRC_DIR, FRONTEND_INDEX_PATH)
+    index.refresh()
+    results = index.audit(resources)
+
+    for resource_name in resources:
+        report.append(f"--- Audit Report for '{resource_name}' ---")
+        relevant_files = results.get(resource_name)
+        if not relevant_files:
+            report.append("No frontend files found referencing this resource.")
+            continue
+
+        issues_found = 0
+        for fpath, file_issues in relevant_files.items():
+            if file_issues:
+                issues_found += 1
+                report.append(f"\nIn {os.path.relpath(fpath, WORKSPACE_DIR)}:")
+                report.extend(file_issues)
+
+        if issues_found == 0:
+            report.append("\nNo obvious issues found. Frontend seems aligned with Backend Schema.")
+        else:
+            report.append("\nNote: This tool uses text matching. Ensure fields are passed correctly in the payload.")
+
+    return "\n".join(report)
+
 @mcp.tool()
-def audit_resource(resource_name: str):
+async def audit_resource(resource_name: str):
     """
     Audits the alignment between Backend Pydantic schemas and Frontend usage for a given resource.
     Checks for:
     1. Missing required fields in frontend usage.
     2. Case mismatches (snake_case vs camelCase).
     """
-    r_snake = resource_name
-    r_plural = to_plural(resource_name)
-    
-    # 1. Analyze Backend Schema
-    schema_path = os.path.join(WORKSPACE_DIR, "backend/app/db/schemas", f"{r_snake}.py")
-    if not os.path.exists(schema_path):
-        return f"Error: Schema file not found at {schema_path}"
-
-    required_fields = []
-    all_fields = []
-    
-    try:
-        with open(schema_path, "r") as f:
-            tree = ast.parse(f.read())
-            
-        for node in tree.body:
-            if isinstance(node, ast.ClassDef) and node.name.endswith("Create"):
-                for item in node.body:
-                    if isinstance(item, ast.AnnAssign):
-                        field_name = item.target.id
-                        # Check if optional (this is a basic heuristic)
-                        is_optional = False
-                        if item.value is not None: # Has default value
-                             is_optional = True
-                        
-                        # Check for Optional[...] type hint
-                        if isinstance(item.annotation, ast.Subscript) and getattr(item.annotation.value, 'id', '') == 'Optional':
-                            is_optional = True
-                        
-                        all_fields.append(field_name)
-                        if not is_optional:
-                            required_fields.append(field_name)
-    except Exception as e:
-        return f"Error parsing schema: {str(e)}"
-
-    if not all_fields:
-        return f"No fields found in {schema_path}. Ensure a 'Create' class exists."
+    async with path_locks.hold(FRONTEND_INDEX_PATH):
+        return await asyncio.to_thread(_audit_report, [resource_name])
 
-    # 2. Analyze Frontend Usage
-    frontend_dir = os.path.join(WORKSPACE_DIR, "frontend/src")
-    report = [f"--- Audit Report for '{resource_name}' ---"]
-    
-    # Find files referencing the resource API path
-    api_path = f"/api/{r_plural}"
-    relevant_files = []
-    
-    # Walk through frontend src
-    for root, dirs, files in os.walk(frontend_dir):
-        for file in files:
-            if file.endswith(".js") or file.endswith(".jsx") or file.endswith(".ts") or file.endswith(".tsx"):
-                full_path = os.path.join(root, file)
-                try:
-                    with open(full_path, "r") as f:
-                        content = f.read()
-                        if api_path in content or r_snake in content or r_plural in content:
-                            relevant_files.append((full_path, content))
-                except:
-                    pass
-
-    if not relevant_files:
-        report.append("No frontend files found referencing this resource.")
-        return "\n".join(report)
+@mcp.tool()
+async def audit_resources(resource_names: List[str] = None):
+    """
+    Audits several resources at once (same checks as audit_resource) in a single scan of the frontend.
+    Args:
+        resource_names: Singular snake_case resource names. If None, audits every backend schema.
+    """
+    if not resource_names:
+        schemas_dir = os.path.join(BACKEND_APP_DIR, "db/schemas")
+        resource_names = sorted(f[:-3] for f in os.listdir(schemas_dir) if f.endswith(".py") and f != "__init__.py")
+    async with path_locks.hold(FRONTEND_INDEX_PATH):
+        return await asyncio.to_thread(_audit_report, resource_names)
 
-    issues_found = 0
-    
-    for fpath, content in relevant_files:
-        rel_path = os.path.relpath(fpath, WORKSPACE_DIR)
-        file_issues = []
-        
-        # Check for snake_case vs camelCase mismatches
-        for field in all_fields:
-            if "_" in field:
-                camel_cased = "".join(word.capitalize() if i > 0 else word for i, word in enumerate(field.split('_')))
-                
-                # If backend expects snake_case, but frontend has camelCase and NOT snake_case
-                if camel_cased in content and field not in content:
-                    file_issues.append(f"  - Potential Case Mismatch: Backend expects '{field}', found '{camel_cased}'")
-        
-        # Check for missing required fields (Basic existence check)
-        # We only check this if there looks like a payload creation (e.g., JSON.stringify)
-        if "JSON.stringify" in content or "body:" in content:
-            missing_req = []
-            for req in required_fields:
-                if req not in content:
-                    # Very basic heuristic: if the exact field name isn't in the file, warn.
-                    # This might flag false positives if fields are constructed dynamically.
-                    missing_req.append(req)
-            
-            if missing_req:
-                file_issues.append(f"  - Missing Required Fields (Backend expects these): {', '.join(missing_req)}")
+@mcp.tool()
+async def apply_migrations(message: str = "New migration", preview: bool = False, from_revision: str = None):
+    """
+    Generates and applies database migrations using Alembic (in-process).
+    Args:
+        message: Message for the new Alembic revision.
+        preview: If True, only renders the upgrade SQL in offline mode. Nothing is generated or applied.
+        from_revision: Starting revision for the preview (defaults to the base of the history).
+    """
+    # Alembic itself is synchronous; it runs in a worker thread while holding the model and
+    # migration locks, so scaffolding tools can't change the models halfway through a run.
+    async with path_locks.hold(MODELS_INIT_PATH, MIGRATIONS_DIR):
+        return await asyncio.to_thread(_apply_migrations, message, preview, from_revision)
 
-        if file_issues:
-            issues_found += 1
-            report.append(f"\nIn {rel_path}:")
-            report.extend(file_issues)
+def _apply_migrations(message: str, preview: bool, from_revision: str | None) -> str:
+    from app.utils.migrations import get_migration_runner
 
-    if issues_found == 0:
-        report.append("\nNo obvious issues found. Frontend seems aligned with Backend Schema.")
-    else:
-        report.append("\nNote: This tool uses text matching. Ensure fields are passed correctly in the payload.")
+    runner = get_migration_runner()
+    if preview:
+        try:
+            sql = runner.preview_sql(from_revision=from_revision)
+        except Exception as e:
+            return f"Error rendering migration SQL: {str(e)}"
+        return sql or "No migration SQL to render."
 
-    return "\n".join(report)
+    try:
+        runner.autogenerate_and_upgrade(message)
+        return "Database migrations applied successfully."
+    except Exception as e:
+        return f"Error applying migrations: {str(e)}"
 
 @mcp.tool()
-def apply_migrations(message: str = "New migration"):
+async def migrate_tenants(schemas: List[str] = None, revision: str = "head", concurrency: int = None):
     """
-    Generates and applies database migrations using Alembic.
+    Upgrades every tenant schema (or the given ones) to a revision in parallel, each in its own
+    transaction with its own alembic_version. Schemas already at the revision are skipped, so
+    calling it again after a failure resumes where it stopped.
+    Args:
+        schemas: Tenant schemas to migrate. If None, every tenant schema is migrated.
+        revision: Revision to upgrade to.
+        concurrency: Schemas migrated at once (defaults to TENANT_MIGRATION_CONCURRENCY).
     """
-    try:
-        # Run revision
-        result_rev = subprocess.run(
-            ["alembic", "revision", "--autogenerate", "-m", message],
-            capture_output=True, text=True, cwd=os.path.join(WORKSPACE_DIR, "backend")
-        )
-        if result_rev.returncode != 0:
-            return f"Error creating revision: {result_rev.stderr}"
-
-        # Run upgrade
-        result_up = subprocess.run(
-            ["alembic", "upgrade", "head"],
-            capture_output=True, text=True, cwd=os.path.join(WORKSPACE_DIR, "backend")
-        )
-        if result_up.returncode != 0:
-            return f"Error applying migrations: {result_up.stderr}"
+    async with path_locks.hold(MODELS_INIT_PATH, MIGRATIONS_DIR):
+        return await asyncio.to_thread(_migrate_tenants, schemas, revision, concurrency)
 
-        return "Database migrations applied successfully."
+def _migrate_tenants(schemas: List[str] | None, revision: str, concurrency: int | None) -> str:
+    from app.utils.tenant_migrations import TENANT_MIGRATION_CONCURRENCY, TenantMigrationOrchestrator
+
+    orchestrator = TenantMigrationOrchestrator(concurrency=concurrency or TENANT_MIGRATION_CONCURRENCY)
+    try:
+        report = orchestrator.run(revision=revision, schemas=schemas or None)
     except Exception as e:
-        return f"Unexpected error: {str(e)}"
+        return f"Error migrating tenant schemas: {str(e)}"
+    lines = [
+        f"{len(report['migrated'])} migrated, {report['up_to_date']} already at '{revision}', "
+        f"{len(report['failed'])} failed, {len(report['not_started'])} not started ({report['seconds']}s)."
+    ]
+    lines += [f"- {schema}: {error}" for schema, error in report["failed"].items()]
+    if report["failed"] or report["not_started"]:
+        lines.append("Fix the failures and call migrate_tenants again to resume.")
+    return "\n".join(lines)
 
 @mcp.tool()
-def read_logs(lines: int = 50, level: str = None):
+async def read_logs(lines: int = 50, level: str = None):
     """
     Reads the backend application logs.
     Args:
         lines: Number of recent lines to read (default 50).
         level: Filter by log level (e.g., 'ERROR', 'WARNING'). If None, returns all.
     """
+    # Read-only: no lock, so it never waits behind other tools
+    return await asyncio.to_thread(_read_logs, lines, level)
+
+def _read_logs(lines: int, level: str | None) -> str:
+    from app.utils.log_sink import log_segments, read_log_lines
+
     log_file = os.path.join(WORKSPACE_DIR, "backend/logs/backend.log")
-    if not os.path.exists(log_file):
+    if not log_segments(log_file):
         return f"Log file not found at {log_file}. Ensure the application has started."
 
     try:
-        with open(log_file, "r") as f:
-            all_lines = f.readlines()
-        
-        filtered_lines = []
-        if level:
-            level_upper = level.upper()
-            # strict check for " - LEVEL - " to avoid matching logger names like 'uvicorn.error'
-            # or use regex for more robustness if format changes, but standard format is consistent.
-            check_str = f" - {level_upper} - "
-            filtered_lines = [line for line in all_lines if check_str in line]
-        else:
-            filtered_lines = all_lines
-        
-        # Get last N lines
-        result = filtered_lines[-lines:] if lines > 0 else filtered_lines
+        # Last N lines across the current file and its rotated (gzipped) segments.
+        # The level match is strict (" - LEVEL - ") to avoid matching logger names like 'uvicorn.error'.
+        result = read_log_lines(log_file, lines, level)
         
         if not result:
             return "No logs found matching criteria."
@@ -1,9 +1,21 @@
-from app.logging_config import backend_logger as logger
+from app.logging_config import backend_logger, throttled_logger
 from fastapi import Request
 from starlette.responses import JSONResponse
 import os
+import time
 
+from app.utils.admission import get_admission_controller, retry_after_header
 from app.utils.hmac_validation import is_valid_hmac_signature
+from app.utils.request_context import (
+    REQUEST_ID_HEADER, RequestSpans, request_id_var, request_spans_var, resolve_request_id, span,
+)
+
+# One summary line per request: method, path, status, total time and its spans
+REQUEST_SUMMARY_LOGGING = os.getenv("REQUEST_SUMMARY_LOGGING", "true").lower() in ("true", "1", "yes")
+request_logger = backend_logger.getChild("requests")
+
+# Rejections are logged through the throttled logger: a flood of bad requests would otherwise
+# write a line per request and make logging the bottleneck.
 
 # --- Exempt Paths (can be configured as needed) ---
 EXEMPT_PATHS = (
@@ -12,16 +24,43 @@ EXEMPT_PATHS = (
     "/auth/",                # Exempt all authentication-related paths
     "/favicon.ico",
     "/_next",                # Next.js internal paths
+    "/healthz",              # Liveness and readiness probes
+    "/readyz",
 )
 
+def is_exempt(path: str) -> bool:
+    return any(path.startswith(p) for p in EXEMPT_PATHS) or path == "/" or path.startswith("/webhooks/")
+
 async def validate_tenant_middleware(request: Request, call_next):
     """
-    Validates HMAC signature and the tenant domain for the request.
+    Tags the request with a correlation ID (the caller's X-Request-ID, or a new one), which every
+    log line written while handling it carries, and times it: HMAC validation, session
+    acquisition and SQL statements are recorded as spans and written as one summary record.
+    Then validates HMAC signature and the tenant domain for the request.
     """
-    path = request.url.path
-    if any(path.startswith(p) for p in EXEMPT_PATHS) or path == "/":
-        return await call_next(request)
-    if path.startswith("/webhooks/"):
+    request_id = resolve_request_id(request.headers.get(REQUEST_ID_HEADER))
+    request_id_var.set(request_id)
+    spans = RequestSpans()
+    request_spans_var.set(spans)
+
+    start = time.perf_counter()
+    status_code = 500
+    try:
+        response = await _validate_tenant(request, call_next)
+        status_code = response.status_code
+    finally:
+        total = time.perf_counter() - start
+        path = request.url.path
+        if REQUEST_SUMMARY_LOGGING and not is_exempt(path):
+            request_logger.info(
+                f"{request.method} {path} {status_code} total={total * 1000:.2f}ms {spans.summary()}".rstrip()
+            )
+    response.headers[REQUEST_ID_HEADER] = request_id
+    response.headers["Server-Timing"] = ", ".join(filter(None, [spans.server_timing(), f"total;dur={total * 1000:.2f}"]))
+    return response
+
+async def _validate_tenant(request: Request, call_next):
+    if is_exempt(request.url.path):
         return await call_next(request)
 
     domain = request.headers.get("X-Tenant-Domain")
@@ -29,17 +68,34 @@ async def validate_tenant_middleware(request: Request, call_next):
     expected_tenant_domain = os.getenv("DOMAIN")
 
     if not domain or not signature:
-        logger.warning("❌ Missing tenant headers")
+        throttled_logger.warning("❌ Missing tenant headers")
         return JSONResponse(status_code=403, content={"detail": "Missing tenant signature headers"})
 
     if domain != expected_tenant_domain:
-        logger.warning(f"❌ Invalid tenant domain: {domain}")
+        throttled_logger.warning(f"❌ Invalid tenant domain: {domain}", key="invalid_tenant_domain")
         return JSONResponse(status_code=403, content={"detail": "Forbidden: Unrecognized tenant"})
 
-    if not await is_valid_hmac_signature(domain, signature):
-        logger.warning(f"❌ Invalid HMAC for domain: {domain}")
+    with span("hmac"):
+        valid_signature = await is_valid_hmac_signature(domain, signature)
+    if not valid_signature:
+        throttled_logger.warning(f"❌ Invalid HMAC for domain: {domain}", key=f"invalid_hmac:{domain}")
         return JSONResponse(status_code=403, content={"detail": "Invalid tenant signature"})
 
     # Attach the resolved domain to the request state for use in endpoints
     request.state.domain_name = domain
-    return await call_next(request)
\ No newline at end of file
+
+    # Per-tenant rate limit and in-flight cap
+    admission = get_admission_controller()
+    rejection = admission.try_acquire(domain)
+    if rejection:
+        status_code, retry_after = rejection
+        detail = "Too many requests" if status_code == 429 else "Server busy, retry later"
+        throttled_logger.warning(f"❌ {detail} for tenant: {domain}", key=f"rejected:{status_code}:{domain}")
+        return JSONResponse(
+            status_code=status_code, content={"detail": detail},
+            headers={"Retry-After": retry_after_header(retry_after)},
+        )
+    try:
+        return await call_next(request)
+    finally:
+        admission.release(domain)
\ No newline at end of file
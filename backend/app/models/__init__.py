@@ -1 +1,11 @@
-from .message import Message
+import importlib
+import pkgutil
+
+
+def load_all_models() -> None:
+    """
+    Imports every model module in this package so `Base.metadata` knows about all tables.
+    Used by Alembic autogenerate; the app itself only imports the models its routers need.
+    """
+    for module in pkgutil.iter_modules(__path__):
+        importlib.import_module(f"{__name__}.{module.name}")
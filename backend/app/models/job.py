@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, Index
+from app.db.base_class import Base
+
+class Job(Base):
+    """A unit of background work, claimed by the worker pool in app/jobs/worker.py."""
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    task = Column(String(100), nullable=False)
+    payload = Column(JSON, nullable=False, default=dict)
+    # queued -> running -> succeeded | failed (a failed attempt with retries left goes back to queued)
+    status = Column(String(20), nullable=False, default="queued")
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    run_at = Column(DateTime(timezone=True), nullable=False)
+    locked_at = Column(DateTime(timezone=True))
+    last_error = Column(Text)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    finished_at = Column(DateTime(timezone=True))
+
+    __table_args__ = (
+        # Workers look up due jobs by status and run_at
+        Index("ix_jobs_status_run_at", "status", "run_at"),
+    )
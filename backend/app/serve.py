@@ -0,0 +1,107 @@
+"""
+Production entrypoint: `python -m app.serve`.
+
+Runs uvicorn with one worker process per available core (WEB_CONCURRENCY overrides it) and
+splits DB_CONNECTION_BUDGET, the connections the database grants this deployment, across the
+workers' pools. Each worker creates its own engine on first use after it has started, so no
+pool or connection is ever shared between processes. Workers log through this process, which
+is the only writer of backend.log (see app/utils/log_sink.py). SERVER_RELOAD=true runs a single
+auto-reloading process for development instead.
+"""
+import math
+import os
+import tempfile
+
+# --- Configuration ---
+HOST = os.getenv("HOST", "0.0.0.0")
+PORT = int(os.getenv("PORT", 80))
+# Workers per available core, and an upper bound on the total
+WORKERS_PER_CORE = float(os.getenv("WORKERS_PER_CORE", 1))
+MAX_WORKERS = int(os.getenv("MAX_WORKERS", 16))
+# Total database connections all workers may open (keep it under Postgres' max_connections)
+DB_CONNECTION_BUDGET = int(os.getenv("DB_CONNECTION_BUDGET", 80))
+# Share of each worker's connections held back as overflow for bursts
+DB_OVERFLOW_SHARE = 0.25
+# Fewest connections a worker can serve with (a request plus background work such as jobs)
+MIN_CONNECTIONS_PER_WORKER = 2
+# "auto" picks uvloop and httptools when installed (uvicorn[standard]), else asyncio and h11
+SERVER_LOOP = os.getenv("SERVER_LOOP", "auto")
+SERVER_HTTP = os.getenv("SERVER_HTTP", "auto")
+SERVER_RELOAD = os.getenv("SERVER_RELOAD", "false").lower() in ("true", "1", "yes")
+# Seconds a stopping worker waits for open requests; long-lived ones (change-feed streams) are then cut
+SERVER_GRACEFUL_TIMEOUT = float(os.getenv("SERVER_GRACEFUL_TIMEOUT", 15))
+
+
+def available_cores() -> int:
+    """Cores this process may run on, honouring CPU affinity and cgroup CPU quotas (containers)."""
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cores = min(cores, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cores
+
+def worker_count(budget: int = DB_CONNECTION_BUDGET) -> int:
+    """
+    WEB_CONCURRENCY, or one worker per core (capped by MAX_WORKERS and by how many workers the
+    connection budget can give MIN_CONNECTIONS_PER_WORKER each).
+    """
+    if os.getenv("WEB_CONCURRENCY"):
+        return max(1, int(os.environ["WEB_CONCURRENCY"]))
+    by_budget = budget // MIN_CONNECTIONS_PER_WORKER
+    return max(1, min(MAX_WORKERS, by_budget, round(available_cores() * WORKERS_PER_CORE)))
+
+def pool_split(workers: int, budget: int = DB_CONNECTION_BUDGET) -> tuple[int, int]:
+    """
+    Returns (pool_size, max_overflow) per worker so all workers together stay within the budget.
+    Raises ValueError if the budget can't give every worker MIN_CONNECTIONS_PER_WORKER.
+    """
+    per_worker = budget // workers
+    if per_worker < MIN_CONNECTIONS_PER_WORKER:
+        raise ValueError(
+            f"DB_CONNECTION_BUDGET={budget} can't give {workers} workers {MIN_CONNECTIONS_PER_WORKER} "
+            f"connections each: raise the budget or lower WEB_CONCURRENCY to at most "
+            f"{max(1, budget // MIN_CONNECTIONS_PER_WORKER)}."
+        )
+    max_overflow = int(per_worker * DB_OVERFLOW_SHARE)
+    return per_worker - max_overflow, max_overflow
+
+
+def main():
+    import uvicorn
+    from app.logging_config import backend_logger as logger, main_file_handler
+    from app.utils.log_sink import LOG_SINK_ENV, start_log_sink
+
+    # This process is the only writer of backend.log; its workers send their records here
+    socket_path = os.path.join(tempfile.mkdtemp(prefix="backend-logs-"), "sink.sock")
+    start_log_sink(main_file_handler, socket_path)
+    os.environ[LOG_SINK_ENV] = socket_path
+
+    if SERVER_RELOAD:
+        logger.info("🚀 Serving with auto-reload (single process).")
+        uvicorn.run("app.main:app", host=HOST, port=PORT, reload=True)
+        return
+
+    workers = worker_count()
+    try:
+        pool_size, max_overflow = pool_split(workers)
+    except ValueError as e:
+        raise SystemExit(f"❌ {e}") from None
+    # Read by app.db.connections in every worker; explicit settings win
+    os.environ.setdefault("DB_POOL_SIZE", str(pool_size))
+    os.environ.setdefault("DB_MAX_OVERFLOW", str(max_overflow))
+    logger.info(
+        f"🚀 Serving with {workers} workers (loop={SERVER_LOOP}, http={SERVER_HTTP}), "
+        f"{os.environ['DB_POOL_SIZE']}+{os.environ['DB_MAX_OVERFLOW']} database connections per worker."
+    )
+    uvicorn.run(
+        "app.main:app", host=HOST, port=PORT, workers=workers,
+        loop=SERVER_LOOP, http=SERVER_HTTP, timeout_graceful_shutdown=SERVER_GRACEFUL_TIMEOUT,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+import json
+import math
+import os
+import time
+from dataclasses import dataclass, field
+from app.logging_config import backend_logger as logger
+from app.db import connections
+
+# --- Configuration ---
+# Defaults for every tenant (0 disables a limit); TENANT_LIMITS overrides them per domain, e.g.
+# TENANT_LIMITS='{"big.example.com": {"rate": 500, "burst": 1000, "max_in_flight": 256}}'
+TENANT_RATE_LIMIT = float(os.getenv("TENANT_RATE_LIMIT", 200))         # requests per second
+TENANT_RATE_BURST = float(os.getenv("TENANT_RATE_BURST", 400))         # bucket capacity
+TENANT_MAX_IN_FLIGHT = int(os.getenv("TENANT_MAX_IN_FLIGHT", 128))     # concurrent requests
+# New requests are shed once this share of the main engine's pool is checked out (0 disables)
+POOL_SHED_UTILIZATION = float(os.getenv("POOL_SHED_UTILIZATION", 1.0))
+# Retry-After (seconds) sent when a tenant is at its in-flight cap or the pool is saturated
+IN_FLIGHT_RETRY_AFTER = 1
+
+
+@dataclass
+class TenantLimits:
+    rate: float = TENANT_RATE_LIMIT
+    burst: float = TENANT_RATE_BURST
+    max_in_flight: int = TENANT_MAX_IN_FLIGHT
+
+
+@dataclass
+class TenantState:
+    limits: TenantLimits
+    tokens: float
+    updated_at: float
+    in_flight: int = 0
+    counters: dict = field(default_factory=lambda: {"admitted": 0, "rate_limited": 0, "overloaded": 0, "pool_saturated": 0})
+
+
+def is_pool_saturated() -> bool:
+    """True if the main engine's pool is at POOL_SHED_UTILIZATION, so a new request would only queue for a connection."""
+    engine = connections._engine
+    # SQLite's single write connection is always "saturated" while writing; its writers queue by design
+    if POOL_SHED_UTILIZATION <= 0 or engine is None or engine.dialect.name == "sqlite":
+        return False
+    status = connections.get_pool_status(engine)
+    return bool(status and status["utilization"] is not None and status["utilization"] >= POOL_SHED_UTILIZATION)
+
+
+def load_tenant_limits() -> dict[str, TenantLimits]:
+    raw = os.getenv("TENANT_LIMITS")
+    if not raw:
+        return {}
+    try:
+        return {domain: TenantLimits(**limits) for domain, limits in json.loads(raw).items()}
+    except (ValueError, TypeError) as e:
+        logger.error(f"❌ Ignoring invalid TENANT_LIMITS: {e}")
+        return {}
+
+
+class AdmissionController:
+    """
+    Per-tenant admission control, keyed on the validated tenant domain.
+
+    - A token bucket (`rate` tokens/second, up to `burst`) bounds each tenant's request rate;
+      an empty bucket means 429 with the time until the next token as Retry-After.
+    - At most `max_in_flight` requests per tenant run at once; beyond that the request is
+      shed with 503 so one tenant can't occupy every worker and database connection.
+    - While the database pool is saturated, every tenant's new requests are shed with 503.
+    """
+
+    def __init__(self, overrides: dict[str, TenantLimits] | None = None):
+        self.overrides = overrides if overrides is not None else load_tenant_limits()
+        self.tenants: dict[str, TenantState] = {}
+
+    def _state(self, domain: str) -> TenantState:
+        state = self.tenants.get(domain)
+        if state is None:
+            limits = self.overrides.get(domain, TenantLimits())
+            state = TenantState(limits=limits, tokens=limits.burst, updated_at=time.monotonic())
+            self.tenants[domain] = state
+        return state
+
+    def try_acquire(self, domain: str) -> tuple[int, float] | None:
+        """
+        Admits a request for the tenant. Returns None if admitted (call release() when done),
+        otherwise (status_code, retry_after_seconds).
+        """
+        state = self._state(domain)
+        limits = state.limits
+        if limits.max_in_flight > 0 and state.in_flight >= limits.max_in_flight:
+            state.counters["overloaded"] += 1
+            return 503, IN_FLIGHT_RETRY_AFTER
+        if is_pool_saturated():
+            state.counters["pool_saturated"] += 1
+            return 503, IN_FLIGHT_RETRY_AFTER
+
+        if limits.rate > 0:
+            now = time.monotonic()
+            state.tokens = min(limits.burst, state.tokens + (now - state.updated_at) * limits.rate)
+            state.updated_at = now
+            if state.tokens < 1:
+                state.counters["rate_limited"] += 1
+                return 429, (1 - state.tokens) / limits.rate
+            state.tokens -= 1
+
+        state.in_flight += 1
+        state.counters["admitted"] += 1
+        return None
+
+    def release(self, domain: str) -> None:
+        self.tenants[domain].in_flight -= 1
+
+    def stats(self) -> dict:
+        return {
+            domain: {
+                **state.counters,
+                "in_flight": state.in_flight,
+                "tokens": round(state.tokens, 2),
+                "rate": state.limits.rate,
+                "burst": state.limits.burst,
+                "max_in_flight": state.limits.max_in_flight,
+            }
+            for domain, state in self.tenants.items()
+        }
+
+
+def retry_after_header(seconds: float) -> str:
+    """Retry-After takes whole seconds; round up so clients never retry too early."""
+    return str(max(1, math.ceil(seconds)))
+
+
+# --- Global Controller ---
+_controller: AdmissionController | None = None
+
+def get_admission_controller() -> AdmissionController:
+    """Returns the process-wide admission controller, creating it if necessary."""
+    global _controller
+    if _controller is None:
+        _controller = AdmissionController()
+    return _controller
@@ -0,0 +1,209 @@
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import time
+from contextlib import contextmanager
+
+# --- Configuration ---
+REGISTRY_DB_NAME = "features.db"
+REGISTRY_JSON_NAME = "features.json"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS features (
+    name TEXT NOT NULL,
+    type TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    files TEXT NOT NULL,
+    PRIMARY KEY (name, type)
+);
+CREATE INDEX IF NOT EXISTS ix_features_type_name ON features (type, name);
+CREATE TABLE IF NOT EXISTS registry_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class FeatureRegistry:
+    """
+    Registry of scaffolded features (resources, pages, ...).
+
+    `features.json` is the registry of record: it is tracked in git, so a fresh clone knows
+    every feature. `features.db` (SQLite, gitignored) is a local index of it: lookups by name
+    and type hit its primary key / type index instead of parsing the JSON, and each change
+    runs in a write transaction that also re-exports the JSON, so concurrent tool calls can't
+    lose each other's entries the way the old read-modify-write of the JSON could.
+    """
+
+    def __init__(self, registry_dir: str):
+        self.registry_dir = registry_dir
+        self.db_path = os.path.join(registry_dir, REGISTRY_DB_NAME)
+        self.json_path = os.path.join(registry_dir, REGISTRY_JSON_NAME)
+        os.makedirs(registry_dir, exist_ok=True)
+        with self._connection() as conn:
+            conn.executescript(_SCHEMA)
+        self._sync_from_json()
+
+    def _connect(self) -> sqlite3.Connection:
+        # isolation_level=None: statements autocommit unless a transaction is opened explicitly
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @contextmanager
+    def _connection(self):
+        conn = self._connect()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _write(self):
+        """A write transaction (one writer at a time across processes) that re-exports the JSON before committing."""
+        with self._connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                self._export_json(conn)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    # --- features.json ---
+    def _read_json(self) -> bytes | None:
+        try:
+            with open(self.json_path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def _synced_digest(conn: sqlite3.Connection) -> str | None:
+        row = conn.execute("SELECT value FROM registry_meta WHERE key = 'json_sha256'").fetchone()
+        return row["value"] if row else None
+
+    @staticmethod
+    def _set_synced_digest(conn: sqlite3.Connection, digest: str) -> None:
+        conn.execute(
+            "INSERT INTO registry_meta (key, value) VALUES ('json_sha256', ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+            (digest,),
+        )
+
+    def _sync_from_json(self) -> None:
+        """
+        Rebuilds the index from `features.json` when the file differs from what the index last
+        saw (a fresh clone, a pull, a hand edit). The JSON replaces the index rather than being
+        merged into it, so features removed from the JSON stay removed.
+        """
+        content = self._read_json()
+        if content is None:
+            return
+        digest = hashlib.sha256(content).hexdigest()
+        with self._connection() as conn:
+            if self._synced_digest(conn) == digest:
+                return
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Another process may have changed the file (or synced it) while we waited for the lock
+                content = self._read_json() or b"[]"
+                digest = hashlib.sha256(content).hexdigest()
+                if self._synced_digest(conn) != digest:
+                    try:
+                        entries = json.loads(content)
+                    except ValueError:
+                        entries = []
+                    conn.execute("DELETE FROM features")
+                    # Later entries win, matching the order they were appended in
+                    for entry in entries:
+                        if not isinstance(entry, dict) or "name" not in entry:
+                            continue
+                        self._upsert(
+                            conn, entry["name"], entry.get("type", "resource"),
+                            entry.get("files", []), entry.get("timestamp") or time.time()
+                        )
+                    self._set_synced_digest(conn, digest)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _export_json(self, conn: sqlite3.Connection) -> None:
+        """Atomically rewrites `features.json` from the index (inside the caller's write transaction)."""
+        rows = conn.execute("SELECT * FROM features ORDER BY timestamp, type, name").fetchall()
+        content = (json.dumps([self._to_entry(row) for row in rows], indent=2) + "\n").encode()
+        fd, tmp_path = tempfile.mkstemp(prefix=".features-", suffix=".tmp", dir=self.registry_dir)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(content)
+            mode = os.stat(self.json_path).st_mode & 0o777 if os.path.exists(self.json_path) else 0o644
+            os.chmod(tmp_path, mode)
+            os.replace(tmp_path, self.json_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        self._set_synced_digest(conn, hashlib.sha256(content).hexdigest())
+
+    @staticmethod
+    def _upsert(conn: sqlite3.Connection, name: str, feature_type: str, files: list[str], timestamp: float) -> None:
+        conn.execute(
+            """
+            INSERT INTO features (name, type, timestamp, files) VALUES (?, ?, ?, ?)
+            ON CONFLICT (name, type) DO UPDATE SET timestamp = excluded.timestamp, files = excluded.files
+            """,
+            (name, feature_type, timestamp, json.dumps(files)),
+        )
+
+    @staticmethod
+    def _to_entry(row: sqlite3.Row) -> dict:
+        return {"name": row["name"], "type": row["type"], "timestamp": row["timestamp"], "files": json.loads(row["files"])}
+
+    def add(self, name: str, feature_type: str, files: list[str]) -> None:
+        """Registers a feature, replacing any previous entry with the same name and type."""
+        with self._write() as conn:
+            self._upsert(conn, name, feature_type, files, time.time())
+
+    def remove(self, name: str, feature_type: str | None = None) -> int:
+        """Removes a feature (of any type if `feature_type` is None). Returns the number of removed entries."""
+        with self._write() as conn:
+            if feature_type is None:
+                cursor = conn.execute("DELETE FROM features WHERE name = ?", (name,))
+            else:
+                cursor = conn.execute("DELETE FROM features WHERE name = ? AND type = ?", (name, feature_type))
+            return cursor.rowcount
+
+    def get(self, name: str, feature_type: str = "resource") -> dict | None:
+        """Looks up a single feature by name and type."""
+        with self._connection() as conn:
+            row = conn.execute(
+                "SELECT * FROM features WHERE name = ? AND type = ?", (name, feature_type)
+            ).fetchone()
+        return self._to_entry(row) if row else None
+
+    def list(self, feature_type: str | None = None) -> list[dict]:
+        """Lists features ordered by creation time, optionally filtered by type."""
+        with self._connection() as conn:
+            if feature_type is None:
+                rows = conn.execute("SELECT * FROM features ORDER BY timestamp").fetchall()
+            else:
+                rows = conn.execute(
+                    "SELECT * FROM features WHERE type = ? ORDER BY timestamp", (feature_type,)
+                ).fetchall()
+        return [self._to_entry(row) for row in rows]
+
+
+# --- Global Registries ---
+_registries: dict[str, FeatureRegistry] = {}
+
+def get_feature_registry(workspace_dir: str) -> FeatureRegistry:
+    """Returns the registry stored in `<workspace>/.gemini`, creating it (and syncing it from features.json) on first use."""
+    registry_dir = os.path.join(workspace_dir, ".gemini")
+    if registry_dir not in _registries:
+        _registries[registry_dir] = FeatureRegistry(registry_dir)
+    return _registries[registry_dir]
@@ -0,0 +1,169 @@
+import ast
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+# --- Configuration ---
+FRONTEND_EXTENSIONS = (".js", ".jsx", ".ts", ".tsx")
+INDEX_VERSION = 1
+# Identifier-like runs of characters. Every pattern the audit looks for (resource names,
+# field names, camelCase variants) is made of these characters only, so "pattern in file"
+# is equivalent to "pattern is a substring of one of the file's tokens".
+TOKEN_RE = re.compile(r"[\w$]+")
+PAYLOAD_MARKERS = ("JSON.stringify", "body:")
+
+
+def to_plural(snake_case: str) -> str:
+    if snake_case.endswith('y'): return snake_case[:-1] + 'ies'
+    if snake_case.endswith('s'): return snake_case + 'es'
+    return snake_case + 's'
+
+def to_camel_case(snake_case: str) -> str:
+    return "".join(word.capitalize() if i > 0 else word for i, word in enumerate(snake_case.split('_')))
+
+
+def parse_create_schema(schema_path: str) -> tuple[list[str], list[str]]:
+    """
+    Parses a backend Pydantic schema file and returns (all_fields, required_fields)
+    of its `*Create` class. A field is optional if it has a default or an Optional[...] hint.
+    """
+    with open(schema_path, "r") as f:
+        tree = ast.parse(f.read())
+
+    all_fields, required_fields = [], []
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef) and node.name.endswith("Create"):
+            for item in node.body:
+                if isinstance(item, ast.AnnAssign):
+                    field_name = item.target.id
+                    is_optional = item.value is not None
+                    if isinstance(item.annotation, ast.Subscript) and getattr(item.annotation.value, 'id', '') == 'Optional':
+                        is_optional = True
+                    all_fields.append(field_name)
+                    if not is_optional:
+                        required_fields.append(field_name)
+    return all_fields, required_fields
+
+
+def _scan_file(full_path: str) -> dict:
+    """Reads one frontend file and reduces it to what the audit needs."""
+    with open(full_path, "r") as f:
+        content = f.read()
+    return {
+        # Deduplicated tokens joined by newlines: substring checks run in C over a compact blob.
+        "tokens": "\n".join(sorted(set(TOKEN_RE.findall(content)))),
+        "payload": any(marker in content for marker in PAYLOAD_MARKERS),
+    }
+
+
+class FrontendIndex:
+    """
+    A persistent index of the frontend sources used by the resource audit.
+
+    Entries are keyed by path and validated against (mtime, size), so a refresh only
+    re-reads files that changed since the last run. Changed files are scanned in a thread pool.
+    """
+
+    def __init__(self, frontend_dir: str, index_path: str, max_workers: int | None = None):
+        self.frontend_dir = frontend_dir
+        self.index_path = index_path
+        self.max_workers = max_workers
+        self.entries: dict[str, dict] = {}
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.index_path, "r") as f:
+                data = json.load(f)
+            if data.get("version") == INDEX_VERSION:
+                self.entries = data.get("files", {})
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def _save(self) -> None:
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"version": INDEX_VERSION, "files": self.entries}, f)
+        os.replace(tmp_path, self.index_path)
+
+    def refresh(self) -> int:
+        """
+        Brings the index up to date with the files on disk.
+        Returns the number of files that had to be (re)scanned.
+        """
+        current = {}
+        for root, dirs, files in os.walk(self.frontend_dir):
+            dirs[:] = [d for d in dirs if d != "node_modules"]
+            for file in files:
+                if file.endswith(FRONTEND_EXTENSIONS):
+                    full_path = os.path.join(root, file)
+                    try:
+                        st = os.stat(full_path)
+                    except OSError:
+                        continue
+                    current[full_path] = (st.st_mtime_ns, st.st_size)
+
+        changed = [
+            path for path, (mtime, size) in current.items()
+            if (entry := self.entries.get(path)) is None or entry["mtime"] != mtime or entry["size"] != size
+        ]
+        removed = [path for path in self.entries if path not in current]
+        for path in removed:
+            del self.entries[path]
+
+        if changed:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                results = pool.map(self._scan_safely, changed)
+                for path, scanned in zip(changed, results):
+                    if scanned is None:
+                        self.entries.pop(path, None)
+                        continue
+                    mtime, size = current[path]
+                    self.entries[path] = {"mtime": mtime, "size": size, **scanned}
+
+        if changed or removed:
+            self._save()
+        return len(changed)
+
+    @staticmethod
+    def _scan_safely(full_path: str) -> dict | None:
+        try:
+            return _scan_file(full_path)
+        except (OSError, UnicodeDecodeError):
+            return None
+
+    def audit(self, resources: dict[str, tuple[list[str], list[str]]]) -> dict[str, dict[str, list[str]]]:
+        """
+        Audits all given resources in a single pass over the index.
+
+        `resources` maps a resource name to its (all_fields, required_fields).
+        Returns {resource_name: {file_path: [issues]}}; resources without any frontend
+        reference are missing from the result.
+        """
+        checks = []
+        for resource_name, (all_fields, required_fields) in resources.items():
+            camel_pairs = [(field, to_camel_case(field)) for field in all_fields if "_" in field]
+            checks.append((resource_name, to_plural(resource_name), camel_pairs, required_fields))
+
+        report: dict[str, dict[str, list[str]]] = {}
+        for path in sorted(self.entries):
+            entry = self.entries[path]
+            tokens = entry["tokens"]
+            for resource_name, r_plural, camel_pairs, required_fields in checks:
+                if resource_name not in tokens and r_plural not in tokens:
+                    continue
+                file_issues = report.setdefault(resource_name, {}).setdefault(path, [])
+
+                # If backend expects snake_case, but frontend has camelCase and NOT snake_case
+                for field, camel_cased in camel_pairs:
+                    if camel_cased in tokens and field not in tokens:
+                        file_issues.append(f"  - Potential Case Mismatch: Backend expects '{field}', found '{camel_cased}'")
+
+                # Only check required fields if the file looks like it builds a payload
+                if entry["payload"]:
+                    missing = [req for req in required_fields if req not in tokens]
+                    if missing:
+                        file_issues.append(f"  - Missing Required Fields (Backend expects these): {', '.join(missing)}")
+        return report
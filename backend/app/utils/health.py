@@ -0,0 +1,117 @@
+import asyncio
+import os
+import time
+from collections import deque
+from sqlalchemy import text
+from app.logging_config import backend_logger as logger
+from app.db import connections
+from app.db.connections import get_engine, get_pool_status
+
+# --- Configuration ---
+# The database is probed on this interval in the background; /readyz only reads the cached result
+HEALTH_PROBE_INTERVAL = float(os.getenv("HEALTH_PROBE_INTERVAL", 5))
+HEALTH_PROBE_TIMEOUT = float(os.getenv("HEALTH_PROBE_TIMEOUT", 2))
+# How often the event loop is sampled for scheduling lag
+LOOP_LAG_INTERVAL = float(os.getenv("LOOP_LAG_INTERVAL", 0.5))
+# Thresholds above which /readyz reports the worker as not ready
+READY_MAX_POOL_UTILIZATION = float(os.getenv("READY_MAX_POOL_UTILIZATION", 0.9))
+READY_MAX_LOOP_LAG_MS = float(os.getenv("READY_MAX_LOOP_LAG_MS", 250))
+# Loop lag is reported as the max over this many recent samples
+LOOP_LAG_WINDOW = 10
+
+
+class HealthMonitor:
+    """
+    Keeps the health signals /readyz serves, so probes never touch the database themselves.
+
+    - A background task runs `SELECT 1` every HEALTH_PROBE_INTERVAL and caches the outcome.
+    - Another measures event-loop lag: how late a sleep of LOOP_LAG_INTERVAL wakes up.
+    """
+
+    def __init__(self, probe_interval: float = HEALTH_PROBE_INTERVAL, lag_interval: float = LOOP_LAG_INTERVAL):
+        self.probe_interval = probe_interval
+        self.lag_interval = lag_interval
+        self.db = {"ok": None, "latency_ms": None, "checked_at": None, "error": None}
+        self.loop_lag_ms: deque[float] = deque(maxlen=LOOP_LAG_WINDOW)
+        self.draining = False
+        self._tasks: list[asyncio.Task] = []
+
+    async def start(self) -> None:
+        await self.probe_db()
+        self._tasks = [asyncio.create_task(self._probe_loop()), asyncio.create_task(self._lag_loop())]
+
+    async def stop(self) -> None:
+        """Marks the worker as draining (so /readyz fails) and stops the background tasks."""
+        self.draining = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def probe_db(self) -> None:
+        start = time.perf_counter()
+        try:
+            engine = await get_engine()
+            async with engine.connect() as conn:
+                await asyncio.wait_for(conn.execute(text("SELECT 1")), HEALTH_PROBE_TIMEOUT)
+            ok, error = True, None
+        except Exception as e:
+            ok, error = False, f"{type(e).__name__}: {e}"
+        # Only state changes are logged, so a down database doesn't flood the log every interval
+        if ok and self.db["ok"] is False:
+            logger.info("✅ Database connection restored.")
+        elif not ok and self.db["ok"] is not False:
+            logger.error(f"❌ Database health probe failed: {error}")
+        self.db = {
+            "ok": ok,
+            "latency_ms": round((time.perf_counter() - start) * 1000, 2),
+            "checked_at": time.time(),
+            "error": error,
+        }
+
+    async def _probe_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.probe_interval)
+            await self.probe_db()
+
+    async def _lag_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.lag_interval)
+            self.loop_lag_ms.append(max(0.0, (loop.time() - start - self.lag_interval) * 1000))
+
+    def readiness(self) -> tuple[bool, dict]:
+        """Returns (ready, report) from the cached signals."""
+        pool = get_pool_status()
+        loop_lag = round(max(self.loop_lag_ms), 2) if self.loop_lag_ms else 0.0
+        # A probe that stopped reporting (e.g. stuck behind a blocked loop) counts as failing
+        db_fresh = self.db["checked_at"] is not None and time.time() - self.db["checked_at"] < 3 * self.probe_interval
+        reasons = []
+        if self.draining:
+            reasons.append("draining")
+        if not (self.db["ok"] and db_fresh):
+            reasons.append("database unavailable")
+        # SQLite's single write connection is busy during every write; its writers queue by design
+        sqlite_mode = connections._engine is not None and connections._engine.dialect.name == "sqlite"
+        if pool and not sqlite_mode and pool["utilization"] is not None and pool["utilization"] >= READY_MAX_POOL_UTILIZATION:
+            reasons.append("connection pool saturated")
+        if loop_lag >= READY_MAX_LOOP_LAG_MS:
+            reasons.append("event loop lagging")
+        return not reasons, {
+            "status": "ready" if not reasons else "not ready",
+            "reasons": reasons,
+            "database": self.db,
+            "pool": pool,
+            "event_loop_lag_ms": loop_lag,
+        }
+
+
+# --- Global Monitor ---
+_monitor: HealthMonitor | None = None
+
+def get_health_monitor() -> HealthMonitor:
+    """Returns the process-wide health monitor, creating it if necessary."""
+    global _monitor
+    if _monitor is None:
+        _monitor = HealthMonitor()
+    return _monitor
@@ -0,0 +1,171 @@
+import atexit
+import glob
+import gzip
+import logging
+import os
+import pickle
+import shutil
+import socketserver
+import struct
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, SocketHandler
+from queue import SimpleQueue
+
+# --- Configuration ---
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", 5 * 1024 * 1024))
+# Rotated segments are deleted once they're older than this, or beyond this much disk in total
+LOG_RETENTION_DAYS = float(os.getenv("LOG_RETENTION_DAYS", 14))
+LOG_RETENTION_BYTES = int(os.getenv("LOG_RETENTION_BYTES", 100 * 1024 * 1024))
+# Set by app/serve.py for its workers: the Unix socket of the single log writer
+LOG_SINK_ENV = "LOG_SINK_SOCKET"
+
+
+# --- Writer Side ---
+class CompressingRotatingFileHandler(RotatingFileHandler):
+    """
+    RotatingFileHandler that renames a full log to a timestamped segment (`backend.log.<time>`)
+    instead of shifting numbered backups, then gzips the segment and applies the retention
+    policy on a background thread so the writer never blocks on compression.
+    """
+
+    def __init__(self, filename: str, max_bytes: int = LOG_MAX_BYTES):
+        super().__init__(filename, maxBytes=max_bytes, encoding="utf-8")
+        self._compressor: ThreadPoolExecutor | None = None
+        # Segments left uncompressed by a previous process (e.g. killed mid-rotation)
+        for segment in self._segments(compressed=False):
+            self._schedule_compression(segment)
+
+    def _schedule_compression(self, segment: str) -> None:
+        # Created on demand: logging.config.dictConfig() (e.g. uvicorn's) closes every existing
+        # handler, yet a handler still attached to the root logger keeps receiving records
+        if self._compressor is None:
+            self._compressor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="log-compress")
+        self._compressor.submit(self._compress, segment)
+
+    def _segments(self, compressed: bool) -> list[str]:
+        return [
+            path for path in glob.glob(f"{glob.escape(self.baseFilename)}.*")
+            if path.endswith(".gz") == compressed and not path.endswith(".tmp")
+        ]
+
+    def doRollover(self):
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        if os.path.exists(self.baseFilename):
+            segment = f"{self.baseFilename}.{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}"
+            os.rename(self.baseFilename, segment)
+            self._schedule_compression(segment)
+        self.stream = self._open()
+
+    def _compress(self, segment: str) -> None:
+        try:
+            tmp_path = f"{segment}.gz.tmp"
+            with open(segment, "rb") as src, gzip.open(tmp_path, "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            # Keep the segment's age so retention and read order stay correct
+            stat = os.stat(segment)
+            os.utime(tmp_path, (stat.st_atime, stat.st_mtime))
+            os.replace(tmp_path, f"{segment}.gz")
+            os.remove(segment)
+        except OSError as e:
+            print(f"Failed to compress log segment {segment}: {e}", file=sys.stderr)
+        self._apply_retention()
+
+    def _apply_retention(self) -> None:
+        cutoff = time.time() - LOG_RETENTION_DAYS * 86400
+        total = 0
+        for path in sorted(self._segments(compressed=True), key=os.path.getmtime, reverse=True):
+            try:
+                size, mtime = os.path.getsize(path), os.path.getmtime(path)
+                total += size
+                if mtime < cutoff or total > LOG_RETENTION_BYTES:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    def close(self):
+        super().close()
+        if self._compressor is not None:
+            self._compressor.shutdown(wait=True)
+            self._compressor = None
+
+
+class _RecordStreamHandler(socketserver.StreamRequestHandler):
+    """Reads length-prefixed pickled LogRecords (the SocketHandler wire format) from one worker."""
+
+    def handle(self):
+        while True:
+            header = self.rfile.read(4)
+            if len(header) < 4:
+                return
+            payload = self.rfile.read(struct.unpack(">L", header)[0])
+            record = logging.makeLogRecord(pickle.loads(payload))
+            self.server.target.handle(record)
+
+
+class _LogSinkServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+def start_log_sink(target: logging.Handler, socket_path: str) -> socketserver.BaseServer:
+    """
+    Serves `socket_path` on a background thread, writing every record workers send to `target`.
+    The socket must live in a directory only this user can access: records are unpickled.
+    """
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+    server = _LogSinkServer(socket_path, _RecordStreamHandler)
+    server.target = target
+    threading.Thread(target=server.serve_forever, name="log-sink", daemon=True).start()
+    return server
+
+
+# --- Worker Side ---
+def create_sink_client_handler(socket_path: str) -> logging.Handler:
+    """
+    Returns a handler that forwards records to the log sink. Logging calls only enqueue the
+    record; a listener thread does the socket I/O, so the event loop never waits on it.
+    """
+    queue = SimpleQueue()
+    listener = QueueListener(queue, SocketHandler(socket_path, None))
+    listener.start()
+    atexit.register(listener.stop)
+    return QueueHandler(queue)
+
+
+# --- Reading ---
+def log_segments(log_file: str) -> list[str]:
+    """The current log file and its rotated segments (gzipped or not), newest first."""
+    paths = set(glob.glob(f"{glob.escape(log_file)}.*"))
+    # Skip temporaries, and a raw segment whose compressed copy has just been written
+    segments = [path for path in paths if not path.endswith(".tmp") and f"{path}.gz" not in paths]
+    segments.sort(key=os.path.getmtime, reverse=True)
+    return ([log_file] if os.path.exists(log_file) else []) + segments
+
+def read_log_lines(log_file: str, lines: int, level: str | None = None) -> list[str]:
+    """
+    Returns the last `lines` lines (all if `lines` <= 0) across the log and its segments,
+    optionally only those of one level. Compressed segments are read transparently, and only
+    as many segments as needed are opened.
+    """
+    check_str = f" - {level.upper()} - " if level else None
+    collected: list[list[str]] = []
+    found = 0
+    for path in log_segments(log_file):
+        opener = gzip.open if path.endswith(".gz") else open
+        try:
+            with opener(path, "rt", encoding="utf-8", errors="replace") as f:
+                segment_lines = [line for line in f if check_str is None or check_str in line]
+        except (OSError, EOFError):
+            continue
+        collected.append(segment_lines)
+        found += len(segment_lines)
+        if 0 < lines <= found:
+            break
+    result = [line for segment_lines in reversed(collected) for line in segment_lines]
+    return result[-lines:] if lines > 0 else result
@@ -0,0 +1,30 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+
+
+class PathLocks:
+    """
+    Per-path asyncio locks.
+
+    Tools that touch disjoint files run concurrently, while tools editing the same file
+    are serialized. Locks are always acquired in sorted order, so two callers asking for
+    overlapping sets of paths can't deadlock.
+    """
+
+    def __init__(self):
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    @asynccontextmanager
+    async def hold(self, *paths: str):
+        keys = sorted({os.path.realpath(p) for p in paths})
+        acquired = []
+        try:
+            for key in keys:
+                lock = self._locks.setdefault(key, asyncio.Lock())
+                await lock.acquire()
+                acquired.append(lock)
+            yield
+        finally:
+            for lock in reversed(acquired):
+                lock.release()
@@ -0,0 +1,23 @@
+import os
+import tempfile
+from functools import lru_cache
+
+# Compiled templates are cached here between processes, so a CLI call or an MCP server
+# restart loads bytecode instead of re-parsing every template from disk.
+BYTECODE_CACHE_DIR = os.getenv(
+    "TEMPLATES_CACHE_DIR", os.path.join(tempfile.gettempdir(), "scaffold-templates-cache")
+)
+
+@lru_cache(maxsize=None)
+def get_templates_env(templates_dir: str):
+    """
+    Returns the Jinja Environment for the scaffolding templates, creating it on first use.
+    jinja2 is imported lazily so commands that don't render templates never pay for it.
+    """
+    from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+
+    os.makedirs(BYTECODE_CACHE_DIR, exist_ok=True)
+    return Environment(
+        loader=FileSystemLoader(templates_dir),
+        bytecode_cache=FileSystemBytecodeCache(BYTECODE_CACHE_DIR),
+    )
@@ -0,0 +1,182 @@
+import io
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Callable
+
+from alembic import command
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import NullPool
+
+from app.db.base import TENANT_SCHEMA_COMMENT
+from app.logging_config import backend_logger as logger
+from app.utils.migrations import ALEMBIC_INI_PATH, get_sync_database_url
+
+# --- Configuration ---
+# Schemas upgraded at once, each by its own worker process and connection. Alembic's side of a
+# small upgrade is CPU-bound, so more workers than cores only help with slow DDL (index builds)
+TENANT_MIGRATION_CONCURRENCY = int(os.getenv("TENANT_MIGRATION_CONCURRENCY", min(8, os.cpu_count() or 1)))
+# Tenant schemas are those marked by create_user_schema; if set, schemas starting with this
+# prefix are tenants too (e.g. ones created before schemas were marked)
+TENANT_SCHEMA_PREFIX = os.getenv("TENANT_SCHEMA_PREFIX", "")
+# A run stops starting new schemas after this many failures (0: never), so a broken revision
+# fails a handful of tenants instead of all of them
+TENANT_MIGRATION_MAX_FAILURES = int(os.getenv("TENANT_MIGRATION_MAX_FAILURES", 10))
+# A tenant whose tables stay locked this long fails (and is retried next run) instead of stalling a worker
+TENANT_MIGRATION_LOCK_TIMEOUT = os.getenv("TENANT_MIGRATION_LOCK_TIMEOUT", "10s")
+
+# (schema, seconds, error or None, done, total), called as each schema finishes
+ProgressCallback = Callable[[str, float, str | None, int, int], None]
+
+
+# --- Worker Processes ---
+# Alembic installs its migration context and `op` as module-level proxies, so concurrent
+# upgrades can't share a process: each worker process upgrades one schema at a time.
+_worker_engine: Engine | None = None
+
+def _init_worker(database_url: str) -> None:
+    global _worker_engine
+    _worker_engine = create_engine(database_url, pool_size=1, max_overflow=0, pool_pre_ping=True)
+
+def _upgrade_schema(ini_path: str, schema: str, revision: str) -> tuple[float, str | None]:
+    """Upgrades one tenant schema in a single transaction. Returns (seconds, error or None)."""
+    start = time.perf_counter()
+    try:
+        with _worker_engine.begin() as connection:
+            connection.execute(text(f"SET LOCAL lock_timeout = '{TENANT_MIGRATION_LOCK_TIMEOUT}'"))
+            config = Config(ini_path, stdout=io.StringIO())
+            config.attributes.update(configure_logger=False, connection=connection, tenant_schema=schema)
+            command.upgrade(config, revision)
+        error = None
+    except Exception as e:
+        error = f"{type(e).__name__}: {getattr(e, 'orig', None) or e}".strip()
+    return time.perf_counter() - start, error
+
+
+# --- Orchestrator ---
+class TenantMigrationOrchestrator:
+    """
+    Upgrades every tenant schema (see `create_user_schema`) with up to `concurrency` schemas
+    in flight.
+
+    - Each schema keeps its own `alembic_version` table, and is upgraded in its own transaction:
+      a failing tenant is rolled back alone and the others carry on.
+    - Schemas already at the target revision are skipped, so re-running after a failure (or an
+      interrupted run) only migrates the tenants that still need it.
+    """
+
+    def __init__(
+        self, concurrency: int = TENANT_MIGRATION_CONCURRENCY, max_failures: int = TENANT_MIGRATION_MAX_FAILURES,
+        ini_path: str = ALEMBIC_INI_PATH, database_url: str | None = None,
+    ):
+        self.concurrency = max(1, concurrency)
+        self.max_failures = max_failures
+        self.ini_path = ini_path
+        self.database_url = database_url or get_sync_database_url()
+
+    def schema_versions(self, prefix: str = TENANT_SCHEMA_PREFIX) -> dict[str, tuple[str, ...]]:
+        """Maps each tenant schema to the revision(s) in its `alembic_version` (empty if never migrated)."""
+        if make_url(self.database_url).get_backend_name() != "postgresql":
+            raise ValueError("Tenant schemas need Postgres.")
+        # An empty prefix matches nothing: only marked schemas are tenants then
+        like = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%" if prefix else ""
+        engine = create_engine(self.database_url, poolclass=NullPool)
+        try:
+            with engine.connect() as connection:
+                rows = connection.execute(text(
+                    "SELECT n.nspname, c.oid IS NOT NULL FROM pg_namespace n "
+                    "LEFT JOIN pg_class c ON c.relnamespace = n.oid AND c.relname = 'alembic_version' "
+                    "WHERE n.nspname NOT LIKE 'pg\\_%' AND n.nspname NOT IN ('public', 'information_schema') "
+                    "AND (obj_description(n.oid, 'pg_namespace') = :comment OR n.nspname LIKE :like) "
+                    "ORDER BY n.nspname"
+                ), {"comment": TENANT_SCHEMA_COMMENT, "like": like}).all()
+                quote = connection.dialect.identifier_preparer.quote
+                versions = {}
+                for schema, tracked in rows:
+                    # create_user_schema only creates identifier names; anything else isn't a tenant
+                    if not schema.isidentifier():
+                        continue
+                    versions[schema] = tuple(connection.execute(
+                        text(f"SELECT version_num FROM {quote(schema)}.alembic_version")
+                    ).scalars()) if tracked else ()
+            return versions
+        finally:
+            engine.dispose()
+
+    def _target_revisions(self, revision: str) -> set[str]:
+        script = ScriptDirectory.from_config(Config(self.ini_path))
+        return {script_revision.revision for script_revision in script.get_revisions(revision)}
+
+    def run(
+        self, revision: str = "head", schemas: list[str] | None = None, progress: ProgressCallback | None = None,
+    ) -> dict:
+        """
+        Upgrades the given schemas (default: every tenant schema) to `revision`. Returns a report:
+        the schemas migrated, already up to date, failed (with their errors) and not started
+        (because `max_failures` was reached).
+        """
+        start = time.perf_counter()
+        versions = self.schema_versions()
+        if schemas is not None:
+            unknown = [schema for schema in schemas if schema not in versions]
+            if unknown:
+                raise ValueError(f"Unknown tenant schema(s): {', '.join(unknown)}.")
+            versions = {schema: versions[schema] for schema in schemas}
+
+        target = self._target_revisions(revision)
+        pending = [schema for schema, current in versions.items() if set(current) != target]
+        report = {
+            "revision": revision, "total": len(versions), "up_to_date": len(versions) - len(pending),
+            "migrated": [], "failed": {}, "not_started": [], "seconds": 0.0,
+        }
+        logger.info(f"Migrating {len(pending)} of {len(versions)} tenant schemas to '{revision}' ({self.concurrency} at a time).")
+
+        if pending:
+            # spawn: workers must not inherit the parent's threads (logging, MCP server) mid-state
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(
+                max_workers=min(self.concurrency, len(pending)), mp_context=context,
+                initializer=_init_worker, initargs=(self.database_url,),
+            ) as pool:
+                queue = iter(pending)
+                running = {}
+
+                def submit_next() -> None:
+                    schema = next(queue, None)
+                    if schema is not None:
+                        running[pool.submit(_upgrade_schema, self.ini_path, schema, revision)] = schema
+
+                for _ in range(self.concurrency):
+                    submit_next()
+                done_count = 0
+                while running:
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        schema = running.pop(future)
+                        try:
+                            seconds, error = future.result()
+                        except Exception as e:  # the worker process died
+                            seconds, error = 0.0, f"{type(e).__name__}: {e}"
+                        done_count += 1
+                        if error:
+                            report["failed"][schema] = error
+                            logger.error(f"❌ Tenant schema '{schema}' failed to migrate: {error}")
+                        else:
+                            report["migrated"].append(schema)
+                        if progress:
+                            progress(schema, seconds, error, done_count, len(pending))
+                        if not self.max_failures or len(report["failed"]) < self.max_failures:
+                            submit_next()
+                report["not_started"] = list(queue)
+
+        report["seconds"] = round(time.perf_counter() - start, 2)
+        logger.info(
+            f"{'✅' if not report['failed'] else '❌'} Tenant migrations: {len(report['migrated'])} migrated, "
+            f"{report['up_to_date']} up to date, {len(report['failed'])} failed, "
+            f"{len(report['not_started'])} not started in {report['seconds']}s."
+        )
+        return report
@@ -0,0 +1,57 @@
+import json
+import os
+import platform
+import statistics
+import time
+
+# --- Configuration ---
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of samples."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+def summarize(samples: list[float]) -> dict:
+    """Summarizes latency samples (in seconds) as milliseconds."""
+    return {
+        "count": len(samples),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 3) if samples else 0.0,
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p95_ms": round(percentile(samples, 95) * 1000, 3),
+        "p99_ms": round(percentile(samples, 99) * 1000, 3),
+    }
+
+
+def save_results(name: str, results: dict) -> str:
+    """
+    Writes a benchmark run to `benchmarks/results/<name>-<timestamp>.json` so runs can be compared.
+    Returns the path of the written file.
+    """
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    payload = {
+        "benchmark": name,
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "results": results,
+    }
+    path = os.path.join(RESULTS_DIR, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(path, "w") as f:
+        json.dump(payload, f, indent=2)
+    return path
+
+def load_previous_results(name: str) -> dict | None:
+    """Returns the results of the most recent saved run of a benchmark, if any."""
+    if not os.path.isdir(RESULTS_DIR):
+        return None
+    runs = sorted(f for f in os.listdir(RESULTS_DIR) if f.startswith(f"{name}-") and f.endswith(".json"))
+    if not runs:
+        return None
+    with open(os.path.join(RESULTS_DIR, runs[-1]), "r") as f:
+        return json.load(f)["results"]
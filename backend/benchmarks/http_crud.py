@@ -0,0 +1,121 @@
+"""
+HTTP load benchmark for the generated CRUD stack.
+
+Boots `app.main:app` in-process on SQLite with a freshly scaffolded sample resource and
+drives it through an async HTTP client with signed tenant headers. Reports throughput and
+p50/p95/p99 latency for list, get, create, update and delete at several concurrency levels.
+
+    python -m benchmarks.http_crud [--requests 500] [--concurrency 1 8 32] [--seed-rows 1000]
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from benchmarks.common import load_previous_results, save_results, summarize
+from benchmarks.sandbox import (
+    BENCH_API_PREFIX, create_sandbox, create_tables, load_app, remove_sandbox, signed_headers
+)
+
+RESOURCE = "bench_item"
+PLURAL = "bench_items"
+FIELDS = ["title:string:true", "body:text:false", "score:integer:false"]
+
+
+async def run_operation(client, make_request, total: int, concurrency: int) -> dict:
+    """Sends `total` requests with `concurrency` workers and summarizes latencies."""
+    latencies, errors = [], 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            start = time.perf_counter()
+            response = await make_request(client, i)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {**summarize(latencies), "errors": errors, "throughput_rps": round(total / elapsed, 1)}
+
+
+async def run_level(client, concurrency: int, total: int) -> dict:
+    base = f"{BENCH_API_PREFIX}/{PLURAL}/"
+    created_ids: list[int] = []
+
+    async def create(c, i):
+        response = await c.post(base, json={"title": f"item {i}", "body": "lorem ipsum " * 8, "score": i})
+        if response.status_code < 400:
+            created_ids.append(response.json()["id"])
+        return response
+
+    results = {"create": await run_operation(client, create, total, concurrency)}
+    results["list"] = await run_operation(
+        client, lambda c, i: c.get(base, params={"limit": 100}), total, concurrency
+    )
+    results["get"] = await run_operation(
+        client, lambda c, i: c.get(f"{base}{created_ids[i % len(created_ids)]}"), total, concurrency
+    )
+    results["update"] = await run_operation(
+        client, lambda c, i: c.put(f"{base}{created_ids[i % len(created_ids)]}", json={"score": -i}), total, concurrency
+    )
+    results["delete"] = await run_operation(
+        client, lambda c, i: c.delete(f"{base}{created_ids[i]}"), len(created_ids), concurrency
+    )
+    return results
+
+
+async def main_async(args) -> dict:
+    import httpx
+    from app.db.connections import get_engine
+
+    app = args.app
+    await create_tables()
+    results = {}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=signed_headers()) as client:
+            # Seed rows so list/get run against a non-trivial table
+            for i in range(args.seed_rows):
+                await client.post(f"{BENCH_API_PREFIX}/{PLURAL}/", json={"title": f"seed {i}", "score": i})
+            for concurrency in args.concurrency:
+                results[f"c{concurrency}"] = await run_level(client, concurrency, args.requests)
+    await (await get_engine()).dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500, help="Requests per operation and concurrency level.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--seed-rows", type=int, default=1000)
+    args = parser.parse_args()
+
+    workspace = create_sandbox(RESOURCE, FIELDS)
+    try:
+        db_path = os.path.join(workspace, "bench.db")
+        args.app = load_app(workspace, f"sqlite+aiosqlite:///{db_path}")
+        results = asyncio.run(main_async(args))
+    finally:
+        remove_sandbox(workspace)
+
+    previous = load_previous_results("http_crud") or {}
+    print(f"{'level':6} {'op':7} {'rps':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>6}")
+    for level, ops in results.items():
+        for op, stats in ops.items():
+            delta = ""
+            if level in previous and op in previous[level]:
+                delta = f"  ({stats['throughput_rps'] - previous[level][op]['throughput_rps']:+.1f} rps)"
+            print(
+                f"{level:6} {op:7} {stats['throughput_rps']:9.1f} {stats['p50_ms']:8.2f} "
+                f"{stats['p95_ms']:8.2f} {stats['p99_ms']:8.2f} {stats['errors']:6}{delta}"
+            )
+    path = save_results("http_crud", results)
+    print(f"\nResults written to {path}")
+
+
+if __name__ == "__main__":
+    main()
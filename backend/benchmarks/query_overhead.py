@@ -0,0 +1,135 @@
+"""
+Python-side overhead per query for CRUDBase reads.
+
+Compares building a fresh `select(...)` on every call (the previous CRUDBase behaviour) with the
+prebuilt, parameter-bound statements CRUDBase now keeps per model:
+
+- `build`: constructing the statement and its cache key, without touching the database.
+- `execute`: a full `get`/`get_multi` through an AsyncSession on a SQLite file.
+
+The compiled-cache hit ratio of each variant is reported from app.db.connections' counters.
+
+    python -m benchmarks.query_overhead [--iterations 5000]
+"""
+import argparse
+import asyncio
+import importlib
+import os
+import time
+
+from benchmarks.common import load_previous_results, save_results, summarize
+from benchmarks.sandbox import create_sandbox, create_tables, load_app, remove_sandbox
+
+RESOURCE = "bench_item"
+FIELDS = ["title:string:true", "score:integer:false"]
+
+
+def fresh_get_statement(model, id):
+    from sqlalchemy import select
+    return select(model).where(model.id == id)
+
+def fresh_get_multi_statement(model, skip, limit):
+    from sqlalchemy import select
+    return select(model).offset(skip).limit(limit)
+
+
+def time_calls(fn, iterations: int) -> list[float]:
+    samples = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        fn(i)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+async def time_async_calls(fn, iterations: int) -> list[float]:
+    samples = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        await fn(i)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def summarize_us(samples: list[float]) -> dict:
+    """summarize() in microseconds, which keeps sub-microsecond precision."""
+    return {key.replace("_ms", "_us"): value for key, value in summarize([s * 1000 for s in samples]).items()}
+
+
+async def main_async(args) -> dict:
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from app.db import connections
+
+    crud = getattr(importlib.import_module(f"app.crud.crud_{RESOURCE}"), f"crud_{RESOURCE}")
+    model = crud.model
+    await create_tables()
+    engine = await connections.get_engine()
+    async with engine.begin() as conn:
+        await conn.execute(model.__table__.insert(), [{"title": f"row {i}", "score": i} for i in range(1000)])
+
+    results = {}
+    # Statement construction only
+    results["build get (fresh)"] = time_calls(
+        lambda i: fresh_get_statement(model, i % 1000 + 1)._generate_cache_key(), args.iterations
+    )
+    results["build get (prebuilt)"] = time_calls(
+        lambda i: crud._get_statement._generate_cache_key(), args.iterations
+    )
+
+    # Full executions through a session
+    async def fresh_get(i):
+        await db.execute(fresh_get_statement(model, i % 1000 + 1))
+
+    async def fresh_get_multi(i):
+        (await db.execute(fresh_get_multi_statement(model, i % 900, 20))).scalars().all()
+
+    async def prebuilt_get(i):
+        await crud.get(db, id=i % 1000 + 1)
+
+    async def prebuilt_get_multi(i):
+        await crud.get_multi(db, skip=i % 900, limit=20)
+
+    cache_ratios = {}
+    async with AsyncSession(bind=engine, expire_on_commit=False) as db:
+        for name, fn in (
+            ("execute get (fresh)", fresh_get), ("execute get (prebuilt)", prebuilt_get),
+            ("execute get_multi (fresh)", fresh_get_multi), ("execute get_multi (prebuilt)", prebuilt_get_multi),
+        ):
+            await time_async_calls(fn, 100)
+            connections.statement_cache_stats.update(hits=0, misses=0, uncached=0)
+            results[name] = await time_async_calls(fn, args.iterations)
+            db.expunge_all()
+            cache_ratios[name] = connections.get_statement_cache_stats()["hit_ratio"]
+
+    await engine.dispose()
+    return {
+        name: {**summarize_us(samples), "cache_hit_ratio": cache_ratios.get(name)}
+        for name, samples in results.items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+
+    workspace = create_sandbox(RESOURCE, FIELDS)
+    try:
+        load_app(workspace, f"sqlite+aiosqlite:///{os.path.join(workspace, 'bench.db')}")
+        results = asyncio.run(main_async(args))
+    finally:
+        remove_sandbox(workspace)
+
+    previous = load_previous_results("query_overhead") or {}
+    print(f"{'case':30} {'mean us':>9} {'p50 us':>9} {'p99 us':>9} {'cache hits':>10}")
+    for name, stats in results.items():
+        ratio = "" if stats["cache_hit_ratio"] is None else f"{stats['cache_hit_ratio']:.1%}"
+        delta = ""
+        if name in previous:
+            delta = f"  ({stats['p50_us'] - previous[name]['p50_us']:+.1f} us p50)"
+        print(f"{name:30} {stats['mean_us']:9.2f} {stats['p50_us']:9.2f} {stats['p99_us']:9.2f} {ratio:>10}{delta}")
+    path = save_results("query_overhead", results)
+    print(f"\nResults written to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Round trips and latency of a single read through `get_db` versus `get_read_db`.
+
+Both dependencies are driven directly (no HTTP) against a scaffolded sample resource, and every
+statement and transaction-control call (BEGIN/COMMIT/ROLLBACK) that reaches the driver is counted.
+On Postgres each of those is a network round trip; on SQLite they are in-process calls, and
+`get_db`'s plain SELECTs already go to the autocommit reader pool, so pass a Postgres URL to see
+the transactional overhead `get_read_db` avoids.
+
+    python -m benchmarks.read_session [--reads 2000] [--database-url postgresql+asyncpg://...]
+"""
+import argparse
+import asyncio
+import importlib
+import os
+import time
+
+from benchmarks.common import load_previous_results, save_results, summarize
+from benchmarks.sandbox import BENCH_DOMAIN, create_sandbox, create_tables, load_app, remove_sandbox
+
+RESOURCE = "bench_item"
+FIELDS = ["title:string:true", "score:integer:false"]
+
+
+class DriverCallCounter:
+    """Counts statements and non-autocommit transaction control calls across all engines."""
+
+    def __init__(self):
+        self.statements = 0
+        self.transaction_calls = 0
+
+    def install(self):
+        from sqlalchemy import event
+        from sqlalchemy.engine import Engine
+
+        @event.listens_for(Engine, "before_cursor_execute")
+        def on_execute(conn, cursor, statement, parameters, context, executemany):
+            self.statements += 1
+
+        for name in ("begin", "commit", "rollback"):
+            event.listen(Engine, name, self.on_transaction_call)
+
+    def on_transaction_call(self, conn):
+        # In autocommit the driver never receives BEGIN/COMMIT/ROLLBACK
+        if not conn._is_autocommit_isolation():
+            self.transaction_calls += 1
+
+    def reset(self):
+        self.statements = self.transaction_calls = 0
+
+
+def make_request():
+    from starlette.requests import Request
+
+    request = Request({"type": "http", "method": "GET", "headers": [], "client": ("127.0.0.1", 0)})
+    request.state.domain_name = BENCH_DOMAIN
+    return request
+
+
+async def read_once(dependency, crud, item_id: int) -> None:
+    session_gen = dependency(make_request())
+    db = await session_gen.__anext__()
+    await crud.get(db, id=item_id)
+    try:
+        await session_gen.__anext__()
+    except StopAsyncIteration:
+        pass
+
+
+async def main_async(args) -> dict:
+    from app.db.connections import get_db, get_engine, get_read_db
+
+    crud = getattr(importlib.import_module(f"app.crud.crud_{RESOURCE}"), f"crud_{RESOURCE}")
+    await create_tables()
+    engine = await get_engine()
+    async with engine.begin() as conn:
+        table = crud.model.__table__
+        await conn.execute(table.insert(), [{"title": f"row {i}", "score": i} for i in range(args.rows)])
+
+    counter = DriverCallCounter()
+    counter.install()
+    results = {}
+    for name, dependency in (("get_db", get_db), ("get_read_db", get_read_db)):
+        for i in range(50):
+            await read_once(dependency, crud, i % args.rows + 1)
+        counter.reset()
+        latencies = []
+        for i in range(args.reads):
+            start = time.perf_counter()
+            await read_once(dependency, crud, i % args.rows + 1)
+            latencies.append(time.perf_counter() - start)
+        results[name] = {
+            **summarize(latencies),
+            "statements_per_read": counter.statements / args.reads,
+            "transaction_calls_per_read": counter.transaction_calls / args.reads,
+            "round_trips_per_read": (counter.statements + counter.transaction_calls) / args.reads,
+        }
+    await engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reads", type=int, default=2000)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--database-url", help="Async database URL to run against (default: a SQLite file).")
+    args = parser.parse_args()
+
+    workspace = create_sandbox(RESOURCE, FIELDS)
+    try:
+        database_url = args.database_url or f"sqlite+aiosqlite:///{os.path.join(workspace, 'bench.db')}"
+        load_app(workspace, database_url)
+        results = asyncio.run(main_async(args))
+    finally:
+        remove_sandbox(workspace)
+
+    previous = load_previous_results("read_session") or {}
+    print(f"{'dependency':12} {'round trips':>11} {'statements':>10} {'tx calls':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    for name, stats in results.items():
+        delta = ""
+        if name in previous:
+            delta = f"  ({stats['p50_ms'] - previous[name]['p50_ms']:+.3f} ms p50)"
+        print(
+            f"{name:12} {stats['round_trips_per_read']:11.2f} {stats['statements_per_read']:10.2f} "
+            f"{stats['transaction_calls_per_read']:8.2f} {stats['p50_ms']:8.3f} {stats['p99_ms']:8.3f}{delta}"
+        )
+    path = save_results("read_session", results)
+    print(f"\nResults written to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Startup-time benchmark for the scaffolding CLI and the MCP server.
+
+Every command is run for real as a fresh interpreter against a throwaway workspace
+(WORKSPACE_DIR points at a temporary copy of the templates and the files the commands edit).
+The median wall time is recorded per command and compared with the previous saved run.
+
+    python -m benchmarks.startup [--runs 10]
+"""
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.common import load_previous_results, save_results
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+COMMANDS = {
+    "python (baseline)": ["-c", "pass"],
+    "mcp create-resource": ["-m", "app.cli", "create-resource", "bench_item", "title:string:true", "note_text:text:false"],
+    "mcp create-frontend-page": ["-m", "app.cli", "create-frontend-page", "bench-page"],
+    "mcp create-frontend-component": ["-m", "app.cli", "create-frontend-component", "BenchCard", "bench"],
+    "mcp audit-resource": ["-m", "app.cli", "audit-resource", "bench_item"],
+    "mcp read-logs": ["-m", "app.cli", "read-logs", "--lines", "20"],
+    "mcp_server import": ["-c", "import app.mcp_server"],
+}
+
+
+def make_workspace() -> str:
+    """Creates a minimal workspace that the scaffolding commands can write into."""
+    workspace = tempfile.mkdtemp(prefix="startup-bench-")
+    backend_app = os.path.join(workspace, "backend/app")
+    shutil.copytree(os.path.join(BACKEND_DIR, "app/templates"), os.path.join(backend_app, "templates"))
+    for rel_path in ("api/v1/manifest.json", "models/__init__.py"):
+        os.makedirs(os.path.dirname(os.path.join(backend_app, rel_path)), exist_ok=True)
+        shutil.copy(os.path.join(BACKEND_DIR, "app", rel_path), os.path.join(backend_app, rel_path))
+    os.makedirs(os.path.join(workspace, "frontend/src/pages"))
+    os.makedirs(os.path.join(workspace, "backend/logs"))
+    with open(os.path.join(workspace, "backend/logs/backend.log"), "w") as f:
+        f.writelines(f"2025-01-01 00:00:00,000 - backend - INFO - line {i}\n" for i in range(1000))
+    return workspace
+
+
+def slowest_imports(argv: list[str], env: dict, top: int = 5) -> list[tuple[str, float]]:
+    """Runs a command under `-X importtime` and returns its slowest top-level imports (ms, cumulative)."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *argv], cwd=BACKEND_DIR, env=env, capture_output=True, text=True
+    )
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        # Top-level imports are indented by exactly one space after the separator
+        if cumulative.strip().isdigit() and name.startswith(" ") and not name.startswith("  "):
+            imports.append((name.strip(), int(cumulative) / 1000))
+    return sorted(imports, key=lambda item: item[1], reverse=True)[:top]
+
+
+def measure(argv: list[str], env: dict, runs: int) -> list[float]:
+    # One warm-up run so bytecode and template caches exist before timing
+    warmup = subprocess.run([sys.executable, *argv], cwd=BACKEND_DIR, env=env, capture_output=True, text=True)
+    if warmup.returncode != 0:
+        raise RuntimeError(f"Command failed: {' '.join(argv)}\n{warmup.stderr}")
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *argv], cwd=BACKEND_DIR, env=env, capture_output=True)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10, help="Timed runs per command.")
+    args = parser.parse_args()
+
+    workspace = make_workspace()
+    env = {**os.environ, "WORKSPACE_DIR": workspace}
+    previous = load_previous_results("startup") or {}
+    results = {}
+    try:
+        for name, argv in COMMANDS.items():
+            samples = measure(argv, env, args.runs)
+            median_ms = statistics.median(samples) * 1000
+            results[name] = {
+                "median_ms": round(median_ms, 2),
+                "min_ms": round(min(samples) * 1000, 2),
+                "max_ms": round(max(samples) * 1000, 2),
+                "slowest_imports_ms": slowest_imports(argv, env),
+            }
+            delta = ""
+            if name in previous:
+                delta = f" ({median_ms - previous[name]['median_ms']:+.1f} ms vs previous run)"
+            print(f"{name:32} {median_ms:8.1f} ms{delta}")
+    finally:
+        shutil.rmtree(workspace, ignore_errors=True)
+
+    path = save_results("startup", results)
+    print(f"\nResults written to {path}")
+
+
+if __name__ == "__main__":
+    main()
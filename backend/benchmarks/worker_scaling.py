@@ -0,0 +1,188 @@
+"""
+Throughput scaling of the production server (`python -m app.serve`) with its worker count.
+
+Starts the server from a sandbox on a SQLite file (WAL lets every worker process read it at
+once) with WEB_CONCURRENCY set to each requested count, then drives list and detail GETs
+from separate client processes, so the load generator isn't limited to one core either.
+Reports requests/second, p50/p99 latency and the speed-up over the smallest worker count.
+
+    python -m benchmarks.worker_scaling [--workers 1 2 4] [--duration 10] [--loops auto asyncio]
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmarks.common import load_previous_results, save_results, summarize
+from benchmarks.sandbox import (
+    BENCH_API_PREFIX, BENCH_DOMAIN, BENCH_HMAC_SECRET, create_sandbox, create_tables, load_app,
+    remove_sandbox, signed_headers,
+)
+
+RESOURCE = "bench_item"
+PLURAL = "bench_items"
+FIELDS = ["title:string:true", "body:text:false", "score:integer:false"]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def seed(rows: int) -> None:
+    from app.db.base_class import Base
+    from app.db.connections import get_engine
+
+    await create_tables()
+    engine = await get_engine()
+    async with engine.begin() as conn:
+        await conn.execute(Base.metadata.tables[PLURAL].insert(), [
+            {"title": f"row {i}", "body": "lorem ipsum " * 8, "score": i} for i in range(rows)
+        ])
+    await engine.dispose()
+
+
+def start_server(workspace: str, db_url: str, workers: int, loop: str) -> tuple[subprocess.Popen, str]:
+    port = free_port()
+    env = {
+        **os.environ,
+        "DATABASE_URL": db_url,
+        "DOMAIN": BENCH_DOMAIN,
+        "EXPECTED_HMAC_SECRET": BENCH_HMAC_SECRET,
+        "API_PREFIX": BENCH_API_PREFIX,
+        "TENANT_RATE_LIMIT": "0",
+        "TENANT_MAX_IN_FLIGHT": "0",
+        "JOBS_ENABLED": "false",
+        "HOST": "127.0.0.1",
+        "PORT": str(port),
+        "WEB_CONCURRENCY": str(workers),
+        "SERVER_LOOP": loop,
+        "SERVER_HTTP": "auto" if loop == "auto" else "h11",
+    }
+    server = subprocess.Popen(
+        [sys.executable, "-m", "app.serve"], cwd=os.path.join(workspace, "backend"), env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    wait_until_ready(base_url, workers)
+    return server, base_url
+
+def wait_until_ready(base_url: str, workers: int, timeout: float = 60) -> None:
+    import httpx
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/readyz").status_code == 200:
+                # Give the remaining workers a moment to finish booting too
+                time.sleep(0.5 * workers)
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server at {base_url} did not become ready within {timeout}s")
+
+def stop_server(server: subprocess.Popen) -> None:
+    server.terminate()
+    try:
+        server.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        server.kill()
+
+
+def run_client(base_url: str, duration: float, concurrency: int, rows: int) -> tuple[list[float], int]:
+    """One load-generating process: `concurrency` connections sending GETs for `duration` seconds."""
+    return asyncio.run(_run_client(base_url, duration, concurrency, rows))
+
+async def _run_client(base_url: str, duration: float, concurrency: int, rows: int) -> tuple[list[float], int]:
+    import httpx
+
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + duration
+    base = f"{BENCH_API_PREFIX}/{PLURAL}/"
+
+    async def worker(client):
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            if random.random() < 0.5:
+                request = client.get(base, params={"skip": random.randrange(rows), "limit": 20})
+            else:
+                request = client.get(f"{base}{random.randrange(1, rows + 1)}")
+            start = time.perf_counter()
+            response = await request
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, headers=signed_headers(), limits=limits) as client:
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+    return latencies, errors
+
+
+def measure(base_url: str, args) -> dict:
+    with ProcessPoolExecutor(max_workers=args.clients) as pool:
+        futures = [
+            pool.submit(run_client, base_url, args.duration, args.concurrency, args.rows)
+            for _ in range(args.clients)
+        ]
+        outcomes = [f.result() for f in futures]
+    latencies = [latency for samples, _ in outcomes for latency in samples]
+    errors = sum(e for _, e in outcomes)
+    return {**summarize(latencies), "errors": errors, "throughput_rps": round(len(latencies) / args.duration, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--loops", nargs="+", default=["auto"], help="Event loops to compare ('auto' is uvloop+httptools).")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds of load per configuration.")
+    parser.add_argument("--clients", type=int, default=2, help="Load-generating processes.")
+    parser.add_argument("--concurrency", type=int, default=32, help="Connections per client process.")
+    parser.add_argument("--rows", type=int, default=1000)
+    args = parser.parse_args()
+
+    workspace = create_sandbox(RESOURCE, FIELDS)
+    results = {}
+    try:
+        db_url = f"sqlite+aiosqlite:///{os.path.join(workspace, 'bench.db')}"
+        load_app(workspace, db_url)
+        asyncio.run(seed(args.rows))
+        for loop in args.loops:
+            for workers in args.workers:
+                server, base_url = start_server(workspace, db_url, workers, loop)
+                try:
+                    results[f"{loop}/w{workers}"] = measure(base_url, args)
+                finally:
+                    stop_server(server)
+    finally:
+        remove_sandbox(workspace)
+
+    previous = load_previous_results("worker_scaling") or {}
+    print(f"{'config':14} {'rps':>9} {'p50 ms':>8} {'p99 ms':>8} {'errors':>6} {'speed-up':>8}")
+    for loop in args.loops:
+        baseline = results[f"{loop}/w{args.workers[0]}"]["throughput_rps"]
+        for workers in args.workers:
+            name = f"{loop}/w{workers}"
+            stats = results[name]
+            stats["speedup"] = round(stats["throughput_rps"] / baseline, 2) if baseline else None
+            delta = ""
+            if name in previous:
+                delta = f"  ({stats['throughput_rps'] - previous[name]['throughput_rps']:+.1f} rps)"
+            print(
+                f"{name:14} {stats['throughput_rps']:9.1f} {stats['p50_ms']:8.2f} {stats['p99_ms']:8.2f} "
+                f"{stats['errors']:6} {stats['speedup']:7.2f}x{delta}"
+            )
+    print(f"\n{os.cpu_count()} CPUs; speed-up is bounded by the cores left over for the load generators.")
+    path = save_results("worker_scaling", results)
+    print(f"\nResults written to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -25,6 +25,17 @@ function generateTenantSignature(domain) {
     .digest("hex");
 }
 
+/**
+ * Correlation ID for the backend call: the incoming request's X-Request-ID (e.g. set by the
+ * proxy) when present, otherwise a new one. The backend tags its log lines with it.
+ * @param {object} req
+ * @returns {string}
+ */
+function getRequestId(req) {
+  const incoming = req.headers["x-request-id"];
+  return typeof incoming === "string" && incoming ? incoming : crypto.randomUUID();
+}
+
 /**
  * Secure server-side fetch to your FastAPI backend with signed tenant headers.
  * @param {string} path - Relative API path (e.g., "/google-client-credentials")
@@ -42,6 +53,7 @@ export async function signedFetch(path, req, options = {}) {
     "Content-Type": "application/json",
     "X-Tenant-Domain": domain,
     "X-Tenant-Signature": signature,
+    "X-Request-ID": getRequestId(req),
     ...(req.headers.cookie ? { "Cookie": req.headers.cookie } : {}), // Forward cookie header
     ...(options.headers || {}), // Merge any additional headers from options
   };
@@ -50,4 +62,18 @@ export async function signedFetch(path, req, options = {}) {
     ...options,
     headers: headers,
   });
-}
\ No newline at end of file
+}
+
+/**
+ * Passes the backend's read-your-writes cookie on to the browser after a write, so the user's
+ * next reads go to the primary database while read replicas catch up.
+ * @param {Response} backendResponse - The response of a signedFetch write
+ * @param {object} res - The Next.js API response object
+ */
+export function forwardReadPin(backendResponse, res) {
+  const pins = backendResponse.headers.getSetCookie().filter((cookie) => cookie.startsWith("read_primary_until="));
+  if (pins.length) {
+    const existing = res.getHeader("Set-Cookie") || [];
+    res.setHeader("Set-Cookie", [...(Array.isArray(existing) ? existing : [existing]), ...pins]);
+  }
+}